@@ -1,46 +1,100 @@
+from concurrent.futures import Future
 import logging
+import os
 import sys
+import threading
 import traceback
+from typing import Iterator
 
 from PIL import Image
 
-from FileTranslator.Converters.ImageAndPDF import merge_images_into_pdf
-from FileTranslator.Converters.ImageAndPDF import split_pdf_into_images
+from FileTranslator.Converters.ImageAndPDF import iterate_pdf_pages
+from FileTranslator.Converters.PdfWriter import StreamingPdfWriter
 
 # OCR
 from FileTranslator.OCR.IOCR import IOCR
 from FileTranslator.OCR.OCRManager import get_ocr
+from FileTranslator.OCR.PageClassifier import classify_page
+from FileTranslator.OCR.PageLayout import PageLayout
+from FileTranslator.OCR.PdfTextLayer import PdfTextLayer
+from FileTranslator.OCR.RunningLines import RunningLines
 
 # Translators
+from FileTranslator.Translator.CachedTranslator import CachedTranslator
+from FileTranslator.Translator.IAsyncTranslator import IAsyncTranslator
 from FileTranslator.Translator.ITranslator import ITranslator
+from FileTranslator.Translator.ReplayTranslator import RecordingTranslator
 from FileTranslator.Translator.TranslatorManager import get_translator
+from FileTranslator.Translator.TranslatorManager import make_async
 
 # Other
+from FileTranslator.Util.EventLoopThread import EventLoopThread
+from FileTranslator.Util.Journal import Journal
 import FileTranslator.Util.Logs as Logs
+from FileTranslator.Util.Metrics import Metrics
 from FileTranslator.Util.ParseArgs import parse_args
 from FileTranslator.Util.PathInfo import PathInfo
+from FileTranslator.Util.Pipeline import default_queue_size
+from FileTranslator.Util.Pipeline import Pipeline
 from FileTranslator.Util.TranslateInfo import TranslateInfo
 
 ################################################################################
 
 
+# Page passed between translation stages
+class _PageTask:
+    def __init__(self, ind: int, image: Image, layout: PageLayout = None):
+        self.ind = ind
+        self.image = image
+        self.layout = layout
+        self.text = self.lines = self.result = None
+        self.translation = None
+        self.running = []
+
+    ind: int
+    image: Image
+    layout: PageLayout | None
+    text: str | None  # text to translate
+    translation: Future | None  # requested translation of text
+    running: list[str]  # running lines requested with text
+    lines: list[str] | None  # translated lines
+    result: Image.Image | None
+
+
 class CLI:
     def __init__(self):
-        pass
+        # read after translation, even if it failed before they were set
+        self.translator = None
+        self.resumed_pages = []
+        self.next_resumed_page = 0
 
     def start(self):
         # Read args and set up variables
         self._prologue()
 
-        # Split pdf into images
-        self.translate_info.images = split_pdf_into_images(
-            self.path_info.source_file_path
+        # Durations of stages are recorded for every page
+        self.metrics = Metrics(self.path_info.metrics_path)
+
+        # Translated pages are stored in work directory to resume after crash
+        self.journal = Journal(
+            self.path_info.work_dir,
+            self._job_info(),
+            self.translate_info.resume,
+        )
+
+        # Translated images are written to pdf page by page
+        pdf_path = self.path_info.target_file_path
+        self.pdf_writer = StreamingPdfWriter(
+            pdf_path,
+            resolution=self.translate_info.raster_profile.dpi,
+            font_path=self.translate_info.font_path,
         )
 
         # Translate images
         try:
             self._translate_images()
         except:
+            logging.error(traceback.format_exc())
             Logs.error(
                 "Unexpected error. "
                 "Emergency termination of the program. "
@@ -53,11 +107,35 @@ class CLI:
                 )
                 smb = input()
             if smb == "n":
+                self.pdf_writer.abort()
+                self.journal.close()
+                self.metrics.close()
+                self._close_translator()
+                self._print_resume_hint()
                 return
 
-        # Convert translated images to pdf
-        pdf_path = self.path_info.target_file_path
-        merge_images_into_pdf(self.translated_images, pdf_path)
+        # Finish pdf
+        self._write_resumed_pages()
+        if self.pdf_writer.pages_count == 0:
+            Logs.warning("No translated pages to save")
+        self.pdf_writer.close()
+        Logs.user(f"Translation finished. Path to pdf: {pdf_path}")
+        Logs.user(
+            f"Stage metrics (per page in '{self.metrics.path}'):\n"
+            f"{self.metrics.summary()}"
+        )
+        self.metrics.close()
+        translator = self.translator
+        if isinstance(translator, RecordingTranslator):
+            translator = translator.translator
+        if isinstance(translator, CachedTranslator):
+            Logs.user(f"Translation cache: {translator.stats()}")
+        self._close_translator()
+        if all(self.journal.is_finished(i) for i in self.raw_images_nums):
+            self.journal.remove()
+        else:
+            self.journal.close()
+            self._print_resume_hint()
 
     def _prologue(self):
         self.path_info = PathInfo(__file__)
@@ -65,61 +143,345 @@ class CLI:
         Logs.init(self.path_info.logs_path, self.is_release)
         self.translate_info = TranslateInfo()
         parse_args(self.path_info, self.translate_info)
+        self.raw_images_nums = self.translate_info.get_page_numbers()
+
+    def _close_translator(self) -> None:
+        # recorded translations are written, connections are closed
+        if self.translator is not None:
+            self.translator.close()
+
+    def _job_info(self) -> dict:
+        # translated pages can be reused only if all of these match
+        source_stat = os.stat(self.path_info.source_file_path)
+        return {
+            "source_path": self.path_info.source_file_path,
+            "source_size": source_stat.st_size,
+            "source_mtime": source_stat.st_mtime,
+            "src_lang": self.translate_info.src_lang,
+            "trg_lang": self.translate_info.trg_lang,
+            "font_path": self.translate_info.font_path,
+            "output_mode": self.translate_info.output_mode,
+            "dpi": self.translate_info.raster_profile.dpi,
+            "raster_color": self.translate_info.raster_profile.color,
+            "translator": self.translate_info.translator_alias,
+            "translator_url": self.translate_info.translator_url,
+            "use_text_layer": self.translate_info.use_text_layer,
+            "find_running_lines": self.translate_info.find_running_lines,
+            "classify_pages": self.translate_info.classify_pages,
+            "fast_render": self.translate_info.fast_render,
+            "save_context": self.translate_info.save_context,
+        }
+
+    def _print_resume_hint(self) -> None:
+        Logs.user(
+            f"Translated pages are saved in '{self.path_info.work_dir}'. "
+            "Run the same command with --resume option to continue"
+        )
 
     def _translate_images(self) -> None:
         # Init components
         self.ocr = get_ocr(self.path_info, self.translate_info)
+        self.text_layer = None
+        if self.translate_info.use_text_layer:
+            self.text_layer = PdfTextLayer(self.path_info.source_file_path)
         self.translator = get_translator(self.path_info, self.translate_info)
+        self.running_lines = None
+        if self.translate_info.find_running_lines:
+            self.running_lines = RunningLines()
 
         # Init cycle variables
-        self.raw_images_nums = self.translate_info.get_page_numbers()
-        self.translated_images = []
-        self.prev_page = -2
+        self.resumed_pages = [
+            i for i in self.raw_images_nums if self.journal.is_finished(i)
+        ]
+        if self.running_lines is not None:
+            self._restore_running_lines()
+        self.next_resumed_page = 0
+        self.prev_recognized_page = -2
         self.finish_translation = False
         Logs.user("Starting translation")
-        for i in self.raw_images_nums:
+        page_numbers = [
+            i for i in self.raw_images_nums if not self.journal.is_finished(i)
+        ]
+        if self.translate_info.use_pipeline:
+            page_numbers = self._translate_images_pipelined(page_numbers)
+        self._translate_images_sequentially(page_numbers)
+        if self.text_layer is not None:
+            self.text_layer.close()
+
+    def _page_tasks(self, page_numbers: list[int]) -> Iterator[_PageTask]:
+        pages = self.metrics.timed(
+            iterate_pdf_pages(
+                self.path_info.source_file_path,
+                page_numbers,
+                profile=self.translate_info.raster_profile,
+            ),
+            "rasterize",
+        )
+        if self.text_layer is not None or self.translate_info.classify_pages:
+            pages = self._skip_recognition(pages)
+        if self.translate_info.ocr_workers > 1:
+            # layouts are built by ocr in advance, time of waiting for them
+            # is measured
+            layouts = self.metrics.timed(self.ocr.recognize_all(pages), "ocr")
+            for i, layout in layouts:
+                yield _PageTask(i, layout.image, layout)
+        else:
+            for i, page in pages:
+                if isinstance(page, PageLayout):
+                    yield _PageTask(i, page.image, page)
+                else:
+                    yield _PageTask(i, page)
+
+    def _skip_recognition(
+        self, pages: Iterator[tuple[int, Image]]
+    ) -> Iterator[tuple[int, Image.Image | PageLayout]]:
+        # layouts of pages, which don't need ocr, are made in advance
+        try:
+            for i, image in pages:
+                with self.metrics.timer(i, "ocr"):
+                    layout = self._layout_without_ocr(i, image)
+                yield i, image if layout is None else layout
+        finally:
+            pages.close()
+
+    def _layout_without_ocr(self, i: int, image: Image) -> PageLayout | None:
+        if self.text_layer is not None:
+            layout = self.text_layer.layout(i, image)
+            if layout is not None:
+                Logs.dev(f"Text of page {i + 1} is taken from text layer")
+                self.metrics.count(i, "text_layer_pages")
+                return layout
+        if self.translate_info.classify_pages:
+            kind = classify_page(image)
+            if kind != "text":
+                # empty layout, page is written as it is
+                Logs.user(f"Page {i + 1} looks {kind}, it is not translated")
+                self.metrics.count(i, f"{kind}_pages")
+                return PageLayout(image)
+        return None
+
+    def _translate_images_sequentially(self, page_numbers: list[int]) -> None:
+        tasks = self._page_tasks(page_numbers)
+        for task in tasks:
             # Check for finish
             if self.finish_translation:
                 break
-            self._translate_image_loop(i)
+            self._translate_image_loop(task)
+        tasks.close()
 
-    def _translate_image_loop(self, ind: int) -> None:
-        Logs.user(f"*** Translating page {ind + 1}  ***")
-        cur_image = self.translate_info.images[ind]
-        self.save_context = (
-            self.translate_info.save_context and ind == self.prev_page + 1
-        )
+    def _translate_images_pipelined(self, page_numbers: list[int]) -> list[int]:
+        # Returns pages that were not translated because of failure
+        Logs.user("Translating pages in pipeline mode")
+        stages = [
+            ("ocr", self._recognize_stage),
+            ("translate", self._translate_stage),
+            ("render", self._render_stage),
+        ]
+        pages_in_flight = self.translate_info.pages_in_flight
+        if pages_in_flight > 1:
+            # translations of several pages are requested before the first
+            # of them is needed
+            stages.insert(1, ("request", self._request_stage))
+            self.event_loop = EventLoopThread()
+            self.async_translator = make_async(self.translator)
+            self.pages_in_flight = threading.BoundedSemaphore(pages_in_flight)
+        translated_count = 0
+        try:
+            with Pipeline(
+                self._page_tasks(page_numbers),
+                stages,
+                max(default_queue_size, pages_in_flight),
+            ) as pipeline:
+                for task in pipeline:
+                    self._write_translated_page(task)
+                    translated_count += 1
+                    Logs.user(f"page {task.ind + 1} translated")
+        except Pipeline.StageFailed as failure:
+            Logs.warning(
+                f"Pipeline stage '{failure.stage}' failed, "
+                "continuing translation page by page"
+            )
+            logging.error(failure.trace)
+            if isinstance(failure.item, _PageTask):
+                # page is translated again without pipeline
+                self.metrics.count(failure.item.ind, "retries")
+            # context was already taken from pages recognized in advance, it
+            # is restored from the last written page
+            self.prev_recognized_page = -2
+        finally:
+            if pages_in_flight > 1:
+                self.event_loop.close()
+                self.async_translator.close()
+        return page_numbers[translated_count:]
+
+    def _translate_image_loop(self, task: _PageTask) -> None:
+        Logs.user(f"*** Translating page {task.ind + 1}  ***")
         self.page_handled = False
 
         while not self.page_handled and not self.finish_translation:
             try:
-                translated_image = self._translate_image(cur_image)
-                self.translated_images.append(translated_image)
-                self.prev_page = ind
+                self._translate_image(task)
+                self._write_translated_page(task)
                 break
             except:
-                self._handle_translation_failure(ind)
-        Logs.user(f"page {ind + 1} translated")
-
-    def _translate_image(self, image: Image) -> Image:
-        # Extract text from image
-        Logs.user("Extracting text")
-        text = self.ocr.get_text_to_translate(image, self.save_context)
-        Logs.dev(f"text before translation:\n{text}\n-------------------")
-
-        # Translate text
-        Logs.user("Translating text")
-        text = self.translator.translate(text)
-        Logs.dev(f"text after translation:\n{text}\n-------------------")
-
-        # Save translated image
-        Logs.user("Saving translated text")
-        res = self.ocr.translated_text_to_image(text, self.translator)
+                self._handle_translation_failure(task)
+        Logs.user(f"page {task.ind + 1} translated")
+
+    def _translate_image(self, task: _PageTask) -> None:
+        # Stages finished by previous attempts are not repeated
+        if task.text is None:
+            self._recognize_stage(task)
+            Logs.dev(lambda: f"text before translation:\n{task.text}\n------")
+        if task.lines is None:
+            self._translate_stage(task)
+        self._render_stage(task)
         self.page_handled = True
-        return res
 
-    def _handle_translation_failure(self, ind: int):
-        Logs.warning(f"Exception raised while translating page {ind + 1}")
+    # Stages of page translation, each of them fills according fields of task
+
+    def _recognize_stage(self, task: _PageTask) -> _PageTask:
+        Logs.user(f"Extracting text, page {task.ind + 1}")
+        if (
+            self.journal.is_finished(task.ind - 1)
+            and self.prev_recognized_page != task.ind - 1
+        ):
+            self._restore_context(task.ind - 1)
+        save_context = (
+            self.translate_info.save_context
+            and task.ind == self.prev_recognized_page + 1
+        )
+        with self.metrics.timer(task.ind, "ocr"):
+            if task.layout is None:
+                task.layout = self.ocr.recognize(task.image)
+            if self.running_lines is not None:
+                self._extract_running_lines(task)
+            task.text = self.ocr.add_context(task.layout, save_context)
+        self.prev_recognized_page = task.ind
+        return task
+
+    def _restore_context(self, ind: int) -> None:
+        # page `ind` was translated by previous run or before pipeline failure,
+        # next page gets the same context as then
+        layout = self.journal.load_layout(ind)
+        if layout is not None:
+            Logs.dev(f"Context restored from translated page {ind + 1}")
+            self.ocr.restore_context(layout)
+            self.prev_recognized_page = ind
+
+    def _restore_running_lines(self) -> None:
+        # running lines of pages translated by previous run are found and
+        # reused on next pages as if the run wasn't interrupted
+        for i in self.resumed_pages:
+            layout = self.journal.load_layout(i)
+            if layout is not None:
+                _, lines = self.journal.load_lines(i)
+                height = self.journal.page_size(i)[1]
+                self.running_lines.restore(layout, i, height, lines)
+
+    def _request_stage(self, task: _PageTask) -> _PageTask:
+        batch = self._translation_batch(task)
+        if len(batch) == 0:
+            return task
+        # waits while too many pages are being translated
+        self.pages_in_flight.acquire()
+        task.translation = self.event_loop.submit(
+            self.async_translator.translate_batch(batch)
+        )
+        task.translation.add_done_callback(
+            lambda _: self.pages_in_flight.release()
+        )
+        return task
+
+    def _translate_stage(self, task: _PageTask) -> _PageTask:
+        Logs.user(f"Translating text, page {task.ind + 1}")
+        # the only translation request of page
+        with self.metrics.timer(task.ind, "translate"):
+            if task.translation is None:
+                batch = self._translation_batch(task)
+                texts = []
+                # blank page, picture or page without recognized text
+                if len(batch) != 0:
+                    texts = self.translator.translate_batch(batch)
+            else:
+                texts = task.translation.result()
+                task.translation = None
+            text = self._take_translations(task, texts)
+        Logs.dev(lambda: f"text after translation:\n{text}\n-------------")
+        task.lines = self.ocr.split_to_lines(task.layout, text)
+        if self.running_lines is not None:
+            # boxes of running lines follow boxes of text
+            task.lines += self.running_lines.lines(task.layout)
+        self.metrics.count(task.ind, "src_chars", len(task.text))
+        self.metrics.count(task.ind, "trg_chars", len(text))
+        self.metrics.count(
+            task.ind, "line_mismatches", task.layout.line_mismatches
+        )
+        return task
+
+    def _extract_running_lines(self, task: _PageTask) -> None:
+        page_numbers = self.running_lines.extract(task.layout, task.ind)
+        running_count = len(task.layout.running_lines)
+        if page_numbers + running_count != 0:
+            Logs.dev(
+                f"Page {task.ind + 1}: {running_count} running lines, "
+                f"{page_numbers} page numbers are not translated with text"
+            )
+        self.metrics.count(task.ind, "page_numbers", page_numbers)
+        self.metrics.count(task.ind, "running_lines", running_count)
+
+    def _translation_batch(self, task: _PageTask) -> list[str]:
+        # text of page and its running lines, which are not translated yet
+        task.running = []
+        if self.running_lines is not None:
+            task.running = self.running_lines.untranslated(task.layout)
+        texts = [] if len(task.text) == 0 else [task.text]
+        return texts + task.running
+
+    def _take_translations(self, task: _PageTask, texts: list[str]) -> str:
+        # translations of running lines are reused by next pages
+        if len(task.running) != 0:
+            self.running_lines.store(task.running, texts[-len(task.running) :])
+        return "" if len(task.text) == 0 else texts[0]
+
+    def _render_stage(self, task: _PageTask) -> _PageTask:
+        Logs.user(f"Saving translated text, page {task.ind + 1}")
+        with self.metrics.timer(task.ind, "render"):
+            if self.translate_info.output_mode == "vector":
+                # lines are written to pdf as text over source page
+                task.result = task.image
+            else:
+                task.result = self.ocr.lines_to_image(task.layout, task.lines)
+        return task
+
+    def _write_translated_page(self, task: _PageTask) -> None:
+        with self.metrics.timer(task.ind, "write"):
+            self._write_resumed_pages(task.ind)
+            self._add_pdf_page(task.result, task.layout.boxes, task.lines)
+            self.journal.record_page(
+                task.ind, task.layout, task.lines, task.result
+            )
+        self.metrics.finish_page(task.ind)
+
+    def _add_pdf_page(
+        self, image: Image, boxes: list, lines: list[str] | None
+    ) -> None:
+        if self.translate_info.output_mode == "vector" and lines is not None:
+            self.pdf_writer.add_text_page(image, boxes, lines)
+        else:
+            self.pdf_writer.add_image_page(image)
+
+    def _write_resumed_pages(self, before: int | None = None) -> None:
+        # pages translated by previous runs, that precede page `before`
+        while self.next_resumed_page < len(self.resumed_pages):
+            ind = self.resumed_pages[self.next_resumed_page]
+            if before is not None and ind > before:
+                return
+            boxes, lines = self.journal.load_lines(ind)
+            self._add_pdf_page(self.journal.load_page(ind), boxes, lines)
+            self.next_resumed_page += 1
+
+    def _handle_translation_failure(self, task: _PageTask):
+        Logs.warning(f"Exception raised while translating page {task.ind + 1}")
         logging.error(traceback.format_exc())
         sys.stderr.flush()
         sys.stdout.flush()
@@ -137,12 +499,15 @@ class CLI:
             )
             smb = input()
         if smb == "r":
+            self.metrics.count(task.ind, "retries")
             self.translator.reset()
             self.ocr.reset()
             return
         if smb == "s":
-            image = self.ocr.translated_text_to_image("", self.translator)
-            self.translated_images.append(image)
+            self._write_resumed_pages(task.ind)
+            self.pdf_writer.add_image_page(task.image)
+            self.metrics.count(task.ind, "skipped")
+            self.metrics.finish_page(task.ind)
             self.page_handled = True
             self.translator.reset()
             self.ocr.reset()
@@ -155,11 +520,18 @@ class CLI:
     translate_info: TranslateInfo
     ocr: IOCR
     translator: ITranslator
+    running_lines: RunningLines | None
+    async_translator: IAsyncTranslator  # used if pages are in flight
+    event_loop: EventLoopThread  # runs async_translator
+    pages_in_flight: threading.BoundedSemaphore
     raw_images_nums: list[int]
-    translated_images: list[Image]
-    prev_page: int
+    journal: Journal
+    metrics: Metrics
+    resumed_pages: list[int]
+    next_resumed_page: int
+    pdf_writer: StreamingPdfWriter
+    prev_recognized_page: int
     finish_translation: bool
-    save_context: bool
     page_handled: bool
 
 
@@ -1,33 +1,92 @@
-from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 
 from pdf2image import convert_from_path
 from PIL import Image
 
+from FileTranslator.Converters.PdfWriter import StreamingPdfWriter
+from FileTranslator.Converters.RasterProfile import RasterProfile
 import FileTranslator.Util.Logs as Logs
 
 ################################################################################
 
+# Variables
 
-def split_pdf_into_images(pdf_path: str) -> list[Image]:
-    Logs.user(f'Splitting "{pdf_path}" to images')
-    images = convert_from_path(pdf_path)
-    Logs.user(f"Splitting finished")
-    return images
+# pages rasterized by one pdftoppm call, next chunk is prepared in background
+default_look_ahead = 4
+
+################################################################################
+
+
+def iterate_pdf_pages(
+    pdf_path: str,
+    page_numbers: list[int],
+    look_ahead: int = default_look_ahead,
+    profile: RasterProfile = RasterProfile(),
+) -> Iterator[tuple[int, Image]]:
+    # Pages are converted in chunks of at most `look_ahead` consecutive pages.
+    # While caller handles current chunk, the next one is rasterized in
+    # background, so no more than two chunks are kept in memory.
+    chunks = _split_into_chunks(page_numbers, max(1, look_ahead))
+    if len(chunks) == 0:
+        return
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(_rasterize_chunk, pdf_path, chunks[0], profile)
+        for i, chunk in enumerate(chunks):
+            images = future.result()
+            if i + 1 < len(chunks):
+                future = executor.submit(
+                    _rasterize_chunk, pdf_path, chunks[i + 1], profile
+                )
+            for ind, image in zip(chunk, images):
+                yield ind, image
+            del images
+
+
+def _split_into_chunks(page_numbers: list[int], size: int) -> list[list[int]]:
+    # chunk contains only consecutive pages to be rasterized by one call
+    chunks = []
+    for ind in page_numbers:
+        if (
+            len(chunks) == 0
+            or len(chunks[-1]) == size
+            or chunks[-1][-1] + 1 != ind
+        ):
+            chunks.append([ind])
+        else:
+            chunks[-1].append(ind)
+    return chunks
+
+
+def _rasterize_chunk(
+    pdf_path: str, chunk: list[int], profile: RasterProfile
+) -> list[Image]:
+    Logs.dev(
+        f'Rasterizing pages {chunk[0] + 1}-{chunk[-1] + 1} of "{pdf_path}"'
+    )
+    images = convert_from_path(
+        pdf_path,
+        first_page=chunk[0] + 1,
+        last_page=chunk[-1] + 1,
+        **profile.convert_options(),
+    )
+    return [profile.finish_image(image) for image in images]
 
 
 def merge_images_into_pdf(
     images: list[str] | list[Image], pdf_path: str
 ) -> None:
     Logs.user(f"Converting images to pdf")
-    image_count = len(images)
-    if image_count == 0:
+    if len(images) == 0:
         Logs.warning("No images to merge into pdf")
         return
-    if images is list[str]:
-        image_list = [Image.open(fp=images[i]) for i in range(image_count)]
-    else:
-        image_list = images
-    image_list[0].save(fp=pdf_path, save_all=True, append_images=image_list[1:])
+    with StreamingPdfWriter(pdf_path) as writer:
+        for image in images:
+            if isinstance(image, str):
+                with Image.open(fp=image) as opened:
+                    writer.add_image_page(opened)
+            else:
+                writer.add_image_page(image)
     Logs.user(f"Converting images to pdf finished. Path to pdf: {pdf_path}")
 
 
@@ -0,0 +1,299 @@
+import re
+import unicodedata
+
+from PyPDF4.generic import DictionaryObject
+from PyPDF4.generic import TextStringObject
+
+################################################################################
+
+# Variables
+
+# glyph metrics in thousandths of text space unit, used when font doesn't
+# specify them
+default_width = 500
+default_cap_height = 700
+max_descent = 250
+
+_cmap_token_re = re.compile(rb"<[0-9A-Fa-f\s]*>|\[|\]|[A-Za-z]+")
+
+# glyph names of /Differences which are not a single letter or uniXXXX
+_glyph_names = {
+    "space": " ",
+    "nbspace": " ",
+    "exclam": "!",
+    "quotedbl": '"',
+    "numbersign": "#",
+    "dollar": "$",
+    "percent": "%",
+    "ampersand": "&",
+    "quotesingle": "'",
+    "parenleft": "(",
+    "parenright": ")",
+    "asterisk": "*",
+    "plus": "+",
+    "comma": ",",
+    "hyphen": "-",
+    "minus": "-",
+    "period": ".",
+    "slash": "/",
+    "zero": "0",
+    "one": "1",
+    "two": "2",
+    "three": "3",
+    "four": "4",
+    "five": "5",
+    "six": "6",
+    "seven": "7",
+    "eight": "8",
+    "nine": "9",
+    "colon": ":",
+    "semicolon": ";",
+    "less": "<",
+    "equal": "=",
+    "greater": ">",
+    "question": "?",
+    "at": "@",
+    "bracketleft": "[",
+    "backslash": "\\",
+    "bracketright": "]",
+    "underscore": "_",
+    "braceleft": "{",
+    "bar": "|",
+    "braceright": "}",
+    "quoteleft": "‘",
+    "quoteright": "’",
+    "quotedblleft": "“",
+    "quotedblright": "”",
+    "quotesinglbase": "‚",
+    "quotedblbase": "„",
+    "guillemotleft": "«",
+    "guillemotright": "»",
+    "endash": "–",
+    "emdash": "—",
+    "bullet": "•",
+    "ellipsis": "…",
+    "fi": "fi",
+    "fl": "fl",
+    "ff": "ff",
+    "ffi": "ffi",
+    "ffl": "ffl",
+}
+
+################################################################################
+
+
+def string_bytes(string) -> bytes:
+    # strings of content streams are parsed by PyPDF4 as text if they look
+    # like text, codes of glyphs are original bytes
+    if isinstance(string, TextStringObject):
+        return string.original_bytes
+    return bytes(string)
+
+
+def _glyph_name_to_text(name: str) -> str | None:
+    name = name.lstrip("/").split(".")[0]
+    if name in _glyph_names:
+        return _glyph_names[name]
+    if len(name) == 1:
+        return name
+    match = re.fullmatch("uni([0-9A-Fa-f]{4})+|u([0-9A-Fa-f]{4,6})", name)
+    if match is None:
+        return None
+    digits = name[3:] if name.startswith("uni") else name[1:]
+    step = 4 if name.startswith("uni") else len(digits)
+    return "".join(
+        chr(int(digits[i : i + step], 16)) for i in range(0, len(digits), step)
+    )
+
+
+def _utf16(data: bytes) -> str:
+    return data.decode("utf-16-be", errors="replace")
+
+
+def _parse_to_unicode(data: bytes) -> (dict[int, str], int):
+    # returns mapping of character codes and length of code in bytes
+    mapping = {}
+    code_length = 0
+    tokens = _cmap_token_re.findall(data)
+    section = None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in [b"begincodespacerange", b"beginbfchar", b"beginbfrange"]:
+            section = token[5:]
+        elif token.startswith(b"end"):
+            section = None
+        elif section == b"codespacerange" and token.startswith(b"<"):
+            code_length = max(code_length, len(_hex(token)))
+            i += 1
+        elif section == b"bfchar" and token.startswith(b"<"):
+            if i + 1 < len(tokens) and tokens[i + 1].startswith(b"<"):
+                mapping[_code(token)] = _utf16(_hex(tokens[i + 1]))
+            i += 1
+        elif section == b"bfrange" and token.startswith(b"<"):
+            i = _parse_bfrange(tokens, i, mapping)
+        i += 1
+    return mapping, code_length
+
+
+def _parse_bfrange(tokens: list[bytes], i: int, mapping: dict) -> int:
+    # returns index of the last token of range
+    if i + 2 >= len(tokens):
+        return len(tokens)
+    first, last = _code(tokens[i]), _code(tokens[i + 1])
+    if tokens[i + 2] == b"[":
+        i += 3
+        code = first
+        while i < len(tokens) and tokens[i] != b"]":
+            mapping[code] = _utf16(_hex(tokens[i]))
+            code += 1
+            i += 1
+        return i
+    # last unit of destination is incremented
+    dst = _hex(tokens[i + 2])
+    for code in range(first, min(last, first + 0xFFFF) + 1):
+        shifted = int.from_bytes(dst[-2:], "big") + code - first
+        mapping[code] = _utf16(dst[:-2] + (shifted & 0xFFFF).to_bytes(2, "big"))
+    return i + 2
+
+
+def _hex(token: bytes) -> bytes:
+    return bytes.fromhex(re.sub(rb"[<>\s]", b"", token).decode("ascii"))
+
+
+def _code(token: bytes) -> int:
+    return int.from_bytes(_hex(token), "big")
+
+
+def _is_text(text: str) -> bool:
+    # .notdef glyphs are often mapped to noncharacters or control characters,
+    # tabs and line feeds are used as spaces
+    return all(
+        char.isspace() or unicodedata.category(char) not in ["Cc", "Cn", "Co"]
+        for char in text
+    )
+
+
+################################################################################
+
+
+# Font of pdf page as much as it is needed to extract text: unicode text and
+# width of every character code.
+class PdfFont:
+    def __init__(self, font: DictionaryObject):
+        self.composite = font.get("/Subtype") == "/Type0"
+        self.code_length = 2 if self.composite else 1
+        self.to_unicode = {}
+        self.encoding = {}
+        if "/ToUnicode" in font:
+            self.to_unicode, length = _parse_to_unicode(
+                font["/ToUnicode"].getObject().getData()
+            )
+            if length != 0:
+                self.code_length = length
+        self.widths = {}
+        self.default_width = default_width
+        descriptor = font
+        if self.composite:
+            descendant = font["/DescendantFonts"][0].getObject()
+            self._read_cid_widths(descendant)
+            descriptor = descendant
+        else:
+            self._read_simple_widths(font)
+            self._read_encoding(font)
+        descriptor = descriptor.get("/FontDescriptor")
+        descriptor = {} if descriptor is None else descriptor.getObject()
+        self.cap_height = float(descriptor.get("/CapHeight", 0))
+        if self.cap_height <= 0:
+            self.cap_height = default_cap_height
+        self.descent = min(
+            abs(float(descriptor.get("/Descent", 0))), max_descent
+        )
+        # glyph space of Type3 fonts is defined by font matrix
+        matrix = font.get("/FontMatrix")
+        self.scale = 1.0 if matrix is None else float(matrix[0]) * 1000
+
+    def decode(self, data: bytes) -> list[tuple[int, str | None, float]]:
+        # code, its text (None if unknown) and width in text space units
+        res = []
+        length = self.code_length
+        for i in range(0, len(data) - length + 1, length):
+            code = int.from_bytes(data[i : i + length], "big")
+            text = self.to_unicode.get(code)
+            if text is None and not self.composite:
+                text = self.encoding.get(code)
+            if text is not None and not _is_text(text):
+                text = None
+            width = self.widths.get(code, self.default_width) * self.scale
+            res.append((code, text, width / 1000))
+        return res
+
+    ############################################################################
+
+    # Internals
+
+    def _read_simple_widths(self, font: DictionaryObject) -> None:
+        first = int(font.get("/FirstChar", 0))
+        widths = font.get("/Widths")
+        widths = [] if widths is None else widths.getObject()
+        for i, width in enumerate(widths):
+            self.widths[first + i] = float(width)
+        descriptor = font.get("/FontDescriptor")
+        if descriptor is not None:
+            missing = descriptor.getObject().get("/MissingWidth", 0)
+            if float(missing) > 0:
+                self.default_width = float(missing)
+
+    def _read_cid_widths(self, font: DictionaryObject) -> None:
+        self.default_width = float(font.get("/DW", 1000)) or default_width
+        widths = font.get("/W")
+        widths = [] if widths is None else widths.getObject()
+        i = 0
+        while i + 1 < len(widths):
+            first = int(widths[i])
+            item = widths[i + 1].getObject()
+            if isinstance(item, list):
+                for j, width in enumerate(item):
+                    self.widths[first + j] = float(width)
+                i += 2
+            elif i + 2 < len(widths):
+                for code in range(first, int(item) + 1):
+                    self.widths[code] = float(widths[i + 2])
+                i += 3
+            else:
+                break
+
+    def _read_encoding(self, font: DictionaryObject) -> None:
+        # standard encodings are close enough to cp1252 for text extraction
+        base = "cp1252"
+        encoding = font.get("/Encoding")
+        encoding = None if encoding is None else encoding.getObject()
+        name = encoding
+        if isinstance(encoding, DictionaryObject):
+            name = encoding.get("/BaseEncoding")
+        if name == "/MacRomanEncoding":
+            base = "mac_roman"
+        self.encoding = {
+            code: bytes([code]).decode(base, errors="ignore") or None
+            for code in range(32, 256)
+        }
+        if isinstance(encoding, DictionaryObject):
+            code = 0
+            for item in encoding.get("/Differences", []):
+                item = item.getObject()
+                if isinstance(item, int):
+                    code = item
+                else:
+                    self.encoding[code] = _glyph_name_to_text(item)
+                    code += 1
+
+    # member fields
+    composite: bool  # Type0 font with multi-byte codes
+    code_length: int  # in bytes
+    to_unicode: dict[int, str]
+    encoding: dict[int, str | None]  # codes of simple font without ToUnicode
+    widths: dict[int, float]  # in thousandths of text space unit
+    default_width: float
+    cap_height: float  # in thousandths of text space unit
+    descent: float  # positive, in thousandths of text space unit
+    scale: float  # of widths of Type3 fonts
@@ -0,0 +1,328 @@
+import io
+import os
+import zlib
+
+from PIL import Image
+
+from FileTranslator.Converters.TrueTypeFont import TrueTypeFont
+from FileTranslator.OCR.PageLayout import expand_box
+from FileTranslator.OCR.PageLayout import LineBox
+import FileTranslator.Util.Logs as Logs
+
+################################################################################
+
+# Variables
+
+# the same values PIL uses when saving images to pdf
+default_resolution = 72.0
+default_jpeg_quality = 75
+
+# reserved object numbers, written by close()
+_catalog_obj = 1
+_pages_obj = 2
+
+################################################################################
+
+
+def _image_to_stream(image: Image, quality: int) -> (bytes, str, str, int):
+    # data, filter, color space and bits per component
+    if image.mode == "1":
+        # black and white pages stay 1-bit, rows are padded to whole bytes
+        # and 1 is white both in PIL and in pdf
+        data = zlib.compress(image.tobytes("raw", "1"))
+        return data, "/FlateDecode", "/DeviceGray", 1
+    if image.mode not in ["L", "RGB"]:
+        image = image.convert("L" if image.mode == "LA" else "RGB")
+    colorspace = "/DeviceGray" if image.mode == "L" else "/DeviceRGB"
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue(), "/DCTDecode", colorspace, 8
+
+
+def _pdf_number(value: float) -> str:
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def _to_unicode_cmap(glyphs: dict[int, str]) -> bytes:
+    # maps glyph ids back to text, so translated text can be searched and copied
+    lines = [
+        "/CIDInit /ProcSet findresource begin",
+        "12 dict begin",
+        "begincmap",
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+        "/CMapName /Adobe-Identity-UCS def",
+        "/CMapType 2 def",
+        "1 begincodespacerange",
+        "<0000> <FFFF>",
+        "endcodespacerange",
+    ]
+    items = sorted(glyphs.items())
+    for start in range(0, len(items), 100):
+        chunk = items[start : start + 100]
+        lines.append(f"{len(chunk)} beginbfchar")
+        for glyph_id, char in chunk:
+            code = char.encode("utf-16-be").hex().upper()
+            lines.append(f"<{glyph_id:04X}> <{code}>")
+        lines.append("endbfchar")
+    lines += ["endcmap", "CMapName currentdict /CMap defineresource pop"]
+    lines += ["end", "end"]
+    return "\n".join(lines).encode("ascii")
+
+
+################################################################################
+
+
+# Pages are written to file as soon as they are added, so memory doesn't depend
+# on number of pages. Page tree, catalog and xref table are written by close(),
+# until then file is not a valid pdf.
+#
+# Text pages contain source page as background image and translated lines as
+# text objects of embedded font. Font is written only once, glyph widths and
+# text mapping of used glyphs are written by close().
+class StreamingPdfWriter:
+    def __init__(
+        self,
+        pdf_path: str,
+        resolution: float = default_resolution,
+        jpeg_quality: int = default_jpeg_quality,
+        font_path: str | None = None,
+    ):
+        self.pdf_path = pdf_path
+        self.resolution = resolution
+        self.jpeg_quality = jpeg_quality
+        self.font_path = font_path
+        self.font = None
+        self.used_glyphs = {}
+        self.offsets = {}
+        self.page_objs = []
+        self.next_obj = _pages_obj + 1
+        self.file = open(pdf_path, "wb")
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if not self.file.closed:
+            self.close()
+
+    @property
+    def pages_count(self) -> int:
+        return len(self.page_objs)
+
+    def add_image_page(self, image: Image) -> None:
+        image_obj = self._write_image(image)
+        width, height = self._to_points(image.width, image.height)
+        content = f"q {width} 0 0 {height} 0 0 cm /Im0 Do Q".encode("ascii")
+        content_obj = self._write_stream("", content)
+        self._write_page(
+            width,
+            height,
+            f"<< /XObject << /Im0 {image_obj} 0 R >> >>",
+            content_obj,
+        )
+
+    def add_text_page(
+        self, background: Image, boxes: list[LineBox], lines: list[str]
+    ) -> None:
+        # line boxes are in pixels of background
+        if len(lines) == 0:
+            self.add_image_page(background)
+            return
+        if self.font is None:
+            self._embed_font()
+        image_obj = self._write_image(background)
+        width, height = self._to_points(background.width, background.height)
+        scale = 72.0 / self.resolution
+
+        # background
+        ops = [f"q {width} 0 0 {height} 0 0 cm /Im0 Do Q"]
+        rects = [expand_box(box) for box in boxes[: len(lines)]]
+
+        # hide source lines
+        ops.append("1 g")
+        for x, y, w, h in rects:
+            ops.append(
+                f"{_pdf_number(x * scale)} {_pdf_number(height - (y + h) * scale)} "
+                f"{_pdf_number(w * scale)} {_pdf_number(h * scale)} re"
+            )
+        ops += ["f", "0 g"]
+
+        # translated lines are stretched to boxes like in raster mode
+        font = self.font
+        ops.append("BT")
+        for line, (x, y, w, h) in zip(lines, rects):
+            line = line.strip()
+            advance = font.text_advance(line)
+            if advance == 0:
+                continue
+            size = h * scale * font.units_per_em / (font.ascent - font.descent)
+            text_width = advance * size / font.units_per_em
+            glyphs = ""
+            for char in line:
+                glyph_id = font.glyph_id(char)
+                self.used_glyphs.setdefault(glyph_id, char)
+                glyphs += f"{glyph_id:04X}"
+            baseline = (
+                height - y * scale - font.ascent * size / font.units_per_em
+            )
+            ops.append(
+                f"/F1 {_pdf_number(size)} Tf "
+                f"{_pdf_number(100 * w * scale / text_width)} Tz "
+                f"1 0 0 1 {_pdf_number(x * scale)} {_pdf_number(baseline)} Tm "
+                f"<{glyphs}> Tj"
+            )
+        ops.append("ET")
+
+        content = zlib.compress("\n".join(ops).encode("ascii"))
+        content_obj = self._write_stream("/Filter /FlateDecode", content)
+        self._write_page(
+            width,
+            height,
+            f"<< /XObject << /Im0 {image_obj} 0 R >> "
+            f"/Font << /F1 {self.font_obj} 0 R >> >>",
+            content_obj,
+        )
+
+    def close(self) -> None:
+        if self.font is not None:
+            self._write_font_widths()
+        kids = " ".join(f"{obj} 0 R" for obj in self.page_objs)
+        self._write_object(
+            f"<< /Type /Pages /Kids [{kids}] /Count {self.pages_count} >>",
+            _pages_obj,
+        )
+        self._write_object(
+            f"<< /Type /Catalog /Pages {_pages_obj} 0 R >>", _catalog_obj
+        )
+
+        # cross-reference table
+        xref_offset = self.file.tell()
+        lines = [f"xref\n0 {self.next_obj}\n", "0000000000 65535 f \n"]
+        for obj in range(1, self.next_obj):
+            lines.append(f"{self.offsets[obj]:010d} 00000 n \n")
+        lines.append(
+            f"trailer\n<< /Size {self.next_obj} /Root {_catalog_obj} 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n"
+        )
+        self.file.write("".join(lines).encode("ascii"))
+        self.file.close()
+
+    def abort(self) -> None:
+        self.file.close()
+        os.remove(self.pdf_path)
+
+    ############################################################################
+
+    # Internals
+
+    def _to_points(self, width: int, height: int) -> (float, float):
+        scale = 72.0 / self.resolution
+        return round(width * scale, 4), round(height * scale, 4)
+
+    def _write_image(self, image: Image) -> int:
+        data, filter_name, colorspace, bits = _image_to_stream(
+            image, self.jpeg_quality
+        )
+        return self._write_stream(
+            f"/Type /XObject /Subtype /Image "
+            f"/Width {image.width} /Height {image.height} "
+            f"/ColorSpace {colorspace} /BitsPerComponent {bits} "
+            f"/Filter {filter_name}",
+            data,
+        )
+
+    def _embed_font(self) -> None:
+        self.font = font = TrueTypeFont(self.font_path)
+        font_file_obj = self._write_stream(
+            f"/Length1 {len(font.data)} /Filter /FlateDecode",
+            zlib.compress(font.data),
+        )
+        to_em = lambda value: round(value * 1000 / font.units_per_em)
+        bbox = " ".join(str(to_em(value)) for value in font.bbox)
+        self.font_descriptor_obj = self._write_object(
+            f"<< /Type /FontDescriptor /FontName /{font.postscript_name} "
+            f"/Flags 32 /FontBBox [{bbox}] /ItalicAngle 0 "
+            f"/Ascent {to_em(font.ascent)} /Descent {to_em(font.descent)} "
+            f"/CapHeight {to_em(font.ascent)} /StemV 80 "
+            f"/FontFile2 {font_file_obj} 0 R >>"
+        )
+        # written by close(), when all used glyphs are known
+        self.cid_font_obj = self._reserve_obj()
+        self.to_unicode_obj = self._reserve_obj()
+        self.font_obj = self._write_object(
+            f"<< /Type /Font /Subtype /Type0 /BaseFont /{font.postscript_name} "
+            f"/Encoding /Identity-H "
+            f"/DescendantFonts [{self.cid_font_obj} 0 R] "
+            f"/ToUnicode {self.to_unicode_obj} 0 R >>"
+        )
+
+    def _write_font_widths(self) -> None:
+        font = self.font
+        widths = " ".join(
+            f"{glyph_id} [{round(font.advance(glyph_id) * 1000 / font.units_per_em)}]"
+            for glyph_id in sorted(self.used_glyphs.keys())
+        )
+        self._write_object(
+            f"<< /Type /Font /Subtype /CIDFontType2 "
+            f"/BaseFont /{font.postscript_name} "
+            f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) "
+            f"/Supplement 0 >> "
+            f"/FontDescriptor {self.font_descriptor_obj} 0 R "
+            f"/CIDToGIDMap /Identity /W [{widths}] >>",
+            self.cid_font_obj,
+        )
+        self._write_stream_to(
+            self.to_unicode_obj, "", _to_unicode_cmap(self.used_glyphs)
+        )
+
+    def _reserve_obj(self) -> int:
+        obj = self.next_obj
+        self.next_obj += 1
+        return obj
+
+    def _write_object(self, body: str, obj: int | None = None) -> int:
+        if obj is None:
+            obj = self._reserve_obj()
+        self.offsets[obj] = self.file.tell()
+        self.file.write(f"{obj} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+        return obj
+
+    def _write_stream(self, entries: str, data: bytes) -> int:
+        return self._write_stream_to(self._reserve_obj(), entries, data)
+
+    def _write_stream_to(self, obj: int, entries: str, data: bytes) -> int:
+        self.offsets[obj] = self.file.tell()
+        header = f"{obj} 0 obj\n<< {entries} /Length {len(data)} >>\nstream\n"
+        self.file.write(header.encode("latin-1"))
+        self.file.write(data)
+        self.file.write(b"\nendstream\nendobj\n")
+        return obj
+
+    def _write_page(
+        self, width: float, height: float, resources: str, content_obj: int
+    ) -> None:
+        page_obj = self._write_object(
+            f"<< /Type /Page /Parent {_pages_obj} 0 R "
+            f"/MediaBox [0 0 {width} {height}] "
+            f"/Resources {resources} /Contents {content_obj} 0 R >>"
+        )
+        self.page_objs.append(page_obj)
+        self.file.flush()
+        Logs.dev(f"Page {self.pages_count} written to '{self.pdf_path}'")
+
+    # member fields
+    pdf_path: str
+    resolution: float
+    jpeg_quality: int
+    font_path: str | None
+    font: TrueTypeFont | None  # embedded by first text page
+    font_obj: int
+    font_descriptor_obj: int
+    cid_font_obj: int
+    to_unicode_obj: int
+    used_glyphs: dict[int, str]  # glyph id -> char
+    file: io.BufferedWriter
+    offsets: dict[int, int]
+    page_objs: list[int]
+    next_obj: int
@@ -0,0 +1,74 @@
+from PIL import Image
+
+################################################################################
+
+# Variables
+
+# the same value pdf2image uses
+default_dpi = 200
+
+colors = ["color", "gray", "mono"]
+formats = ["ppm", "png", "jpeg", "tiff"]
+
+# gray levels below threshold become black in "mono" mode
+mono_threshold = 128
+
+################################################################################
+
+
+# Settings of page rasterization by pdftoppm. Every stage after it works with
+# the raster: tesseract binarizes it, compositor draws on it, pdf contains it.
+class RasterProfile:
+    def __init__(
+        self,
+        dpi: int = default_dpi,
+        color: str = "color",
+        thread_count: int = 1,
+        fmt: str = "ppm",
+    ):
+        self.dpi = dpi
+        self.color = color
+        self.thread_count = thread_count
+        self.fmt = fmt
+
+    def convert_options(self) -> dict:
+        # arguments of pdf2image.convert_from_path
+        return {
+            "dpi": self.dpi,
+            "grayscale": self.color != "color",
+            "thread_count": self.thread_count,
+            "fmt": self.fmt,
+        }
+
+    def finish_image(self, image: Image) -> Image:
+        # pdftoppm is asked for grayscale, thresholding is done here to keep
+        # the same pipe format
+        if self.color == "mono":
+            table = [0] * mono_threshold + [255] * (256 - mono_threshold)
+            image = image.convert("L").point(table, "1")
+        image.info["dpi"] = (self.dpi, self.dpi)
+        return image
+
+    def describe(self) -> str:
+        return (
+            f"{self.dpi} dpi, {self.color}, {self.thread_count} threads, "
+            f"{self.fmt}"
+        )
+
+    # member fields
+    dpi: int
+    color: str  # one of `colors`
+    thread_count: int  # pdftoppm processes converting one chunk of pages
+    fmt: str  # format of pdftoppm output, one of `formats`
+
+
+# Presets selected by --raster-profile, single settings can be overridden.
+# "gray": pixels take a byte instead of three in every stage, including
+# temporary files pytesseract passes to tesseract. Its effect on time and
+# quality of recognition is not measured yet.
+# "compact": black and white pages of the smallest size.
+raster_profiles = {
+    "color": RasterProfile(),
+    "gray": RasterProfile(color="gray", thread_count=2),
+    "compact": RasterProfile(dpi=150, color="mono", thread_count=2),
+}
@@ -0,0 +1,169 @@
+import struct
+
+################################################################################
+
+
+# Minimal TrueType parser: only tables required to embed font into pdf and to
+# lay out text with it.
+class TrueTypeFont:
+    # Exceptions
+    class UnsupportedFont(Exception):
+        pass
+
+    # API
+    def __init__(self, font_path: str):
+        with open(font_path, "rb") as file:
+            self.data = file.read()
+        self.tables = self._read_table_directory()
+        self._read_head()
+        self._read_hhea()
+        self._read_hmtx()
+        self._read_cmap()
+        self._read_name()
+
+    def glyph_id(self, char: str) -> int:
+        # 0 is ".notdef" glyph
+        return self.cmap.get(ord(char), 0)
+
+    def advance(self, glyph_id: int) -> int:
+        # in font units
+        if glyph_id < len(self.advances):
+            return self.advances[glyph_id]
+        return self.advances[-1]
+
+    def text_advance(self, text: str) -> int:
+        return sum(self.advance(self.glyph_id(char)) for char in text)
+
+    ############################################################################
+
+    # Internals
+
+    def _read_table_directory(self) -> dict[bytes, tuple[int, int]]:
+        (tables_count,) = struct.unpack_from(">H", self.data, 4)
+        tables = {}
+        for i in range(tables_count):
+            tag, _, offset, length = struct.unpack_from(
+                ">4sIII", self.data, 12 + 16 * i
+            )
+            tables[tag] = (offset, length)
+        for tag in [b"head", b"hhea", b"hmtx", b"cmap"]:
+            if tag not in tables:
+                raise TrueTypeFont.UnsupportedFont(f"No '{tag}' table")
+        return tables
+
+    def _read_head(self) -> None:
+        offset = self.tables[b"head"][0]
+        (self.units_per_em,) = struct.unpack_from(">H", self.data, offset + 18)
+        self.bbox = struct.unpack_from(">hhhh", self.data, offset + 36)
+
+    def _read_hhea(self) -> None:
+        offset = self.tables[b"hhea"][0]
+        self.ascent, self.descent = struct.unpack_from(
+            ">hh", self.data, offset + 4
+        )
+        (self.h_metrics_count,) = struct.unpack_from(
+            ">H", self.data, offset + 34
+        )
+
+    def _read_hmtx(self) -> None:
+        offset = self.tables[b"hmtx"][0]
+        self.advances = [
+            struct.unpack_from(">H", self.data, offset + 4 * i)[0]
+            for i in range(self.h_metrics_count)
+        ]
+
+    def _read_cmap(self) -> None:
+        offset = self.tables[b"cmap"][0]
+        _, subtables_count = struct.unpack_from(">HH", self.data, offset)
+        subtables = {}
+        for i in range(subtables_count):
+            platform, encoding, sub_offset = struct.unpack_from(
+                ">HHI", self.data, offset + 4 + 8 * i
+            )
+            (fmt,) = struct.unpack_from(">H", self.data, offset + sub_offset)
+            subtables[(platform, encoding, fmt)] = offset + sub_offset
+
+        self.cmap = {}
+        # full unicode tables are preferred
+        for platform, encoding, fmt in [(3, 10, 12), (0, 4, 12)]:
+            if (platform, encoding, fmt) in subtables:
+                self._read_cmap_format_12(subtables[platform, encoding, fmt])
+                return
+        for platform, encoding, fmt in [(3, 1, 4), (0, 3, 4), (0, 1, 4)]:
+            if (platform, encoding, fmt) in subtables:
+                self._read_cmap_format_4(subtables[platform, encoding, fmt])
+                return
+        raise TrueTypeFont.UnsupportedFont("No unicode 'cmap' subtable")
+
+    def _read_cmap_format_4(self, offset: int) -> None:
+        (seg_count_x2,) = struct.unpack_from(">H", self.data, offset + 6)
+        seg_count = seg_count_x2 // 2
+        ends_offset = offset + 14
+        starts_offset = ends_offset + seg_count_x2 + 2
+        deltas_offset = starts_offset + seg_count_x2
+        range_offsets_offset = deltas_offset + seg_count_x2
+        for i in range(seg_count):
+            (end,) = struct.unpack_from(">H", self.data, ends_offset + 2 * i)
+            (start,) = struct.unpack_from(
+                ">H", self.data, starts_offset + 2 * i
+            )
+            (delta,) = struct.unpack_from(
+                ">h", self.data, deltas_offset + 2 * i
+            )
+            range_offset_pos = range_offsets_offset + 2 * i
+            (range_offset,) = struct.unpack_from(
+                ">H", self.data, range_offset_pos
+            )
+            for code in range(start, min(end, 0xFFFE) + 1):
+                if range_offset == 0:
+                    glyph_id = (code + delta) & 0xFFFF
+                else:
+                    glyph_pos = range_offset_pos + range_offset
+                    glyph_pos += 2 * (code - start)
+                    (glyph_id,) = struct.unpack_from(">H", self.data, glyph_pos)
+                    if glyph_id != 0:
+                        glyph_id = (glyph_id + delta) & 0xFFFF
+                if glyph_id != 0:
+                    self.cmap[code] = glyph_id
+
+    def _read_cmap_format_12(self, offset: int) -> None:
+        (groups_count,) = struct.unpack_from(">I", self.data, offset + 12)
+        for i in range(groups_count):
+            start, end, start_glyph_id = struct.unpack_from(
+                ">III", self.data, offset + 16 + 12 * i
+            )
+            for code in range(start, end + 1):
+                self.cmap[code] = start_glyph_id + code - start
+
+    def _read_name(self) -> None:
+        # postscript name (name id 6), pdf requires it without spaces
+        self.postscript_name = "EmbeddedFont"
+        if b"name" not in self.tables:
+            return
+        offset = self.tables[b"name"][0]
+        _, count, strings_offset = struct.unpack_from(">HHH", self.data, offset)
+        for i in range(count):
+            platform, encoding, _, name_id, length, str_offset = (
+                struct.unpack_from(">HHHHHH", self.data, offset + 6 + 12 * i)
+            )
+            if name_id != 6:
+                continue
+            start = offset + strings_offset + str_offset
+            raw = self.data[start : start + length]
+            name = raw.decode("utf-16-be" if platform in [0, 3] else "latin-1")
+            name = "".join(c for c in name if c.isalnum() or c in "-_")
+            if len(name) != 0:
+                self.postscript_name = name
+                return
+
+    # member fields
+    data: bytes
+    tables: dict[bytes, tuple[int, int]]
+    units_per_em: int
+    bbox: tuple[int, int, int, int]  # x_min, y_min, x_max, y_max
+    ascent: int
+    descent: int  # negative
+    h_metrics_count: int
+    advances: list[int]  # advance widths by glyph id
+    cmap: dict[int, int]  # unicode code point -> glyph id
+    postscript_name: str
@@ -1,6 +1,8 @@
+from typing import Hashable, Iterable, Iterator
+
 from PIL import Image
 
-from FileTranslator.Translator.ITranslator import ITranslator
+from FileTranslator.OCR.PageLayout import PageLayout
 from FileTranslator.Util.PathInfo import PathInfo
 from FileTranslator.Util.TranslateInfo import TranslateInfo
 
@@ -8,21 +10,53 @@ from FileTranslator.Util.TranslateInfo import TranslateInfo
 
 
 class IOCR:
-    # Exceptions
-    class IncorrectTranslatedTextFormat(Exception):
-        pass
-
     # API
     def init(self, path_info: PathInfo, translate_info: TranslateInfo) -> None:
         raise NotImplementedError
 
-    def get_text_to_translate(self, image: Image, save_context: bool) -> str:
+    # Page stages. recognize() and lines_to_image() don't touch state shared
+    # between pages, add_context() must be called in page order.
+
+    def recognize(self, image: Image) -> PageLayout:
+        raise NotImplementedError
+
+    # Recognizes pages keeping their order, keys are passed unchanged. Pages
+    # given as layouts (e.g. from text layer of pdf) are not recognized.
+    def recognize_all(
+        self, pages: Iterable[tuple[Hashable, Image.Image | PageLayout]]
+    ) -> Iterator[tuple[Hashable, PageLayout]]:
+        for key, page in pages:
+            if isinstance(page, PageLayout):
+                yield key, page
+            else:
+                yield key, self.recognize(page)
+
+    def add_context(self, layout: PageLayout, save_context: bool) -> str:
+        raise NotImplementedError
+
+    # Context for the next page as if `layout` was the last page passed to
+    # add_context(), e.g. by previous run
+    def restore_context(self, layout: PageLayout) -> None:
         raise NotImplementedError
 
-    def translated_text_to_image(
-        self, text: str, translator: ITranslator
-    ) -> Image:
+    # Maps translated text to lines of page, never translates anything
+    def split_to_lines(self, layout: PageLayout, text: str) -> list[str]:
         raise NotImplementedError
 
+    def lines_to_image(self, layout: PageLayout, lines: list[str]) -> Image:
+        raise NotImplementedError
+
+    # Handling of one page at a time
+
+    def get_text_to_translate(self, image: Image, save_context: bool) -> str:
+        self.layout = self.recognize(image)
+        return self.add_context(self.layout, save_context)
+
+    def translated_text_to_image(self, text: str) -> Image:
+        lines = self.split_to_lines(self.layout, text)
+        return self.lines_to_image(self.layout, lines)
+
     def reset(self) -> None:
         raise NotImplementedError
+
+    layout: PageLayout  # current page for one page at a time handling
@@ -0,0 +1,61 @@
+from itertools import groupby
+import string
+
+from FileTranslator.OCR.PageLayout import LineBox
+from FileTranslator.OCR.PageLayout import PageLayout
+from FileTranslator.OCR.WordTable import WordTable
+
+################################################################################
+
+# Variables
+
+# level of word entries in result of pt.image_to_data, levels of page, block,
+# paragraph and line are 1 - 4
+word_level = 5
+
+################################################################################
+
+
+def _is_word(level: int, text: str) -> bool:
+    return level == word_level and len(text.strip(string.whitespace)) != 0
+
+
+def _line_box(words: WordTable, start: int, end: int) -> LineBox:
+    # words of line are words[start:end], top and bottom of line are averaged
+    # over its words
+    left, width = words["left"], words["width"]
+    count = end - start
+    top = sum(words["top"][start:end])
+    bottom = top + sum(words["height"][start:end])
+    box = LineBox()
+    box.x = left[start]
+    box.w = left[end - 1] + width[end - 1] - box.x
+    box.y = int(top / count)
+    box.h = int(bottom / count - box.y)
+    return box
+
+
+################################################################################
+
+
+# Fills text, boxes and paragraphs of layout from recognized words. Lines and
+# paragraphs are given by block, paragraph and line numbers of words, so the
+# number of boxes always equals the number of lines.
+def build_layout(layout: PageLayout, words: WordTable) -> None:
+    words = words.filter(map(_is_word, words["level"], words.text))
+
+    # words of one line are contiguous in reading order
+    ids = zip(words["block_num"], words["par_num"], words["line_num"])
+    ranges = []
+    start = 0
+    for line_id, line_words in groupby(ids):
+        end = start + sum(1 for _ in line_words)
+        ranges.append((line_id, start, end))
+        start = end
+
+    layout.boxes = [_line_box(words, start, end) for _, start, end in ranges]
+    layout.pars_info = [
+        [" ".join(words.text[start:end]) for _, start, end in par_ranges]
+        for _, par_ranges in groupby(ranges, key=lambda item: item[0][:2])
+    ]
+    layout.src_text = "\n\n".join("\n".join(par) for par in layout.pars_info)
@@ -0,0 +1,61 @@
+################################################################################
+
+
+def _split_pars(text: str) -> list[list[str]]:
+    return [par.split("\n") for par in text.split("\n\n")]
+
+
+def _reflow(words: list[str], line_lengths: list[int]) -> list[str]:
+    # Puts words to lines keeping proportions of source lines: word goes to
+    # the line, which part of text contains middle of the word.
+    if len(line_lengths) == 0:
+        return []
+    total_src = sum(line_lengths)
+    total_trg = sum(len(word) + 1 for word in words)
+    if total_src == 0:
+        # all lines are equal
+        line_lengths = [1] * len(line_lengths)
+        total_src = len(line_lengths)
+    bounds = []
+    accum = 0
+    for length in line_lengths:
+        accum += length
+        bounds.append(total_trg * accum / total_src)
+
+    lines = [[] for _ in line_lengths]
+    line = pos = 0
+    for word in words:
+        middle = pos + (len(word) + 1) / 2
+        while line + 1 < len(lines) and middle > bounds[line]:
+            line += 1
+        lines[line].append(word)
+        pos += len(word) + 1
+    return [" ".join(line) for line in lines]
+
+
+################################################################################
+
+
+# Maps translated text to source lines without any extra translation.
+# Paragraphs and lines coinciding with source ones are kept as is, words of
+# other paragraphs are reflowed proportionally to lengths of source lines. If
+# even paragraphs don't coincide, the whole text is reflowed.
+# Returns lines and number of reflowed paragraphs.
+def align_lines(src_pars: list[list[str]], text: str) -> (list[str], int):
+    pars = _split_pars(text)
+    if len(pars) != len(src_pars):
+        src_lines = [line for par in src_pars for line in par]
+        words = text.split()
+        lines = _reflow(words, [len(line) for line in src_lines])
+        return lines, len(src_pars)
+
+    lines = []
+    reflowed = 0
+    for par, src_par in zip(pars, src_pars):
+        if len(par) == len(src_par):
+            lines += par
+        else:
+            words = " ".join(par).split()
+            lines += _reflow(words, [len(line) for line in src_par])
+            reflowed += 1
+    return lines, reflowed
@@ -0,0 +1,44 @@
+import hashlib
+import json
+
+from PIL import Image
+from pytesseract import pytesseract as pt
+
+from FileTranslator.Util.DiskCache import DiskCache
+
+################################################################################
+
+
+# Raw results of pt.image_to_data. Page raster, language, dpi and version of
+# tesseract define the result, so changing of font, target language etc.
+# doesn't require recognition again.
+class OCRCache:
+    def __init__(self, path: str, max_size: int):
+        self.cache = DiskCache(path, max_size)
+        # asked on the first lookup, pages from text layer don't need
+        # tesseract at all
+        self.tesseract_version = None
+
+    def key(self, image: Image, lang: str) -> str:
+        if self.tesseract_version is None:
+            self.tesseract_version = str(pt.get_tesseract_version())
+        raster = hashlib.sha256(image.tobytes())
+        raster.update(f"{image.mode} {image.size}".encode("ascii"))
+        key = [
+            raster.hexdigest(),
+            lang,
+            list(image.info.get("dpi", [])),
+            self.tesseract_version,
+        ]
+        return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        data = self.cache.get(key)
+        return None if data is None else json.loads(data)
+
+    def put(self, key: str, src_dict: dict) -> None:
+        self.cache.put(key, json.dumps(src_dict).encode("utf-8"))
+
+    # member fields
+    cache: DiskCache
+    tesseract_version: str | None
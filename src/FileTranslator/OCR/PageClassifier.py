@@ -0,0 +1,82 @@
+from PIL import Image
+from PIL import ImageFilter
+
+################################################################################
+
+# Variables
+
+# page is analyzed downscaled to about this width
+analysis_width = 400
+
+# pixels differing from background by more than `ink_contrast` are ink
+ink_contrast = 48
+# page with less ink is blank: paper texture, scanner noise, specks
+blank_ink_share = 0.001
+# but low contrast pictures have little ink too, most of blank page is
+# within half of `ink_contrast` from background
+max_texture_share = 0.05
+
+# downscaled page is split to tiles of about three lines of text
+tile_width = 100
+tile_height = 32
+
+# tile has text if it has some ink and many edges. Pixels with gradient
+# above `edge_level` are edges. Strokes of letters are thin, so text gives at
+# least as many edge pixels as ink pixels, while pictures mostly consist of
+# smooth areas.
+min_tile_ink_share = 0.03
+edge_level = 64
+min_text_edges_per_ink = 0.8
+
+################################################################################
+
+
+def _ink_share(image: Image, contrast: int = ink_contrast) -> float:
+    # pixels far from the most frequent level, which is background
+    hist = image.histogram()
+    background = max(range(256), key=hist.__getitem__)
+    near = hist[max(0, background - contrast) : background + contrast + 1]
+    return 1 - sum(near) / sum(hist)
+
+
+def _is_text_tile(tile: Image, edges: Image) -> bool:
+    ink = _ink_share(tile)
+    edges = sum(edges.histogram()[edge_level:]) / (tile.width * tile.height)
+    return ink >= min_tile_ink_share and edges >= min_text_edges_per_ink * ink
+
+
+def _tiles(width: int, height: int) -> list[tuple[int, int, int, int]]:
+    # borders of image are edges for the filter, they are not used
+    return [
+        (x, y, min(x + tile_width, width - 1), min(y + tile_height, height - 1))
+        for y in range(1, height - 1, tile_height)
+        for x in range(1, width - 1, tile_width)
+    ]
+
+
+def _downscale(image: Image) -> Image:
+    if image.mode not in ["L", "RGB"]:
+        # e.g. black and white pages can't be reduced
+        image = image.convert("L")
+    factor = max(1, image.width // analysis_width)
+    small = image.reduce(factor) if factor > 1 else image
+    return small.convert("L")
+
+
+# Cheap check of page raster before recognition: "text", "blank" or
+# "picture". Local background of every tile is used, so text on tinted
+# paper or next to a figure is found. A page is "picture" only if none of its
+# tiles looks like text. Pages that aren't "text" are passed to output as
+# they are.
+def classify_page(image: Image) -> str:
+    small = _downscale(image)
+    if (
+        _ink_share(small) < blank_ink_share
+        and _ink_share(small, ink_contrast // 2) < max_texture_share
+    ):
+        return "blank"
+    edges = small.filter(ImageFilter.FIND_EDGES)
+    for box in _tiles(small.width, small.height):
+        if _is_text_tile(small.crop(box), edges.crop(box)):
+            return "text"
+    return "picture"
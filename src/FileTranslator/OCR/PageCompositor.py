@@ -0,0 +1,74 @@
+from PIL import Image
+from PIL import ImageColor
+from PIL import ImageDraw
+
+from FileTranslator.OCR.PageLayout import expand_box
+from FileTranslator.OCR.PageLayout import LineBox
+from FileTranslator.Util.FontMetrics import FontMetrics
+
+################################################################################
+
+# Variables
+
+# margins of text inside its image
+x_off = 2
+y_off = 1
+
+################################################################################
+
+
+# Puts translated lines on page instead of source ones. All line boxes are
+# blanked at once, then every line is drawn right on the page. By default
+# line is rendered to a grayscale mask stretched to the box, fast mode draws
+# it directly with fitting font size and no resampling.
+class PageCompositor:
+    def __init__(self, font_metrics: FontMetrics, fast: bool = False):
+        self.font_metrics = font_metrics
+        self.fast = fast
+
+    def compose(
+        self, image: Image, boxes: list[LineBox], lines: list[str]
+    ) -> None:
+        rects = [expand_box(box) for box in boxes[: len(lines)]]
+        background = ImageColor.getcolor("white", image.mode)
+        ink = ImageColor.getcolor("black", image.mode)
+
+        # blank all boxes
+        draw = ImageDraw.Draw(image)
+        for x, y, w, h in rects:
+            draw.rectangle((x, y, x + w - 1, y + h - 1), fill=background)
+
+        # draw lines
+        for line, rect in zip(lines, rects):
+            if self.fast:
+                self._draw_line(draw, line, rect, ink)
+            else:
+                self._paste_line(image, line, rect, ink)
+
+    ############################################################################
+
+    # Internals
+
+    def _paste_line(
+        self, image: Image, line: str, rect: tuple, ink: int | tuple
+    ) -> None:
+        x, y, w, h = rect
+        font = self.font_metrics.get_face(self.font_metrics.fit_size(line, w))
+        _, _, text_width, text_height = font.getbbox(line)
+        mask = Image.new("L", (text_width + 2 * x_off, text_height + 2 * y_off))
+        ImageDraw.Draw(mask).text((x_off, y_off), line, font=font, fill=255)
+        image.paste(ink, (x, y), mask.resize((w, h)))
+
+    def _draw_line(
+        self, draw: ImageDraw, line: str, rect: tuple, ink: int | tuple
+    ) -> None:
+        x, y, w, h = rect
+        size = self.font_metrics.fit_size(line, w - 2 * x_off, h - 2 * y_off)
+        font = self.font_metrics.get_face(size)
+        text_height = font.getbbox(line)[3]
+        top = y + max(y_off, (h - text_height) // 2)
+        draw.text((x + x_off, top), line, font=font, fill=ink)
+
+    # member fields
+    font_metrics: FontMetrics
+    fast: bool
@@ -0,0 +1,41 @@
+from PIL import Image
+
+################################################################################
+
+
+class LineBox:
+    x: int  # left top x
+    y: int  # left top y
+    w: int  # width
+    h: int  # height
+
+
+def expand_box(box: LineBox) -> (int, int, int, int):
+    # recognized boxes are tight, letters could stick out of them
+    y_scale = min(int(0.15 * box.h), 5)
+    return box.x, box.y - y_scale, box.w, box.h + 2 * y_scale
+
+
+# All recognition results of one page. Layouts of different pages are
+# independent, so pages can be handled concurrently.
+class PageLayout:
+    def __init__(self, image: Image):
+        self.image = image
+        self.src_dict = {}
+        self.src_text = ""
+        self.boxes = []
+        self.pars_info = []
+        self.context_added = False
+        self.line_mismatches = 0
+        self.running_lines = []
+
+    image: Image.Image
+    src_dict: dict
+    src_text: str  # recognized text with context of previous page
+    boxes: list[LineBox]
+    pars_info: list[list[str]]
+    context_added: bool
+    line_mismatches: int  # paragraphs which lines differ after translation
+    # texts of running headers and footers, their boxes are the last ones,
+    # every distinct text is translated once for document
+    running_lines: list[str]
@@ -0,0 +1,483 @@
+import io
+
+from PIL import Image
+from PyPDF4 import PdfFileReader
+from PyPDF4.generic import DictionaryObject
+from PyPDF4.generic import IndirectObject
+from PyPDF4.pdf import ContentStream
+
+from FileTranslator.Converters.PdfFont import PdfFont
+from FileTranslator.Converters.PdfFont import string_bytes
+from FileTranslator.OCR.LayoutBuilder import build_layout
+from FileTranslator.OCR.LayoutBuilder import word_level
+from FileTranslator.OCR.PageLayout import PageLayout
+from FileTranslator.OCR.WordTable import numeric_columns
+from FileTranslator.OCR.WordTable import WordTable
+import FileTranslator.Util.Logs as Logs
+
+################################################################################
+
+# Variables
+
+# page has usable text layer if it has at least `min_chars` characters and
+# no more than `max_unknown_share` of them can't be mapped to unicode
+min_chars = 20
+max_unknown_share = 0.05
+
+# page with images covering such share of it is considered scanned, unless
+# its text layer is long enough to be the main content
+scan_area_share = 0.5
+min_chars_over_scan = 500
+
+# distances in font sizes
+word_gap = 0.2  # between glyphs of different words
+column_gap = 3.0  # between words of different lines on the same baseline
+baseline_shift = 0.5  # between baselines of the same line
+paragraph_gap = 1.7  # between baselines of lines of different paragraphs
+paragraph_indent = 1.0  # of the first line of paragraph
+
+_identity = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+################################################################################
+
+
+def _multiply(m: tuple, n: tuple) -> tuple:
+    # product of pdf matrices [a b 0; c d 0; e f 1]
+    a, b, c, d, e, f = m
+    A, B, C, D, E, F = n
+    return (
+        a * A + b * C,
+        a * B + b * D,
+        c * A + d * C,
+        c * B + d * D,
+        e * A + f * C + E,
+        e * B + f * D + F,
+    )
+
+
+def _translate(tx: float, ty: float) -> tuple:
+    return 1.0, 0.0, 0.0, 1.0, tx, ty
+
+
+# Word in user space of page: x grows to the right, y grows up
+class _Word:
+    def __init__(self, x: float, baseline: float, size: float, font: PdfFont):
+        self.chars = []
+        self.x0 = self.x1 = x
+        self.baseline = baseline
+        self.size = size
+        self.top = baseline + size * font.cap_height / 1000
+        self.bottom = baseline - size * font.descent / 1000
+
+    # member fields
+    chars: list[str]
+    x0: float
+    x1: float
+    baseline: float
+    size: float  # font size
+    top: float
+    bottom: float
+
+
+class _Line:
+    def __init__(self, word: _Word):
+        self.words = [word]
+        self.x0, self.x1 = word.x0, word.x1
+        self.baseline = word.baseline
+        self.size = word.size
+
+    # member fields
+    words: list[_Word]
+    x0: float
+    x1: float
+    baseline: float
+    size: float
+
+
+# Interprets content stream of page: positions of glyphs are tracked with
+# text and graphics state, everything else is ignored.
+class _PageInterpreter:
+    def __init__(self, reader: PdfFileReader, fonts: dict):
+        self.reader = reader
+        self.fonts = fonts
+        self.words = []
+        self.word = None
+        self.chars_count = self.unknown_count = 0
+        self.image_area = 0.0
+
+    def run(self, stream, resources: DictionaryObject, ctm: tuple) -> None:
+        self.resources = resources
+        self.ctm = ctm
+        self.stack = []
+        self.tm = self.tlm = _identity
+        self.font = None
+        self.size = 0.0
+        self.char_spacing = self.word_spacing = 0.0
+        self.h_scale = 1.0
+        self.leading = self.rise = 0.0
+        for operands, operator in ContentStream(stream, self.reader).operations:
+            handler = self._handlers.get(operator)
+            if handler is not None:
+                try:
+                    handler(self, operands)
+                except (IndexError, KeyError, TypeError, ValueError):
+                    # malformed operation is skipped as viewers do
+                    continue
+
+    def finish(self) -> list[_Word]:
+        self._end_word()
+        return self.words
+
+    ############################################################################
+
+    # Internals
+
+    def _q(self, operands: list) -> None:
+        self.stack.append(self._graphics_state())
+
+    def _Q(self, operands: list) -> None:
+        if len(self.stack) != 0:
+            self._set_graphics_state(self.stack.pop())
+
+    def _graphics_state(self) -> tuple:
+        # text state parameters are part of graphics state
+        return (
+            self.ctm,
+            self.font,
+            self.size,
+            self.char_spacing,
+            self.word_spacing,
+            self.h_scale,
+            self.leading,
+            self.rise,
+        )
+
+    def _set_graphics_state(self, state: tuple) -> None:
+        (
+            self.ctm,
+            self.font,
+            self.size,
+            self.char_spacing,
+            self.word_spacing,
+            self.h_scale,
+            self.leading,
+            self.rise,
+        ) = state
+
+    def _cm(self, operands: list) -> None:
+        self.ctm = _multiply(tuple(map(float, operands)), self.ctm)
+
+    def _BT(self, operands: list) -> None:
+        self.tm = self.tlm = _identity
+
+    def _Tf(self, operands: list) -> None:
+        fonts = self.resources["/Font"].getObject()
+        font = fonts.raw_get(operands[0])
+        # fonts are usually shared by pages
+        key = font.idnum if isinstance(font, IndirectObject) else id(font)
+        if key not in self.fonts:
+            self.fonts[key] = PdfFont(font.getObject())
+        self.font = self.fonts[key]
+        self.size = float(operands[1])
+
+    def _Tc(self, operands: list) -> None:
+        self.char_spacing = float(operands[0])
+
+    def _Tw(self, operands: list) -> None:
+        self.word_spacing = float(operands[0])
+
+    def _Tz(self, operands: list) -> None:
+        self.h_scale = float(operands[0]) / 100
+
+    def _TL(self, operands: list) -> None:
+        self.leading = float(operands[0])
+
+    def _Ts(self, operands: list) -> None:
+        self.rise = float(operands[0])
+
+    def _Td(self, operands: list) -> None:
+        tx, ty = map(float, operands)
+        self.tm = self.tlm = _multiply(_translate(tx, ty), self.tlm)
+
+    def _TD(self, operands: list) -> None:
+        self.leading = -float(operands[1])
+        self._Td(operands)
+
+    def _Tm(self, operands: list) -> None:
+        self.tm = self.tlm = tuple(map(float, operands))
+
+    def _T_star(self, operands: list) -> None:
+        self._Td([0, -self.leading])
+
+    def _Tj(self, operands: list) -> None:
+        self._show(string_bytes(operands[0]))
+
+    def _quote(self, operands: list) -> None:
+        self._T_star([])
+        self._Tj(operands)
+
+    def _double_quote(self, operands: list) -> None:
+        self.word_spacing = float(operands[0])
+        self.char_spacing = float(operands[1])
+        self._quote(operands[2:])
+
+    def _TJ(self, operands: list) -> None:
+        for item in operands[0]:
+            if isinstance(item, (bytes, str)):
+                self._show(string_bytes(item))
+            else:
+                # shift in thousandths of text space unit
+                tx = -float(item) / 1000 * self.size * self.h_scale
+                self.tm = _multiply(_translate(tx, 0), self.tm)
+
+    def _Do(self, operands: list) -> None:
+        xobject = self.resources["/XObject"][operands[0]].getObject()
+        subtype = xobject.get("/Subtype")
+        if subtype == "/Image":
+            a, b, c, d = self.ctm[:4]
+            self.image_area += abs(a * d - b * c)
+        elif subtype == "/Form":
+            self._run_form(xobject)
+
+    def _run_form(self, form) -> None:
+        matrix = tuple(map(float, form.get("/Matrix", _identity)))
+        state = self.resources, self.stack, self.tm, self.tlm
+        graphics_state = self._graphics_state()
+        resources = form.get("/Resources")
+        resources = (
+            self.resources if resources is None else resources.getObject()
+        )
+        self.run(form, resources, _multiply(matrix, self.ctm))
+        self.resources, self.stack, self.tm, self.tlm = state
+        self._set_graphics_state(graphics_state)
+
+    def _show(self, data: bytes) -> None:
+        if self.font is None:
+            return
+        for code, text, width in self.font.decode(data):
+            trm = _multiply(
+                (self.size * self.h_scale, 0, 0, self.size, 0, self.rise),
+                _multiply(self.tm, self.ctm),
+            )
+            advance = width * self.size + self.char_spacing
+            if code == 32 and self.font.code_length == 1:
+                advance += self.word_spacing
+            self.tm = _multiply(_translate(advance * self.h_scale, 0), self.tm)
+            end_x = _multiply(self.tm, self.ctm)[4]
+            self._add_glyph(text, trm, end_x)
+
+    def _add_glyph(self, text: str | None, trm: tuple, end_x: float) -> None:
+        if (
+            abs(trm[1]) > 1e-3
+            or abs(trm[2]) > 1e-3
+            or trm[0] <= 0
+            or trm[3] <= 0
+        ):
+            # only upright text is extracted
+            return
+        self.chars_count += 1
+        if text is None:
+            self.unknown_count += 1
+            return
+        if text.isspace():
+            self._end_word()
+            return
+        x, baseline, size = trm[4], trm[5], trm[3]
+        word = self.word
+        if word is not None and (
+            abs(baseline - word.baseline) > baseline_shift * size
+            or x < word.x1 - size
+            or x - word.x1 > word_gap * size
+        ):
+            self._end_word()
+        if self.word is None:
+            self.word = _Word(x, baseline, size, self.font)
+        self.word.chars.append(text)
+        self.word.x1 = max(self.word.x1, end_x)
+
+    def _end_word(self) -> None:
+        if self.word is not None and len(self.word.chars) != 0:
+            self.words.append(self.word)
+        self.word = None
+
+    _handlers = {
+        b"q": _q,
+        b"Q": _Q,
+        b"cm": _cm,
+        b"BT": _BT,
+        b"Tf": _Tf,
+        b"Tc": _Tc,
+        b"Tw": _Tw,
+        b"Tz": _Tz,
+        b"TL": _TL,
+        b"Ts": _Ts,
+        b"Td": _Td,
+        b"TD": _TD,
+        b"Tm": _Tm,
+        b"T*": _T_star,
+        b"Tj": _Tj,
+        b"'": _quote,
+        b'"': _double_quote,
+        b"TJ": _TJ,
+        b"Do": _Do,
+    }
+
+    # member fields
+    reader: PdfFileReader
+    fonts: dict[int, PdfFont]  # shared by pages
+    words: list[_Word]
+    word: _Word | None  # word being extracted
+    chars_count: int
+    unknown_count: int  # characters without unicode
+    image_area: float  # in square points
+
+    # graphics and text state
+    resources: DictionaryObject
+    ctm: tuple
+    stack: list[tuple]
+    tm: tuple
+    tlm: tuple
+    font: PdfFont | None
+    size: float
+    char_spacing: float
+    word_spacing: float
+    h_scale: float
+    leading: float
+    rise: float
+
+
+def _group_lines(words: list[_Word]) -> list[_Line]:
+    # words are in order of content stream, which is reading order for most
+    # of pdf producers
+    lines = []
+    for word in words:
+        line = lines[-1] if len(lines) != 0 else None
+        if (
+            line is None
+            or abs(word.baseline - line.baseline) > baseline_shift * line.size
+            or word.x0 < line.x1 - line.size
+            or word.x0 - line.x1 > column_gap * line.size
+        ):
+            lines.append(_Line(word))
+            continue
+        line.words.append(word)
+        line.x1 = max(line.x1, word.x1)
+        line.size = max(line.size, word.size)
+    return lines
+
+
+def _is_new_paragraph(prev: _Line, line: _Line, spacing: float | None) -> bool:
+    # spacing is distance between baselines of previous lines of paragraph
+    gap = prev.baseline - line.baseline
+    size = max(prev.size, line.size)
+    if gap <= 0 or gap > paragraph_gap * size:
+        # next column or vertical space
+        return True
+    if spacing is not None and gap > 1.3 * spacing:
+        return True
+    if max(prev.size, line.size) > 1.25 * min(prev.size, line.size):
+        return True
+    return line.x0 - prev.x0 > paragraph_indent * size
+
+
+################################################################################
+
+
+# Text of born-digital pdf pages with positions of words, so they don't need
+# rasterized page to be recognized. Pages without usable text layer (scans,
+# fonts without unicode mapping, rotated pages) are left for ocr.
+class PdfTextLayer:
+    def __init__(self, pdf_path: str):
+        self.file = open(pdf_path, "rb")
+        self.reader = PdfFileReader(self.file, strict=False)
+        self.fonts = {}
+
+    def layout(self, ind: int, image: Image) -> PageLayout | None:
+        # boxes of layout are in pixels of `image`, rasterized page `ind`
+        try:
+            data = self._page_data(ind, image.size)
+        except Exception as error:
+            Logs.dev(f"PdfTextLayer: page {ind + 1} is not extracted: {error}")
+            return None
+        if data is None:
+            return None
+        layout = PageLayout(image)
+        layout.src_dict = data
+        build_layout(layout, WordTable.from_dict(data))
+        return layout
+
+    def close(self) -> None:
+        self.file.close()
+
+    ############################################################################
+
+    # Internals
+
+    def _page_data(self, ind: int, image_size: tuple) -> dict | None:
+        # words of page in format of pt.image_to_data
+        page = self.reader.getPage(ind)
+        if int(page.get("/Rotate", 0)) % 360 != 0:
+            return None
+        contents = page.getContents()
+        if contents is None:
+            return None
+        interpreter = _PageInterpreter(self.reader, self.fonts)
+        resources = page.get("/Resources")
+        resources = {} if resources is None else resources.getObject()
+        interpreter.run(contents, resources, _identity)
+        words = interpreter.finish()
+
+        box = [float(value) for value in page.mediaBox]
+        page_area = (box[2] - box[0]) * (box[3] - box[1])
+        known = interpreter.chars_count - interpreter.unknown_count
+        Logs.dev(
+            f"PdfTextLayer: page {ind + 1}, {known} characters, "
+            f"{interpreter.unknown_count} unknown, "
+            f"images cover {interpreter.image_area / page_area:.0%}"
+        )
+        if (
+            known < min_chars
+            or interpreter.unknown_count > max_unknown_share * known
+            or interpreter.image_area > scan_area_share * page_area
+            and known < min_chars_over_scan
+        ):
+            return None
+
+        # user space to pixels
+        x_scale = image_size[0] / (box[2] - box[0])
+        y_scale = image_size[1] / (box[3] - box[1])
+        data = {name: [] for name in numeric_columns + ["text"]}
+        par_num = 0
+        spacing = None
+        lines = _group_lines(words)
+        for i, line in enumerate(lines):
+            if i == 0 or _is_new_paragraph(lines[i - 1], line, spacing):
+                par_num += 1
+                line_num = 0
+                spacing = None
+            else:
+                spacing = lines[i - 1].baseline - line.baseline
+            line_num += 1
+            for word_num, word in enumerate(line.words, 1):
+                left = round((word.x0 - box[0]) * x_scale)
+                top = round((box[3] - word.top) * y_scale)
+                values = {
+                    "level": word_level,
+                    "block_num": 1,
+                    "par_num": par_num,
+                    "line_num": line_num,
+                    "word_num": word_num,
+                    "left": left,
+                    "top": top,
+                    "width": round((word.x1 - box[0]) * x_scale) - left,
+                    "height": round((box[3] - word.bottom) * y_scale) - top,
+                    "text": "".join(word.chars),
+                }
+                for name, value in values.items():
+                    data[name].append(value)
+        return data
+
+    # member fields
+    file: io.BufferedReader
+    reader: PdfFileReader
+    fonts: dict[int, PdfFont]  # fonts of all pages by object number
@@ -0,0 +1,205 @@
+from collections import deque
+from difflib import SequenceMatcher
+import re
+
+from FileTranslator.OCR.PageLayout import LineBox
+from FileTranslator.OCR.PageLayout import PageLayout
+
+################################################################################
+
+# Variables
+
+# running headers and footers lie within this share of page height from its
+# top or bottom
+margin_share = 0.12
+
+# the same running line of different pages differs in vertical position of
+# its middle not more than by this share of page height
+max_position_shift = 0.03
+
+# ratio of difflib.SequenceMatcher, tolerates errors of recognition
+min_similarity = 0.8
+
+# distinct lines of margins remembered by document
+max_candidates = 64
+
+_roman_re = (
+    r"(?=[ivxlcdm])m{0,3}(?:cm|cd|d?c{0,3})(?:xc|xl|l?x{0,3})"
+    r"(?:ix|iv|v?i{0,3})"
+)
+_page_number_re = re.compile(
+    rf"[-–—\s]*(?:(?:page|p\.|стр\.?|с\.)\s*)?(?:\d{{1,4}}|{_roman_re})"
+    rf"(?:\s*(?:/|of|из)\s*\d{{1,4}})?[-–—\s]*",
+    re.IGNORECASE,
+)
+
+################################################################################
+
+
+def is_page_number(text: str) -> bool:
+    return _page_number_re.fullmatch(text) is not None
+
+
+def _normalize(text: str) -> str:
+    # only to find running lines: numbers of chapters and pages change from
+    # page to page
+    return " ".join(re.sub(r"\d+", " ", text).lower().split())
+
+
+def _translation_key(text: str) -> str:
+    # translations are reused only for the same text, numbers included
+    return " ".join(text.split())
+
+
+def _is_similar(lhs: str, rhs: str) -> bool:
+    matcher = SequenceMatcher(None, lhs, rhs)
+    return (
+        matcher.real_quick_ratio() >= min_similarity
+        and matcher.quick_ratio() >= min_similarity
+        and matcher.ratio() >= min_similarity
+    )
+
+
+def _in_margin(box: LineBox, height: int) -> bool:
+    margin = margin_share * height
+    return box.y + box.h <= margin or box.y >= height - margin
+
+
+def _outermost(boxes: list[LineBox]) -> set[int]:
+    # indices of the top and the bottom lines, only they can be page numbers,
+    # not e.g. numbers of footnotes
+    if len(boxes) == 0:
+        return set()
+    indices = range(len(boxes))
+    return {
+        min(indices, key=lambda i: boxes[i].y),
+        max(indices, key=lambda i: boxes[i].y + boxes[i].h),
+    }
+
+
+# Line of page margin seen on earlier pages
+class _Candidate:
+    def __init__(self, text: str, position: float, page: int):
+        self.text = text
+        self.position = position
+        self.page = page
+
+    text: str  # normalized text
+    position: float  # middle of line in page heights
+    page: int  # index of page in document
+
+
+################################################################################
+
+
+# Running headers and footers of document. Lines of page margins, which are
+# similar to lines of previous pages by position and text, are removed from
+# text of page; every distinct running line is translated once for the whole
+# document. Page numbers are not translated at all and stay on page as they
+# are.
+class RunningLines:
+    def __init__(self):
+        self.candidates = deque(maxlen=max_candidates)
+        self.translations = {}
+
+    # Must be called in page order, `ind` is index of page in document.
+    # Returns the number of removed page numbers, running lines are moved to
+    # `layout.running_lines`.
+    def extract(self, layout: PageLayout, ind: int) -> int:
+        height = layout.image.height
+        lines = [
+            (i, line) for i, par in enumerate(layout.pars_info) for line in par
+        ]
+        # running lines of previous calls are already at the end
+        running_boxes = layout.boxes[len(lines) :]
+        pars = [[] for _ in layout.pars_info]
+        boxes = []
+        page_numbers = 0
+        outermost = _outermost(layout.boxes[: len(lines)])
+        for j, ((i, text), box) in enumerate(zip(lines, layout.boxes)):
+            position = (box.y + box.h / 2) / height
+            if not _in_margin(box, height):
+                pars[i].append(text)
+                boxes.append(box)
+            elif j in outermost and is_page_number(text):
+                page_numbers += 1
+            elif self._is_running(text, position, ind, layout):
+                running_boxes.append(box)
+            else:
+                pars[i].append(text)
+                boxes.append(box)
+
+        layout.pars_info = [par for par in pars if len(par) != 0]
+        layout.boxes = boxes + running_boxes
+        layout.src_text = "\n\n".join(
+            "\n".join(par) for par in layout.pars_info
+        )
+        return page_numbers
+
+    # texts of running lines of page, which are not translated yet
+    def untranslated(self, layout: PageLayout) -> list[str]:
+        keys = layout.running_lines
+        return [
+            key for key in dict.fromkeys(keys) if key not in self.translations
+        ]
+
+    def store(self, keys: list[str], translations: list[str]) -> None:
+        self.translations.update(zip(keys, translations))
+
+    # Rebuilds state after resume, `ind` is index of page translated by
+    # previous run, `lines` are its translated lines. Must be called in page
+    # order.
+    def restore(
+        self, layout: PageLayout, ind: int, height: int, lines: list[str]
+    ) -> None:
+        texts = [line for par in layout.pars_info for line in par]
+        running_boxes = layout.boxes[len(texts) :]
+        for text, box in zip(texts + layout.running_lines, layout.boxes):
+            if _in_margin(box, height):
+                self._remember(text, (box.y + box.h / 2) / height, ind)
+        if len(running_boxes) != 0:
+            self.store(layout.running_lines, lines[-len(running_boxes) :])
+
+    # translated running lines of page in order of their boxes
+    def lines(self, layout: PageLayout) -> list[str]:
+        return [self.translations[key] for key in layout.running_lines]
+
+    ############################################################################
+
+    # Internals
+
+    def _is_running(
+        self, text: str, position: float, ind: int, layout: PageLayout
+    ) -> bool:
+        normalized = _normalize(text)
+        if len(normalized) == 0:
+            return False
+        if self._find(normalized, position, ind) is None:
+            # the first occurrence is translated with text of page
+            self.candidates.append(_Candidate(normalized, position, ind))
+            return False
+        layout.running_lines.append(_translation_key(text))
+        return True
+
+    def _remember(self, text: str, position: float, ind: int) -> None:
+        normalized = _normalize(text)
+        if (
+            len(normalized) != 0
+            and self._find(normalized, position, ind) is None
+        ):
+            self.candidates.append(_Candidate(normalized, position, ind))
+
+    def _find(self, text: str, position: float, ind: int) -> _Candidate | None:
+        for candidate in reversed(self.candidates):
+            if (
+                # lines of the page itself, if it is extracted again
+                candidate.page != ind
+                and abs(candidate.position - position) <= max_position_shift
+                and _is_similar(candidate.text, text)
+            ):
+                return candidate
+        return None
+
+    # member fields
+    candidates: deque[_Candidate]  # the most recent are at the end
+    translations: dict[str, str]  # of running lines by their exact text
@@ -1,15 +1,14 @@
-# string.whitespace
-from itertools import accumulate
-from operator import add
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 
 # regex for transforming recognized text
 import re
-import string
+from typing import Hashable, Iterable, Iterator
 
 # Read Image
 from PIL import Image
-from PIL import ImageDraw
-from PIL import ImageFont
 
 # convert language code from ISO 639-1 to ISO 639-2
 import pycountry
@@ -18,7 +17,15 @@ import pycountry
 from pytesseract import pytesseract as pt
 
 from FileTranslator.OCR.IOCR import IOCR
-from FileTranslator.Translator.ITranslator import ITranslator
+from FileTranslator.OCR.LayoutBuilder import build_layout
+from FileTranslator.OCR.LineAligner import align_lines
+from FileTranslator.OCR.OCRCache import OCRCache
+from FileTranslator.OCR.PageCompositor import PageCompositor
+from FileTranslator.OCR.PageLayout import LineBox
+from FileTranslator.OCR.PageLayout import PageLayout
+from FileTranslator.OCR.RunningLines import is_page_number
+from FileTranslator.OCR.WordTable import WordTable
+from FileTranslator.Util.FontMetrics import FontMetrics
 import FileTranslator.Util.Logs as Logs
 from FileTranslator.Util.PathInfo import PathInfo
 from FileTranslator.Util.TranslateInfo import TranslateInfo
@@ -30,42 +37,6 @@ def _get_lang_code(iso_639_1_code: str) -> str:
     return pycountry.languages.get(alpha_2=iso_639_1_code).alpha_3
 
 
-def _get_font_size(text: str, width: int, font_path: str) -> int:
-    start, finish = 1, 1
-    cur = 1
-    font = ImageFont.truetype(font_path, cur)
-    inc = False
-    while font.getbbox(text)[2] < width:
-        if inc:
-            finish += 1
-        else:
-            finish *= 2
-        try:
-            font = ImageFont.truetype(font_path, finish)
-        except OSError:
-            # invalid pixel size
-            if inc:
-                break
-            else:
-                inc = True
-    if inc:
-        finish -= 1
-        return finish - 1
-    while finish - start > 1:
-        mid = (finish - start) // 2
-        cur = start + mid
-        font = ImageFont.truetype(font_path, cur)
-        if font.getbbox(text)[2] > width:
-            finish = cur
-        else:
-            start = cur
-    return start
-
-
-def _is_strip(word: str) -> bool:
-    return bool(re.match(f"^[{string.whitespace}]*$", word))
-
-
 def _empty(word: str) -> bool:
     return len(word) == 0
 
@@ -73,23 +44,56 @@ def _empty(word: str) -> bool:
 ################################################################################
 
 
+def _numbered_lines(lines: list[str]) -> str:
+    return "\n".join(f"{i}: {line}" for i, line in enumerate(lines))
+
+
 def _print_lines(text) -> None:
-    pars = text.split("\n\n")
-    lines = list()
-    for par in pars:
-        # dev_log(f"par:\n{par}")
-        lines += par.split("\n")
-    msg = ""
-    for i, line in enumerate(lines):
-        msg += f"{i}: {line}\n"
-    Logs.dev(msg)
+    # lines of all paragraphs, empty lines between paragraphs are skipped
+    Logs.dev(lambda: _numbered_lines(re.split("\n\n?", text)))
 
 
-class TesseractOCR(IOCR):
-    # Exceptions
-    class IncorrectTranslatedTextFormat(Exception):
-        pass
+# ocr of worker process
+_worker_ocr = None
+
+
+def _init_worker(
+    is_release: bool, search_lang: str, cache_path: str, cache_size: int
+) -> None:
+    global _worker_ocr
+    Logs.init_worker(is_release)
+    _worker_ocr = TesseractOCR()
+    _worker_ocr.search_lang = search_lang
+    _worker_ocr.init_ocr_cache(cache_path, cache_size)
+
+
+def _recognize_in_worker(image: Image) -> PageLayout:
+    layout = _worker_ocr.recognize(image)
+    # image is already in parent process, don't send it back
+    layout.image = None
+    return layout
+
 
+def _take_result(in_flight: deque) -> tuple[Hashable, PageLayout]:
+    key, image, future = in_flight.popleft()
+    layout = future.result()
+    layout.image = image
+    return key, layout
+
+
+def _print_words(words: WordTable) -> None:
+    Logs.dev(
+        lambda: "\n".join(
+            [
+                f"{name}: {list(column)}"
+                for name, column in words.columns.items()
+            ]
+            + [f"text: {words.text}"]
+        )
+    )
+
+
+class TesseractOCR(IOCR):
     # API
     def __init__(self):
         pass
@@ -97,320 +101,164 @@ class TesseractOCR(IOCR):
     def init(self, path_info: PathInfo, translate_info: TranslateInfo) -> None:
         self.search_lang = _get_lang_code(translate_info.src_lang)
         self.font_path = translate_info.font_path
+        self.font_metrics = FontMetrics(self.font_path)
+        self.compositor = PageCompositor(
+            self.font_metrics, translate_info.fast_render
+        )
+        self.ocr_workers = translate_info.ocr_workers
+        self.init_ocr_cache(
+            path_info.ocr_cache_path, translate_info.ocr_cache_size
+        )
         self.context = ""
-        self.save_context = self.context_added = False
+
+    def init_ocr_cache(self, cache_path: str, cache_size: int) -> None:
+        self.ocr_cache_path, self.ocr_cache_size = cache_path, cache_size
+        self.ocr_cache = None
+        if cache_size > 0:
+            self.ocr_cache = OCRCache(cache_path, cache_size)
 
     def change_search_language(self, iso_639_1_lang: str):
         self.search_lang = _get_lang_code(iso_639_1_lang)
 
-    def get_text_to_translate(self, image: Image, save_context: bool) -> str:
-        Logs.dev("get_text_to_translate() started")
-        self.save_context = save_context
-        self.image = image
+    def recognize(self, image: Image) -> PageLayout:
+        Logs.dev("recognize() started")
+        layout = PageLayout(image)
 
         # extract text and its location from image
-        self.src_dict = pt.image_to_data(
-            self.image, lang=self.search_lang, output_type=pt.Output.DICT
-        )
+        layout.src_dict = self._image_to_data(image)
 
         # transform to string
-        self._dict_to_text()
-        self._compute_src_pars()
+        self._dict_to_text(layout)
 
         Logs.dev("Transformed text")
-        _print_lines(self.src_text)
-
-        self._try_add_context()
-
-        Logs.dev("get_text_to_translate() finished")
-        return self.src_text
+        _print_lines(layout.src_text)
 
-    def translated_text_to_image(
-        self, text: str, translator: ITranslator
-    ) -> Image:
-        Logs.dev(f"Converting translated text to image")
-        if _empty(text):
-            res = self.image
-            self.reset()
-            Logs.dev(f"No text to convert, image saved unchanged")
-            return res
+        Logs.dev("recognize() finished")
+        return layout
 
-        # handle context
-        text = self._try_remove_context(text)
-        self._save_context()
+    def recognize_all(
+        self, pages: Iterable[tuple[Hashable, Image.Image | PageLayout]]
+    ) -> Iterator[tuple[Hashable, PageLayout]]:
+        if self.ocr_workers <= 1:
+            yield from super().recognize_all(pages)
+            return
 
-        lines = self._split_translated_text_to_lines(text, translator)
+        # "spawn" doesn't copy state of this process (open logs file etc.)
+        executor = ProcessPoolExecutor(
+            max_workers=self.ocr_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                Logs.is_release(),
+                self.search_lang,
+                self.ocr_cache_path,
+                self.ocr_cache_size,
+            ),
+        )
+        in_flight = deque()
+        max_in_flight = self.max_pages_per_worker * self.ocr_workers
+        try:
+            for key, page in pages:
+                if isinstance(page, PageLayout):
+                    # keeps its place in order of pages
+                    future = Future()
+                    future.set_result(page)
+                    in_flight.append((key, page.image, future))
+                else:
+                    future = executor.submit(_recognize_in_worker, page)
+                    in_flight.append((key, page, future))
+                if len(in_flight) >= max_in_flight:
+                    yield _take_result(in_flight)
+            while len(in_flight) != 0:
+                yield _take_result(in_flight)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def add_context(self, layout: PageLayout, save_context: bool) -> str:
+        self._try_add_context(layout, save_context)
+        if not _empty(layout.src_text):
+            self._save_context(layout)
+        return layout.src_text
+
+    def restore_context(self, layout: PageLayout) -> None:
+        self.context = ""
+        if not _empty(layout.src_text):
+            self._save_context(layout)
 
-        self._put_text_on_image(lines)
+    def split_to_lines(self, layout: PageLayout, text: str) -> list[str]:
+        if _empty(text):
+            return []
+        text = self._try_remove_context(layout, text)
+        return self._split_translated_text_to_lines(layout, text)
 
-        # save image
-        res = self.image
-        self.reset()
+    def lines_to_image(self, layout: PageLayout, lines: list[str]) -> Image:
+        Logs.dev(f"Converting translated text to image")
+        if len(lines) == 0:
+            Logs.dev(f"No text to convert, image saved unchanged")
+            return layout.image
+        res = layout.image.copy()
+        self._put_text_on_image(layout, res, lines)
         Logs.dev(f"Converting translated text to image finished")
         return res
 
     def reset(self) -> None:
-        self.image = Image.Image()
-        self.src_text = self.trg_text = ""
-        self.src_dict = {}
-        self.boxes = list[TesseractOCR.LineBox]()
+        self.layout = PageLayout(Image.Image())
 
     # Internals
-    class LineBox:
-        x: int  # left top x
-        y: int  # left top y
-        w: int  # width
-        h: int  # height
+    LineBox = LineBox
+
+    def _image_to_data(self, image: Image) -> dict:
+        if self.ocr_cache is None:
+            return pt.image_to_data(
+                image, lang=self.search_lang, output_type=pt.Output.DICT
+            )
+        key = self.ocr_cache.key(image, self.search_lang)
+        src_dict = self.ocr_cache.get(key)
+        if src_dict is not None:
+            Logs.dev("Pytesseract, recognition result found in cache")
+            return src_dict
+        src_dict = pt.image_to_data(
+            image, lang=self.search_lang, output_type=pt.Output.DICT
+        )
+        self.ocr_cache.put(key, src_dict)
+        return src_dict
 
     def _split_translated_text_to_lines(
-        self, text: str, translator: ITranslator
+        self, layout: PageLayout, text: str
     ) -> list[str]:
         Logs.dev(f"Splitting translated text to lines")
-        pars = text.split("\n\n")
-        lines = list()
-        for par in pars:
-            lines += par.split("\n")
-        for i, line in enumerate(lines):
-            Logs.dev(f"{i}: {line}")
-        if len(lines) != len(self.boxes):
-            Logs.dev(
-                "Incorrect number of lines after translation"
-                f"len(lines) = {len(lines)},"
-                f"len(self.boxes) = {len(self.boxes)}"
-            )
-            new_lines = []
-            src_pars_count = len(self.pars_info)
-            for i in range(src_pars_count):
-                cur_lines = pars[i].split("\n")
-                if len(self.pars_info[i]) == len(cur_lines):
-                    Logs.dev(
-                        f"Paragraph {i} coincide, "
-                        f"len(cur_lines) = {len(cur_lines)}"
-                    )
-                    new_lines += cur_lines
-                    continue
-                # translating line by line
-                Logs.dev("Translating line by line")
-                for j in range(len(self.pars_info[i])):
-                    new_lines.append(translator.translate(self.pars_info[i][j]))
-                # make remaining text
-                Logs.dev("Make remaining text")
-                new_text = ""
-                for j in range(i + 1, src_pars_count):
-                    if len(new_text) != 0:
-                        new_text += "\n\n" + "\n".join(self.pars_info[j])
-                    else:
-                        new_text = "\n".join(self.pars_info[j])
-                # translate text
-                Logs.dev(f"remaining text: {new_text}")
-                new_lines += self._recursive_translation(
-                    i + 1, new_text, translator
-                )
-                break
-            lines = new_lines
+        lines, layout.line_mismatches = align_lines(layout.pars_info, text)
+        Logs.dev(lambda: _numbered_lines(lines))
         Logs.dev(f"Translated text splitted")
         return lines
 
-    def _recursive_translation(
-        self, cur_par_num: int, src_text: str, translator: ITranslator
-    ) -> list[str]:
-        Logs.dev("-------Recursive translation-----------")
-        trg_text = translator.translate(src_text)
-        pars = trg_text.split("\n\n")
-        lines = list()
-        for par in pars:
-            lines += par.split("\n")
-        for i, line in enumerate(lines):
-            Logs.dev(f"{i}: {line}")
-        if len(lines) != self._lines_left(cur_par_num):
-            Logs.warning(
-                "Incorrect number of lines after translationlen(lines) ="
-                f" {len(lines)},self._lines_left(cur_par_num) ="
-                f" {self._lines_left(cur_par_num)}"
-            )
-            new_lines = []
-            src_pars_count = len(self.pars_info) - cur_par_num
-            for i in range(src_pars_count):
-                ni = i + cur_par_num
-                cur_lines = pars[i].split("\n")
-                if len(self.pars_info[ni]) == len(cur_lines):
-                    new_lines += cur_lines
-                    continue
-                # translating line by line
-                for j in range(len(self.pars_info[ni])):
-                    new_lines.append(
-                        translator.translate(self.pars_info[ni][j])
-                    )
-                # make remaining text
-                if i + 1 == src_pars_count:
-                    # if problem was in last paragraph, we translated all text
-                    return new_lines
-                new_text = ""
-                for j in range(ni + 1, src_pars_count + cur_par_num):
-                    if len(new_text) != 0:
-                        new_text += "\n\n" + "\n".join(self.pars_info[j])
-                    else:
-                        new_text = "\n".join(self.pars_info[j])
-                # translate text
-                new_lines += self._recursive_translation(
-                    i + 1, new_text, translator
-                )
-                return new_lines
-        else:
-            return lines
-
-    def _dict_to_text(self) -> None:
-        # init member fields
-        self.src_text = ""
-        self.boxes = list()
-
-        # remove extra symbols
-        self._remove_extra_symbols()
-
-        # make self.src_text
-        new_line_smb = 1
-        accum_top_y = accum_bot_y = 0
-        first_word_ind = words_in_line = 0  # first_word_ind in line
-        for i, word in enumerate(self.src_dict["text"]):
-            if len(word) == 0:
-                if new_line_smb == 0:
-                    # prev line ended
-                    self._append_to_boxes(
-                        first_word_ind, words_in_line, accum_top_y, accum_bot_y
-                    )
-                    new_line_smb = 1
-                    self.src_text += "\n"
-                elif new_line_smb < self.max_new_line:
-                    new_line_smb += 1
-                    self.src_text += "\n"
-                else:
-                    continue
-            elif new_line_smb != 0:
-                # new line started
-                new_line_smb = 0
-                first_word_ind = i
-                words_in_line = 1
-                accum_top_y = self.src_dict["top"][i]
-                accum_bot_y = (
-                    self.src_dict["top"][i] + self.src_dict["height"][i]
-                )
-                self.src_text += word
-            else:
-                # next word in line
-                words_in_line += 1
-                accum_top_y += self.src_dict["top"][i]
-                accum_bot_y += (
-                    self.src_dict["top"][i] + self.src_dict["height"][i]
-                )
-                self.src_text += " " + word
-        # append last line
-        words_count = len(self.src_dict["text"])
-        if words_count != 0:
-            self._append_to_boxes(
-                first_word_ind, words_in_line, accum_top_y, accum_bot_y
-            )
-        return
+    def _dict_to_text(self, layout: PageLayout) -> None:
+        words = WordTable.from_dict(layout.src_dict)
+        Logs.dev("Pytesseract, recognized words:")
+        _print_words(words)
+        build_layout(layout, words)
 
-    def _put_text_on_image(self, lines: list[str]):
+    def _put_text_on_image(
+        self, layout: PageLayout, image: Image, lines: list[str]
+    ):
         Logs.dev(f"Pytesseract, putting text on image")
-        for i, line in enumerate(lines):
-            # set variables
-            box = self.boxes[i]
-            y_scale = min(int(0.15 * box.h), 5)
-            box.y, box.h = box.y - y_scale, box.h + 2 * y_scale
-
-            # TODO: probably check conf
-            # get optimal font size
-            fontsize = _get_font_size(line, box.w, self.font_path)
-            font = ImageFont.truetype(self.font_path, fontsize)
-
-            # set text
-            y_off = 1
-            x_off = 2
-            _, _, text_width, text_height = font.getbbox(line)
-            text_width += 2 * x_off
-            text_height = text_height + 2 * y_off
-            # img = Image.new('RGBA', (text_width, text_height), color=(100, 100, 100))
-            img = Image.new(
-                "RGBA", (text_width, text_height), color=(255, 255, 255)
-            )
-            draw = ImageDraw.Draw(img)
-            draw.text((x_off, y_off), line, font=font, fill=(0, 0, 0))
-            img = img.resize((box.w, box.h))
-
-            self.image.paste(img, (box.x, box.y))
+        # TODO: probably check conf
+        self.compositor.compose(image, layout.boxes, lines)
         Logs.dev(f"Pytesseract, putting text on image finished")
 
-    def _compute_src_pars(self) -> None:
-        self.pars_info = []
-        if _empty(self.src_text):
-            return
-        pars = self.src_text.split("\n\n")
-        for par in pars:
-            self.pars_info.append(par.split("\n"))
-        total = self._lines_left(0)
-        if total != len(self.boxes):
-            Logs.error(
-                "Unexpected error in compute_src_pars: "
-                "invalid number of lines. "
-                f"total = {total}, len(self.boxes) = {len(self.boxes)}"
-            )
-            exit(111)
-
-    def _lines_left(self, start_par_num: int) -> int:
-        res = 0
-        for i in range(start_par_num, len(self.pars_info)):
-            res += len(self.pars_info[i])
-        return res
-
-    def _print_src_dict(self) -> None:
-        msg = ""
-        for attr in self.src_dict.keys():
-            msg += f"{attr}: {self.src_dict[attr]}\n"
-        Logs.dev(msg)
-
-    def _remove_extra_symbols(self) -> None:
-        # remove leading extra words
-        self._iterative_strip(0)
-
-        # remove end extra words
-        self._iterative_strip(-1)
-
-        # print dict
-        Logs.dev("Pytesseract, stripped text:")
-        self._print_src_dict()
-
-        # remove extra whitespaces
-        last_new_line = -1
-        i = 0
-        while i < len(self.src_dict["text"]) - 1:
-            i += 1
-            word = self.src_dict["text"][i]
-            if last_new_line != -1:
-                if _is_strip(word):
-                    continue
-                if i > last_new_line + 1:
-                    self.src_dict["text"][last_new_line + 1] = ""
-                    while i > last_new_line + 2:
-                        i -= 1
-                        self._delete_dict_item(i)
-                last_new_line = -1
-            elif _empty(word):
-                last_new_line = i
-
-    def _try_add_context(self) -> None:
+    def _try_add_context(self, layout: PageLayout, save_context: bool) -> None:
         Logs.dev("Pytesseract, try add context")
-        self.context_added = (
-            self.save_context
+        layout.context_added = (
+            save_context
             and not _empty(self.context)
-            and not _empty(self.src_text)
+            and not _empty(layout.src_text)
         )
-        if self.context_added:
+        if layout.context_added:
             Logs.dev(f"Pytesseract, adding context: {self.context}")
-            self.src_text = self.context + "\n" + self.src_text
+            layout.src_text = self.context + "\n" + layout.src_text
 
-    def _try_remove_context(self, text: str) -> str:
-        if not self.context_added:
+    def _try_remove_context(self, layout: PageLayout, text: str) -> str:
+        if not layout.context_added:
             return text
         ind = text.find("\n")
         if ind == -1:
@@ -419,12 +267,12 @@ class TesseractOCR(IOCR):
         text = text[ind + 1 :]
         return text
 
-    def _save_context(self):
-        splitted = self.src_text.split("\n\n")
+    def _save_context(self, layout: PageLayout):
+        splitted = layout.src_text.split("\n\n")
         par = splitted[-1]
         self.context = re.sub("\n", " ", par)
-        if self.context.isnumeric():
-            # Most likely this is the page number.
+        if is_page_number(self.context):
+            # --translate-running-lines keeps page numbers in text
             if len(splitted) > 1:
                 par = splitted[-2]
                 self.context = re.sub("\n", " ", par)
@@ -434,57 +282,16 @@ class TesseractOCR(IOCR):
             Logs.error("Pytesseract: unexpected error, context contains \\n")
             raise RuntimeError
 
-    def _dict_is_empty(self):
-        return len(self.src_dict["text"]) == 0
-
-    def _iterative_strip(self, ind: int):
-        if self._dict_is_empty():
-            return
-        word = self.src_dict["text"][ind]
-        while not self._dict_is_empty() and _is_strip(word):
-            self._delete_dict_item(ind)
-            if self._dict_is_empty():
-                return
-            word = self.src_dict["text"][ind]
-
-    def _delete_dict_item(self, ind: int):
-        for attr in self.src_dict.keys():
-            del self.src_dict[attr][ind]
-
-    def _append_to_boxes(
-        self,
-        first_word_ind: int,
-        words_in_line: int,
-        accum_top_y: float,
-        accum_bot_y: float,
-    ) -> None:
-        box = TesseractOCR.LineBox()
-        # x
-        box.x = self.src_dict["left"][first_word_ind]
-        # w
-        last_word_ind = first_word_ind + words_in_line - 1
-        lxl = self.src_dict["left"][last_word_ind]
-        lxw = self.src_dict["width"][last_word_ind]
-        box.w = lxl + lxw - box.x
-        # y
-        box.y = int(accum_top_y / words_in_line)
-        # h
-        box.h = int(accum_bot_y / words_in_line - box.y)
-        self.boxes.append(box)
-
     # Member fields
-    max_new_line = 2
+    max_pages_per_worker = 2  # pages submitted to process pool in advance
 
     search_lang: str
-    image: Image.Image
-    src_text: str
-    trg_text: str
-    src_dict: dict
-    boxes: list[LineBox]
     font_path: str
-
-    pars_info: list[list[str]]
-
-    save_context: bool
-    context_added: bool
-    context: str
+    font_metrics: FontMetrics
+    compositor: PageCompositor
+    ocr_workers: int
+    ocr_cache: OCRCache | None
+    ocr_cache_path: str
+    ocr_cache_size: int
+
+    context: str  # last paragraph of previous page
@@ -0,0 +1,61 @@
+from array import array
+from itertools import compress
+from typing import Iterable
+
+################################################################################
+
+# Variables
+
+# numeric columns of pt.image_to_data result that are used
+numeric_columns = [
+    "level",
+    "block_num",
+    "par_num",
+    "line_num",
+    "word_num",
+    "left",
+    "top",
+    "width",
+    "height",
+]
+
+################################################################################
+
+
+# Recognized words in columns: one compact array per attribute instead of
+# list of python ints. Words are never deleted one by one, table is filtered
+# by mask as a whole.
+class WordTable:
+    def __init__(self, columns: dict[str, Iterable], text: Iterable[str]):
+        self.columns = {
+            name: array("i", columns[name]) for name in numeric_columns
+        }
+        self.text = list(text)
+
+    @staticmethod
+    def from_dict(src_dict: dict) -> "WordTable":
+        # src_dict is result of pt.image_to_data with output_type DICT
+        return WordTable(src_dict, src_dict["text"])
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __getitem__(self, name: str) -> array:
+        return self.columns[name]
+
+    def filter(
+        self, mask: Iterable[bool], text: list[str] | None = None
+    ) -> "WordTable":
+        # words with false mask are removed, `text` replaces texts of words
+        mask = list(mask)
+        return WordTable(
+            {
+                name: compress(column, mask)
+                for name, column in self.columns.items()
+            },
+            compress(self.text if text is None else text, mask),
+        )
+
+    # member fields
+    columns: dict[str, array]
+    text: list[str]
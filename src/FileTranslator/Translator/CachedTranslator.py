@@ -0,0 +1,104 @@
+import hashlib
+import json
+
+from FileTranslator.Translator.ITranslator import ITranslator
+from FileTranslator.Translator.ITranslator import normalize_text
+from FileTranslator.Util.DiskCache import DiskCache
+import FileTranslator.Util.Logs as Logs
+from FileTranslator.Util.PathInfo import PathInfo
+from FileTranslator.Util.TranslateInfo import TranslateInfo
+
+################################################################################
+
+
+# Translation memory. Serves translations of texts that were already translated
+# by the same backend, including previous runs.
+class CachedTranslator(ITranslator):
+    def __init__(self, translator: ITranslator, alias: str, cache: DiskCache):
+        self.translator = translator
+        self.alias = alias
+        self.cache = cache
+
+    @property
+    def max_concurrency(self) -> int:
+        return self.translator.max_concurrency
+
+    def init(self, path_info: PathInfo, translate_info: TranslateInfo) -> None:
+        self.src_lang = translate_info.src_lang
+        self.trg_lang = translate_info.trg_lang
+        self.translator_url = translate_info.translator_url
+        self.translator.init(path_info, translate_info)
+
+    def translate(self, text: str) -> str:
+        normalized = normalize_text(text)
+        if len(normalized) == 0:
+            return self.translator.translate(text)
+        key = self._key(normalized)
+        cached = self.cache.get(key)
+        if cached is not None:
+            Logs.dev("CachedTranslator: translation found in cache")
+            return cached.decode("utf-8")
+        res = self.translator.translate(text)
+        self.cache.put(key, res.encode("utf-8"))
+        return res
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        # only missing segments are sent to backend, in one batch
+        res = [""] * len(texts)
+        keys = {}
+        for i, text in enumerate(texts):
+            normalized = normalize_text(text)
+            if len(normalized) == 0:
+                continue
+            key = self._key(normalized)
+            cached = self.cache.get(key)
+            if cached is not None:
+                res[i] = cached.decode("utf-8")
+            else:
+                keys[i] = key
+        Logs.dev(
+            f"CachedTranslator: {len(texts) - len(keys)} of {len(texts)} "
+            "segments found in cache"
+        )
+        if len(keys) == 0:
+            return res
+        translated = self.translator.translate_batch(
+            [texts[i] for i in keys.keys()]
+        )
+        for (i, key), text in zip(keys.items(), translated):
+            self.cache.put(key, text.encode("utf-8"))
+            res[i] = text
+        return res
+
+    def reset(self) -> None:
+        self.translator.reset()
+
+    def close(self) -> None:
+        self.translator.close()
+
+    def stats(self) -> str:
+        return self.cache.stats()
+
+    ############################################################################
+
+    # Internals
+
+    def _key(self, normalized: str) -> str:
+        # backend and its server are a part of key too: translations of
+        # different backends differ
+        key = [
+            self.alias,
+            self.translator_url,
+            self.src_lang,
+            self.trg_lang,
+            normalized,
+        ]
+        return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+    # member fields
+    translator: ITranslator
+    alias: str
+    cache: DiskCache
+    src_lang: str
+    trg_lang: str
+    translator_url: str
@@ -0,0 +1,39 @@
+from FileTranslator.Translator.ITranslator import ITranslator
+from FileTranslator.Util.PathInfo import PathInfo
+from FileTranslator.Util.TranslateInfo import TranslateInfo
+
+################################################################################
+
+
+def echo_translation(text: str, trg_lang: str) -> str:
+    # keeps lines and paragraphs of text, as real translator does
+    return "\n".join(
+        f"[{trg_lang}] {line}" if line.strip() else line
+        for line in text.split("\n")
+    )
+
+
+################################################################################
+
+
+# Translates instantly by marking every line with target language. Used to
+# measure and check everything except translation.
+class EchoTranslator(ITranslator):
+    def __init__(self):
+        pass
+
+    def init(self, path_info: PathInfo, translate_info: TranslateInfo) -> None:
+        self.src_lang = translate_info.src_lang
+        self.trg_lang = translate_info.trg_lang
+
+    def translate(self, text: str) -> str:
+        return echo_translation(text, self.trg_lang)
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        return [echo_translation(text, self.trg_lang) for text in texts]
+
+    def reset(self) -> None:
+        pass
+
+    # member fields
+    max_concurrency = 8
@@ -0,0 +1,49 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from FileTranslator.Translator.IAsyncTranslator import IAsyncTranslator
+from FileTranslator.Translator.ITranslator import ITranslator
+from FileTranslator.Util.PathInfo import PathInfo
+from FileTranslator.Util.TranslateInfo import TranslateInfo
+
+################################################################################
+
+
+# Runs synchronous translator in threads, as many as the translator can serve
+# concurrently.
+class ExecutorTranslator(IAsyncTranslator):
+    def __init__(self, translator: ITranslator):
+        super().__init__(translator.max_concurrency)
+        self.translator = translator
+        self.executor = ThreadPoolExecutor(
+            self.max_concurrency, thread_name_prefix="translator"
+        )
+
+    def init(self, path_info: PathInfo, translate_info: TranslateInfo) -> None:
+        self.translator.init(path_info, translate_info)
+
+    def reset(self) -> None:
+        self.translator.reset()
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    ############################################################################
+
+    # Internals
+
+    async def _translate(self, text: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.translator.translate, text
+        )
+
+    async def _translate_batch(self, texts: list[str]) -> list[str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.translator.translate_batch, texts
+        )
+
+    # member fields
+    translator: ITranslator
+    executor: ThreadPoolExecutor
@@ -0,0 +1,47 @@
+import asyncio
+
+from FileTranslator.Util.PathInfo import PathInfo
+from FileTranslator.Util.TranslateInfo import TranslateInfo
+
+################################################################################
+
+
+# Asynchronous variant of ITranslator. Not more than max_concurrency requests
+# are handled by backend at once, others wait for their turn. Backends
+# implement _translate() and _translate_batch().
+class IAsyncTranslator:
+    # API
+    def __init__(self, max_concurrency: int = 1):
+        self.max_concurrency = max_concurrency
+        self.limiter = asyncio.Semaphore(max_concurrency)
+
+    def init(self, path_info: PathInfo, translate_info: TranslateInfo) -> None:
+        raise NotImplementedError
+
+    async def translate(self, text: str) -> str:
+        async with self.limiter:
+            return await self._translate(text)
+
+    async def translate_batch(self, texts: list[str]) -> list[str]:
+        async with self.limiter:
+            return await self._translate_batch(texts)
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    ############################################################################
+
+    # Internals
+
+    async def _translate(self, text: str) -> str:
+        raise NotImplementedError
+
+    async def _translate_batch(self, texts: list[str]) -> list[str]:
+        return list(await asyncio.gather(*map(self._translate, texts)))
+
+    # member fields
+    max_concurrency: int
+    limiter: asyncio.Semaphore
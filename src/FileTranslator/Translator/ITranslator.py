@@ -1,8 +1,44 @@
+import re
+
+import FileTranslator.Util.Logs as Logs
 from FileTranslator.Util.PathInfo import PathInfo
 from FileTranslator.Util.TranslateInfo import TranslateInfo
 
 ################################################################################
 
+# Variables
+
+# separate paragraph between packed segments, translators keep it unchanged
+segment_marker = "[#{}]"
+_marker_re = re.compile(r"\s*\[\s*#\s*(\d+)\s*\]\s*")
+
+################################################################################
+
+
+def normalize_text(text: str) -> str:
+    # spaces inside lines don't change translation, line breaks do
+    lines = [re.sub(r"\s+", " ", line).strip() for line in text.split("\n")]
+    return "\n".join(lines).strip("\n")
+
+
+def _pack(texts: list[str]) -> str:
+    res = texts[0]
+    for i in range(1, len(texts)):
+        res += f"\n\n{segment_marker.format(i)}\n\n{texts[i]}"
+    return res
+
+
+def _unpack(text: str, count: int) -> list[str] | None:
+    # None if markers were damaged by translator
+    parts = _marker_re.split(text)
+    markers = parts[1::2]
+    if markers != [str(i) for i in range(1, count)]:
+        return None
+    return [part.strip("\n") for part in parts[0::2]]
+
+
+################################################################################
+
 
 class ITranslator:
     # API
@@ -12,8 +48,61 @@ class ITranslator:
     def translate(self, text: str) -> str:
         raise NotImplementedError
 
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        # Segments are packed into as few requests as max_request_length
+        # allows. Backends with native batch support should override it.
+        res = [""] * len(texts)
+        for pack in self._make_packs(texts):
+            translated = self._translate_pack([texts[i] for i in pack])
+            for i, text in zip(pack, translated):
+                res[i] = text
+        return res
+
     def reset(self) -> None:
         raise NotImplementedError
 
+    def close(self) -> None:
+        pass
+
+    ############################################################################
+
+    # Internals
+
+    def _make_packs(self, texts: list[str]) -> list[list[int]]:
+        # indexes of consecutive non-empty texts, which length with markers
+        # fits max_request_length
+        packs = []
+        pack_length = 0
+        for i, text in enumerate(texts):
+            if len(text.strip()) == 0:
+                continue
+            length = len(text) + len(segment_marker.format(i)) + 4
+            if (
+                len(packs) == 0
+                or pack_length + length > self.max_request_length
+            ):
+                packs.append([])
+                pack_length = 0
+            packs[-1].append(i)
+            pack_length += length
+        return packs
+
+    def _translate_pack(self, texts: list[str]) -> list[str]:
+        if len(texts) == 1:
+            return [self.translate(texts[0])]
+        translated = _unpack(self.translate(_pack(texts)), len(texts))
+        if translated is not None:
+            return translated
+        # translator damaged markers, halves are translated separately
+        Logs.dev(f"Translator: unable to unpack {len(texts)} segments")
+        middle = len(texts) // 2
+        return self._translate_pack(texts[:middle]) + self._translate_pack(
+            texts[middle:]
+        )
+
+    # member fields
+    max_request_length = 5000  # in characters
+    max_concurrency = 1  # requests that can be handled from different threads
+
     src_lang: str
     trg_lang: str
@@ -0,0 +1,173 @@
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+import queue
+from urllib.parse import urlsplit
+
+from FileTranslator.Translator.ITranslator import ITranslator
+import FileTranslator.Util.Logs as Logs
+from FileTranslator.Util.PathInfo import PathInfo
+from FileTranslator.Util.TranslateInfo import TranslateInfo
+
+################################################################################
+
+# Variables
+
+timeout = 60
+
+################################################################################
+
+
+# Keep-alive connections to one server. Connection is taken by request and
+# returned after its response is read, so connections are never shared.
+class _ConnectionPool:
+    def __init__(self, url: str, size: int):
+        parts = urlsplit(url)
+        if parts.scheme == "https":
+            self.connection_type = http.client.HTTPSConnection
+        else:
+            self.connection_type = http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.path = parts.path.rstrip("/")
+        self.connections = queue.LifoQueue()
+        for _ in range(size):
+            self.connections.put(None)  # connections are opened lazily
+
+    def post(self, path: str, body: dict) -> (int, bytes):
+        data = json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        connection = self.connections.get()
+        try:
+            if connection is None:
+                connection = self._connect()
+            try:
+                return self._request(connection, path, data, headers)
+            except (http.client.HTTPException, ConnectionError):
+                # server closed idle connection, retry with new one
+                connection.close()
+                connection = self._connect()
+                return self._request(connection, path, data, headers)
+        except:
+            if connection is not None:
+                connection.close()
+            connection = None
+            raise
+        finally:
+            self.connections.put(connection)
+
+    def close(self) -> None:
+        while not self.connections.empty():
+            connection = self.connections.get()
+            if connection is not None:
+                connection.close()
+
+    ############################################################################
+
+    # Internals
+
+    def _connect(self) -> http.client.HTTPConnection:
+        return self.connection_type(self.netloc, timeout=timeout)
+
+    def _request(
+        self,
+        connection: http.client.HTTPConnection,
+        path: str,
+        data: bytes,
+        headers: dict,
+    ) -> (int, bytes):
+        connection.request("POST", self.path + path, data, headers)
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    # member fields
+    connection_type: type
+    netloc: str
+    path: str  # prefix of request paths
+    connections: queue.LifoQueue
+
+
+################################################################################
+
+
+# Client of self-hosted translation server with LibreTranslate API
+# (e.g. LibreTranslate, Argos Translate). Batches are sent as arrays of
+# texts, several batches are translated concurrently.
+class LibreTranslator(ITranslator):
+    # Exceptions
+
+    class TranslationFailed(Exception):
+        pass
+
+    ############################################################################
+
+    # API
+
+    def __init__(self):
+        pass
+
+    def init(self, path_info: PathInfo, translate_info: TranslateInfo) -> None:
+        self.src_lang = translate_info.src_lang
+        self.trg_lang = translate_info.trg_lang
+        self.url = translate_info.translator_url
+        self.workers = translate_info.translator_workers
+        self.pool = _ConnectionPool(self.url, self.workers)
+        self.max_concurrency = self.workers
+        Logs.dev(f"LibreTranslator: server {self.url}, {self.workers} workers")
+
+    def translate(self, text: str) -> str:
+        if len(text.strip()) == 0:
+            return ""
+        return self._request(text)
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        # packs are sent as arrays, markers are not needed
+        res = [""] * len(texts)
+        packs = self._make_packs(texts)
+        requests = [[texts[i] for i in pack] for pack in packs]
+        if len(requests) <= 1 or self.workers <= 1:
+            results = map(self._request, requests)
+        else:
+            with ThreadPoolExecutor(self.workers) as executor:
+                results = list(executor.map(self._request, requests))
+        for pack, translated in zip(packs, results):
+            for i, text in zip(pack, translated):
+                res[i] = text
+        return res
+
+    def reset(self) -> None:
+        # connections will be opened again by next requests
+        self.pool.close()
+        self.pool = _ConnectionPool(self.url, self.workers)
+
+    def close(self) -> None:
+        self.pool.close()
+
+    ############################################################################
+
+    # Internals
+
+    def _request(self, q: str | list[str]) -> str | list[str]:
+        body = {
+            "q": q,
+            "source": self.src_lang,
+            "target": self.trg_lang,
+            "format": "text",
+        }
+        status, data = self.pool.post("/translate", body)
+        try:
+            response = json.loads(data)
+        except ValueError:
+            response = {"error": data[:200].decode("utf-8", "replace")}
+        if status != 200 or "translatedText" not in response:
+            raise LibreTranslator.TranslationFailed(
+                f"Server {self.url} responded {status}: "
+                f"{response.get('error', response)}"
+            )
+        return response["translatedText"]
+
+    # member fields
+    max_request_length = 20000
+
+    url: str
+    workers: int
+    pool: _ConnectionPool
@@ -0,0 +1,141 @@
+import io
+import json
+import threading
+
+from FileTranslator.Translator.ITranslator import ITranslator
+from FileTranslator.Translator.ITranslator import normalize_text
+import FileTranslator.Util.Logs as Logs
+from FileTranslator.Util.PathInfo import PathInfo
+from FileTranslator.Util.TranslateInfo import TranslateInfo
+
+################################################################################
+
+# Translations file is in json lines format, one translated segment per line:
+# {"src_lang": "en", "trg_lang": "ru", "src": "...", "trg": "..."}
+
+
+def _record_key(src_lang: str, trg_lang: str, src: str) -> tuple:
+    return src_lang, trg_lang, normalize_text(src)
+
+
+################################################################################
+
+
+# Serves translations recorded by RecordingTranslator, so the same file can be
+# translated again without network.
+class ReplayTranslator(ITranslator):
+    # Exceptions
+
+    class TranslationNotRecorded(Exception):
+        pass
+
+    ############################################################################
+
+    # API
+
+    def __init__(self):
+        pass
+
+    def init(self, path_info: PathInfo, translate_info: TranslateInfo) -> None:
+        self.src_lang = translate_info.src_lang
+        self.trg_lang = translate_info.trg_lang
+        self.records = {}
+        with open(path_info.translations_path, "r", encoding="utf-8") as file:
+            for line in file:
+                if len(line.strip()) == 0:
+                    continue
+                record = json.loads(line)
+                key = _record_key(
+                    record["src_lang"], record["trg_lang"], record["src"]
+                )
+                self.records[key] = record["trg"]
+        Logs.dev(
+            f"ReplayTranslator: {len(self.records)} translations loaded "
+            f"from '{path_info.translations_path}'"
+        )
+
+    def translate(self, text: str) -> str:
+        if len(text.strip()) == 0:
+            return ""
+        res = self.records.get(_record_key(self.src_lang, self.trg_lang, text))
+        if res is None:
+            raise ReplayTranslator.TranslationNotRecorded(
+                f"No recorded translation of:\n{text}"
+            )
+        return res
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        # segments are recorded one by one, they are not packed
+        return [self.translate(text) for text in texts]
+
+    def reset(self) -> None:
+        pass
+
+    # member fields
+    max_concurrency = 8
+
+    records: dict[tuple, str]
+
+
+# Writes translations of wrapped backend to translations file.
+class RecordingTranslator(ITranslator):
+    def __init__(self, translator: ITranslator):
+        self.translator = translator
+        self.lock = threading.Lock()
+
+    @property
+    def max_concurrency(self) -> int:
+        return self.translator.max_concurrency
+
+    def init(self, path_info: PathInfo, translate_info: TranslateInfo) -> None:
+        self.src_lang = translate_info.src_lang
+        self.trg_lang = translate_info.trg_lang
+        self.translator.init(path_info, translate_info)
+        self.file = open(path_info.translations_path, "a", encoding="utf-8")
+        Logs.dev(
+            f"RecordingTranslator: translations are recorded to "
+            f"'{path_info.translations_path}'"
+        )
+
+    def translate(self, text: str) -> str:
+        res = self.translator.translate(text)
+        self._record([text], [res])
+        return res
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        res = self.translator.translate_batch(texts)
+        self._record(texts, res)
+        return res
+
+    def reset(self) -> None:
+        self.translator.reset()
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+        self.translator.close()
+
+    ############################################################################
+
+    # Internals
+
+    def _record(self, texts: list[str], translated: list[str]) -> None:
+        lines = []
+        for src, trg in zip(texts, translated):
+            if len(src.strip()) == 0:
+                continue
+            record = {
+                "src_lang": self.src_lang,
+                "trg_lang": self.trg_lang,
+                "src": src,
+                "trg": trg,
+            }
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        with self.lock:
+            self.file.write("".join(lines))
+            self.file.flush()
+
+    # member fields
+    translator: ITranslator
+    lock: threading.Lock
+    file: io.TextIOWrapper
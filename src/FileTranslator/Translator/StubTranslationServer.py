@@ -0,0 +1,106 @@
+import argparse
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+import json
+import threading
+
+from FileTranslator.Translator.EchoTranslator import echo_translation
+
+################################################################################
+
+# Variables
+
+default_port = 5000
+
+################################################################################
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are sent separately
+
+    def do_POST(self) -> None:
+        # body is read anyway, connection is kept alive for next requests
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        try:
+            if self.path.rstrip("/") != "/translate":
+                raise KeyError(self.path)
+            request = json.loads(data)
+            q, target = request["q"], request["target"]
+            if isinstance(q, list):
+                translated = [echo_translation(text, target) for text in q]
+            else:
+                translated = echo_translation(q, target)
+            self._respond(200, {"translatedText": translated})
+        except (KeyError, ValueError) as error:
+            self._respond(400, {"error": f"Invalid request: {error}"})
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _respond(self, status: int, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+################################################################################
+
+
+# Local server with LibreTranslate API, that "translates" text by prefixing
+# every line with target language. Used to check the pipeline without real
+# translation server.
+class StubTranslationServer:
+    def __init__(self, port: int = 0):
+        # port 0 means any free port
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    # member fields
+    server: ThreadingHTTPServer
+    thread: threading.Thread | None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stub translation server with LibreTranslate API"
+    )
+    parser.add_argument("--port", type=int, default=default_port)
+    args = parser.parse_args()
+    server = StubTranslationServer(args.port)
+    print(f"Serving on {server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
+from FileTranslator.Translator.CachedTranslator import CachedTranslator
+from FileTranslator.Translator.EchoTranslator import EchoTranslator
+from FileTranslator.Translator.ExecutorTranslator import ExecutorTranslator
+from FileTranslator.Translator.IAsyncTranslator import IAsyncTranslator
 from FileTranslator.Translator.ITranslator import ITranslator
+from FileTranslator.Translator.LibreTranslator import LibreTranslator
+from FileTranslator.Translator.ReplayTranslator import RecordingTranslator
+from FileTranslator.Translator.ReplayTranslator import ReplayTranslator
 from FileTranslator.Translator.YandexOnlineTranslator import (
     YandexOnlineTranslator,
 )
+from FileTranslator.Util.DiskCache import DiskCache
 import FileTranslator.Util.Logs as Logs
 from FileTranslator.Util.PathInfo import PathInfo
 from FileTranslator.Util.TranslateInfo import TranslateInfo
@@ -9,7 +17,15 @@ from FileTranslator.Util.TranslateInfo import TranslateInfo
 ################################################################################
 
 
-_translator_map = {"yandex": YandexOnlineTranslator()}
+_translator_map = {
+    "yandex": YandexOnlineTranslator(),
+    "libre": LibreTranslator(),
+    "echo": EchoTranslator(),
+    "replay": ReplayTranslator(),
+}
+
+# translate without network, their translations are not cached or recorded
+_local_translators = ["echo", "replay"]
 
 ################################################################################
 
@@ -25,6 +41,23 @@ def get_translator(
             f"{_translator_map}"
         )
     translator = _translator_map[alias]
+    if alias == "replay" and len(path_info.translations_path) == 0:
+        Logs.error("Translations file is required by 'replay' translator")
+        raise RuntimeError
+    if alias not in _local_translators:
+        if translate_info.translation_cache_size > 0:
+            cache = DiskCache(
+                path_info.translation_cache_path,
+                translate_info.translation_cache_size,
+            )
+            translator = CachedTranslator(translator, alias, cache)
+        if len(path_info.translations_path) != 0:
+            translator = RecordingTranslator(translator)
     translator.init(path_info, translate_info)
     Logs.user(f"'{alias}' translator constructed")
     return translator
+
+
+def make_async(translator: ITranslator) -> IAsyncTranslator:
+    # synchronous backends are run in executor
+    return ExecutorTranslator(translator)
@@ -6,6 +6,7 @@ import time
 
 # Selenium
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
@@ -25,7 +26,6 @@ from FileTranslator.Util.TranslateInfo import TranslateInfo
 
 timeout = 20
 default_pause = 2
-text_translation_pause = 0.5
 
 pause_between_download = 1
 small_request_pause = 0.3
@@ -59,6 +59,51 @@ def _browser_options() -> Options:
     return options
 
 
+# Resolves as soon as translation or error message appears on page. Result is
+# [state, html of translation], state is "ready", "failed" or "timeout".
+_wait_translation_script = """
+const [statusSelector, outputSelector, retrySelector, timeoutMs, done] =
+    arguments;
+const check = () => {
+    const status = document.querySelector(statusSelector);
+    const output = document.querySelector(outputSelector);
+    if (status && output &&
+        status.classList.contains("state-has_translation")) {
+        return ["ready", output.innerHTML];
+    }
+    if (document.querySelector(retrySelector)) {
+        return ["failed", ""];
+    }
+    return null;
+};
+const result = check();
+if (result) {
+    done(result);
+    return;
+}
+let timer = null;
+const observer = new MutationObserver(() => {
+    const result = check();
+    if (result) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(result);
+    }
+});
+observer.observe(document.body, {
+    subtree: true,
+    childList: true,
+    characterData: true,
+    attributes: true,
+    attributeFilter: ["class"],
+});
+timer = setTimeout(() => {
+    observer.disconnect();
+    done(["timeout", ""]);
+}, timeoutMs);
+"""
+
+
 def waiting_sleep(sec):
     Logs.dev(f"waiting {sec} sec")
     time.sleep(sec)
@@ -150,24 +195,13 @@ class YandexOnlineTranslator(ITranslator):
         # send text
         self._send_text()
 
-        # wait text to be translated
-        budget = timeout
-        while not self._translation_ready():
-            if budget < 0:
-                if self._retry_attempt():
-                    budget = timeout
-                else:
-                    raise YandexOnlineTranslator.TranslationTimeOut
-            time.sleep(text_translation_pause)
-
-        # get translated text in html
-        elem = WebDriverWait(self.browser, timeout).until(
-            EC.presence_of_element_located(
-                (By.CSS_SELECTOR, self.selector.OUTPUT_DATA)
-            ),
-            "Unable to find 'OUTPUT_DATA'",
-        )
-        self.trg = elem.get_attribute("innerHTML")
+        # wait text to be translated, translated html is taken at once
+        state, self.trg = self._wait_translation()
+        while state != "ready":
+            Logs.dev(f"YandexTranslator: translation {state}")
+            if not self._retry_attempt():
+                raise YandexOnlineTranslator.TranslationTimeOut
+            state, self.trg = self._wait_translation()
 
         # extract translated text from html
         self._convert_from_html()
@@ -212,6 +246,8 @@ class YandexOnlineTranslator(ITranslator):
 
     def _open_browser(self):
         self.browser = webdriver.Chrome(options=_browser_options())
+        # translation is waited by script
+        self.browser.set_script_timeout(timeout + default_pause)
 
         self.browser.get(self.web_page)
         self._update_timestamp()
@@ -239,15 +275,13 @@ class YandexOnlineTranslator(ITranslator):
             Logs.dev(f"Pause finished")
 
     def _try_find_elem(self, elem_nm: str, budget: float) -> (bool, WebElement):
-        pause = 0.5
-        while budget > 0:
-            try:
-                elem = self.browser.find_element(By.CSS_SELECTOR, elem_nm)
-                return True, elem
-            except:
-                time.sleep(pause)
-                budget -= pause
-        return False, WebElement(0, 0)
+        try:
+            elem = WebDriverWait(self.browser, budget).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, elem_nm))
+            )
+            return True, elem
+        except TimeoutException:
+            return False, WebElement(0, 0)
 
     def _make_request(self, action, to_wait: float = default_pause) -> None:
         self._pause_after_last_request(to_wait)
@@ -416,17 +450,24 @@ class YandexOnlineTranslator(ITranslator):
                 "YandexTranslator: Unable to disable auto detection of language"
             )
 
-    def _translation_ready(self) -> bool:
-        elem = self.browser.find_element(
-            By.CSS_SELECTOR, self.selector.TRANS_STATUS
+    def _wait_translation(self) -> (str, str):
+        # page is observed by script, so there is no polling via webdriver
+        return self.browser.execute_async_script(
+            _wait_translation_script,
+            self.selector.TRANS_STATUS,
+            self.selector.OUTPUT_DATA,
+            self.selector.RETRY,
+            timeout * 1000,
         )
-        return "state-has_translation" in elem.get_attribute("class").split(" ")
 
     def _convert_from_html(self) -> None:
         # remove all <span> tags
-        Logs.dev(f"YandexTranslator, html code:\n{self.trg}\n-------")
+        Logs.dev(lambda: f"YandexTranslator, html code:\n{self.trg}\n-------")
         self.trg = re.sub("<span.*?>((?:.|\n)*?)</span>", "\g<1>", self.trg)
-        Logs.dev(f"YandexTranslator, converted html code:\n{self.trg}\n-------")
+        trg = self.trg
+        Logs.dev(
+            lambda: f"YandexTranslator, converted html code:\n{trg}\n-------"
+        )
         # move leading punctuation marks to previous line
         self.trg = re.sub(
             f"([^\n])\n([{string.punctuation}]) ([^\n])",
@@ -439,6 +480,7 @@ class YandexOnlineTranslator(ITranslator):
 
     # member fields
     selector = Selector
+    max_request_length = 10000  # limit of web page input
 
     web_page: str
     browser: webdriver.Chrome
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import threading
+import time
+
+import FileTranslator.Util.Logs as Logs
+
+################################################################################
+
+# Variables
+
+# after eviction cache takes this part of its max size
+evict_to_ratio = 0.9
+
+################################################################################
+
+
+# Persistent key-value storage with least recently used eviction. Total size
+# of stored values doesn't exceed max_size bytes. Can be used from different
+# threads and processes.
+class DiskCache:
+    def __init__(self, path: str, max_size: int):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_size = max_size
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_used REAL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_used "
+            "ON entries(last_used)"
+        )
+
+    def get(self, key: str) -> bytes | None:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.connection.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            return row[0]
+
+    def put(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_size:
+            return
+        with self.lock:
+            # other processes write to the same file, so size is counted
+            # inside of write transaction
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), time.time()),
+                )
+                size = self._size()
+                if size > self.max_size:
+                    self._evict(size)
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def stats(self) -> str:
+        requests = self.hits + self.misses
+        hit_rate = 100 * self.hits / requests if requests != 0 else 0
+        return (
+            f"{self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hits), "
+            f"size {self.size() / 2**20:.1f} MB"
+        )
+
+    def size(self) -> int:
+        with self.lock:
+            return self._size()
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    ############################################################################
+
+    # Internals
+
+    def _size(self) -> int:
+        return self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def _evict(self, size: int) -> None:
+        to_free = size - int(self.max_size * evict_to_ratio)
+        keys = []
+        rows = self.connection.execute(
+            "SELECT key, size FROM entries ORDER BY last_used"
+        )
+        for key, entry_size in rows:
+            if to_free <= 0:
+                break
+            keys.append((key,))
+            to_free -= entry_size
+        rows.close()
+        self.connection.executemany("DELETE FROM entries WHERE key = ?", keys)
+        Logs.dev(f"DiskCache '{self.path}': {len(keys)} entries evicted")
+
+    # member fields
+    path: str
+    max_size: int
+    hits: int
+    misses: int
+    lock: threading.Lock
+    connection: sqlite3.Connection
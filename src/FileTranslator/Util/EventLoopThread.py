@@ -0,0 +1,53 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine
+
+################################################################################
+
+
+# Event loop running in background thread, so coroutines can be started from
+# synchronous code and waited for as usual futures.
+class EventLoopThread:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="event-loop", daemon=True
+        )
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine: Coroutine) -> Any:
+        return self.submit(coroutine).result()
+
+    def close(self) -> None:
+        # unfinished coroutines are cancelled
+        if self.loop.is_closed():
+            return
+        self.run(self._cancel_tasks())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    ############################################################################
+
+    # Internals
+
+    async def _cancel_tasks(self) -> None:
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # member fields
+    loop: asyncio.AbstractEventLoop
+    thread: threading.Thread
@@ -0,0 +1,64 @@
+from PIL import ImageFont
+
+################################################################################
+
+# Variables
+
+# size used to estimate width of text of any other size
+reference_size = 100
+
+################################################################################
+
+
+# Loads every size of font only once and finds font size that fits text into
+# given width. Advance width of text scales linearly with font size, so the
+# size is estimated from width at reference size and then adjusted by rendered
+# width.
+class FontMetrics:
+    def __init__(self, font_path: str):
+        self.font_path = font_path
+        self.faces = {}
+        self.reference = self.get_face(reference_size)
+
+    def get_face(self, size: int) -> ImageFont.FreeTypeFont:
+        face = self.faces.get(size)
+        if face is None:
+            face = ImageFont.truetype(self.font_path, size)
+            self.faces[size] = face
+        return face
+
+    def text_width(self, text: str, size: int) -> int:
+        return self.get_face(size).getbbox(text)[2]
+
+    def fit_size(self, text: str, width: int, height: int | None = None) -> int:
+        # max size with text not exceeding width (and height if specified),
+        # but at least 1
+        reference_width = self.reference.getlength(text)
+        if reference_width <= 0:
+            return 1
+        size = int(width * reference_size / reference_width)
+        if height is not None:
+            reference_height = self.reference.getbbox(text)[3]
+            if reference_height > 0:
+                size = min(
+                    size, int(height * reference_size / reference_height)
+                )
+        size = max(1, size)
+        while size > 1 and not self._fits(text, size, width, height):
+            size -= 1
+        while self._fits(text, size + 1, width, height):
+            size += 1
+        return size
+
+    ############################################################################
+
+    # Internals
+
+    def _fits(self, text: str, size: int, width: int, height: int | None):
+        _, _, right, bottom = self.get_face(size).getbbox(text)
+        return right <= width and (height is None or bottom <= height)
+
+    # member fields
+    font_path: str
+    faces: dict[int, ImageFont.FreeTypeFont]
+    reference: ImageFont.FreeTypeFont
@@ -0,0 +1,236 @@
+import io
+import json
+import os
+import re
+
+from PIL import Image
+
+from FileTranslator.OCR.PageLayout import LineBox
+from FileTranslator.OCR.PageLayout import PageLayout
+import FileTranslator.Util.Logs as Logs
+
+################################################################################
+
+# Variables
+
+journal_version = 1
+png_compress_level = 1  # pages are written often and read rarely
+
+# names of page images written by journal, other files are never removed
+_page_name_re = re.compile(r"\d{6}\.png(\.tmp)?")
+
+################################################################################
+
+
+def _layout_to_json(layout: PageLayout) -> dict:
+    return {
+        "src_text": layout.src_text,
+        "boxes": [[box.x, box.y, box.w, box.h] for box in layout.boxes],
+        "pars_info": layout.pars_info,
+        "context_added": layout.context_added,
+        "running_lines": layout.running_lines,
+    }
+
+
+def _boxes_from_json(boxes: list[list[int]]) -> list[LineBox]:
+    result = []
+    for x, y, w, h in boxes:
+        box = LineBox()
+        box.x, box.y, box.w, box.h = x, y, w, h
+        result.append(box)
+    return result
+
+
+def _write_atomically(path: str, data: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+################################################################################
+
+
+# On-disk record of translated pages of one job. Every finished page is
+# appended to the journal only after its rendered image is safely stored, so
+# after crash all recorded pages can be reused.
+class Journal:
+    def __init__(self, work_dir: str, job_info: dict, resume: bool):
+        self.work_dir = work_dir
+        self.pages_dir = os.path.join(work_dir, "pages")
+        self.job_path = os.path.join(work_dir, "job.json")
+        self.journal_path = os.path.join(work_dir, "journal.jsonl")
+        self.job_info = dict(job_info, version=journal_version)
+        self.records = {}
+
+        if resume and self._same_job():
+            self._read_records()
+            Logs.user(
+                f"Resuming translation, {len(self.records)} pages "
+                f"already translated (work directory '{work_dir}')"
+            )
+        else:
+            if resume:
+                Logs.warning(
+                    f"No progress of this job found in '{work_dir}', "
+                    "starting from scratch"
+                )
+            self._start_new_job()
+        self.journal_file = open(self.journal_path, "a", encoding="utf-8")
+
+    def finished_pages(self) -> list[int]:
+        return sorted(self.records.keys())
+
+    def is_finished(self, ind: int) -> bool:
+        return ind in self.records
+
+    def load_page(self, ind: int) -> Image:
+        path = os.path.join(self.work_dir, self.records[ind]["image"])
+        with Image.open(path) as image:
+            image.load()
+            return image
+
+    def page_size(self, ind: int) -> (int, int):
+        # only header of image is read
+        path = os.path.join(self.work_dir, self.records[ind]["image"])
+        with Image.open(path) as image:
+            return image.size
+
+    def load_lines(self, ind: int) -> (list[LineBox], list[str] | None):
+        # boxes and translated lines, None for skipped pages
+        record = self.records[ind]
+        if record["layout"] is None or record["lines"] is None:
+            return [], None
+        return _boxes_from_json(record["layout"]["boxes"]), record["lines"]
+
+    def load_layout(self, ind: int) -> PageLayout | None:
+        # recognition result without image, None for skipped pages
+        record = self.records[ind]
+        if record["layout"] is None:
+            return None
+        layout = PageLayout(None)
+        layout.src_text = record["layout"]["src_text"]
+        layout.boxes = _boxes_from_json(record["layout"]["boxes"])
+        layout.pars_info = record["layout"]["pars_info"]
+        layout.context_added = record["layout"]["context_added"]
+        layout.running_lines = record["layout"]["running_lines"]
+        return layout
+
+    def record_page(
+        self,
+        ind: int,
+        layout: PageLayout | None,
+        lines: list[str] | None,
+        image: Image,
+    ) -> None:
+        # image first, record refers to it
+        name = f"{ind:06d}.png"
+        tmp_path = os.path.join(self.pages_dir, f"{name}.tmp")
+        image.save(tmp_path, format="PNG", compress_level=png_compress_level)
+        os.replace(tmp_path, os.path.join(self.pages_dir, name))
+
+        record = {
+            "page": ind,
+            "layout": None if layout is None else _layout_to_json(layout),
+            "lines": lines,
+            "image": os.path.join("pages", name),
+        }
+        self.journal_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.journal_file.flush()
+        os.fsync(self.journal_file.fileno())
+        self.records[ind] = record
+
+    def close(self) -> None:
+        self.journal_file.close()
+
+    def remove(self) -> None:
+        self.close()
+        self._remove_files()
+        try:
+            os.rmdir(self.work_dir)
+        except OSError:
+            # directory was specified by user and contains other files
+            pass
+        Logs.dev(f"Journal in '{self.work_dir}' removed")
+
+    ############################################################################
+
+    # Internals
+
+    def _same_job(self) -> bool:
+        try:
+            with open(self.job_path, "r") as file:
+                return json.load(file) == self.job_info
+        except (OSError, ValueError):
+            return False
+
+    def _start_new_job(self) -> None:
+        foreign = [
+            os.path.basename(path)
+            for path in [self.pages_dir, self.journal_path]
+            if os.path.exists(path)
+        ]
+        if not os.path.exists(self.job_path) and len(foreign) != 0:
+            Logs.error(
+                f"Work directory '{self.work_dir}' contains {foreign}, which "
+                "weren't created by translator. Specify another work "
+                "directory with -w option"
+            )
+            raise RuntimeError
+        self._remove_files()
+        # job file marks directory as made by journal, so it is written first
+        # and removed last
+        os.makedirs(self.work_dir, exist_ok=True)
+        _write_atomically(self.job_path, json.dumps(self.job_info, indent=2))
+        os.makedirs(self.pages_dir, exist_ok=True)
+
+    def _remove_files(self) -> None:
+        # only files of journal, work directory could be specified by user
+        if not os.path.exists(self.job_path):
+            return
+        if os.path.exists(self.pages_dir):
+            for name in os.listdir(self.pages_dir):
+                if _page_name_re.fullmatch(name) is not None:
+                    os.remove(os.path.join(self.pages_dir, name))
+            try:
+                os.rmdir(self.pages_dir)
+            except OSError:
+                # files of user are kept
+                pass
+        for path in [
+            self.journal_path,
+            f"{self.journal_path}.tmp",
+            self.job_path,
+        ]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _read_records(self) -> None:
+        if not os.path.exists(self.journal_path):
+            return
+        valid_lines = []
+        with open(self.journal_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # last line could be torn by crash
+                    Logs.dev(f"Journal: skipping damaged record")
+                    continue
+                self.records[record["page"]] = record
+                valid_lines.append(json.dumps(record, ensure_ascii=False))
+        # new records must not be appended to damaged line
+        _write_atomically(
+            self.journal_path, "".join(f"{line}\n" for line in valid_lines)
+        )
+
+    # member fields
+    work_dir: str
+    pages_dir: str
+    job_path: str
+    journal_path: str
+    job_info: dict
+    records: dict[int, dict]
+    journal_file: io.TextIOWrapper
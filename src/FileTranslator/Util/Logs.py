@@ -1,3 +1,13 @@
+import atexit
+import gzip
+import os
+import queue
+import shutil
+import sys
+import threading
+from typing import Callable
+
+
 class _FontColor:
     _ESC = "\033"
     RESET = f"{_ESC}[0m"
@@ -14,77 +24,176 @@ class _FontColor:
 
 # Elements can be concatenated: {BLACK}{BOLD} - black bold font
 
+################################################################################
+
+# Variables
+
+# levels
+DEV = 10
+USER = 20
+WARNING = 30
+ERROR = 40
+
+# logs of previous runs are kept compressed: .logs.1.gz is the latest
+kept_logs = 5
+
+# message is a string or a function making it, the function is called only if
+# level of message is enabled
+Message = str | Callable[[], str]
+
+################################################################################
+
+
+# Writes logs to file in background thread, so logging doesn't wait for disk.
+class _FileWriter:
+    def __init__(self, logs_path: str):
+        self.logs_path = logs_path
+        self.messages = queue.SimpleQueue()
+        self.thread = threading.Thread(
+            target=self._run, name="logs-writer", daemon=True
+        )
+        self.thread.start()
+
+    def write(self, text: str) -> None:
+        self.messages.put(text)
+
+    def close(self) -> None:
+        self.messages.put(None)
+        self.thread.join()
+
+    ############################################################################
+
+    # Internals
+
+    def _run(self) -> None:
+        compressed = self._rotate()
+        with open(self.logs_path, "w", buffering=2**16) as file:
+            while True:
+                text = self.messages.get()
+                if text is not None:
+                    file.write(text)
+                if text is None or self.messages.empty():
+                    # everything that is known is written
+                    file.flush()
+                    if compressed is not None:
+                        self._compress(compressed)
+                        compressed = None
+                if text is None:
+                    return
+
+    def _rotate(self) -> str | None:
+        # returns log of previous run renamed to be compressed, compression
+        # waits for the first messages of this run
+        if not os.path.exists(self.logs_path):
+            return None
+        previous = f"{self.logs_path}.1"
+        if os.path.exists(previous):
+            # run before previous one ended before its log was compressed
+            self._shift()
+            self._compress(previous)
+        self._shift()
+        os.replace(self.logs_path, previous)
+        return previous
+
+    def _shift(self) -> None:
+        # frees .logs.1.gz, the oldest log is replaced
+        for i in range(kept_logs - 1, 0, -1):
+            path = f"{self.logs_path}.{i}.gz"
+            if os.path.exists(path):
+                os.replace(path, f"{self.logs_path}.{i + 1}.gz")
+
+    def _compress(self, path: str) -> None:
+        with open(path, "rb") as src, gzip.open(f"{path}.gz", "wb") as trg:
+            shutil.copyfileobj(src, trg)
+        os.remove(path)
+
+    # member fields
+    logs_path: str
+    messages: queue.SimpleQueue
+    thread: threading.Thread
+
+
+_writer = None
+_is_release = True
+# messages of different threads are not mixed, in console and in file they go
+# in the same order
+_lock = threading.Lock()
+
+
+def _level() -> int:
+    # the same for console and file
+    return USER if _is_release else DEV
+
+
+def _log(
+    level: int, prefix: str, color: str, msg: Message, flush: bool
+) -> None:
+    if not enabled(level):
+        return
+    if callable(msg):
+        msg = msg()
+    if len(msg) == 0:
+        msg = "LOG WITH EMPTY MESSAGE"
+    # next lines are aligned with the first one
+    msg = msg.replace("\n", "\n" + " " * (len(prefix) + 1))
+    text = f"{prefix} {msg}\n"
+    if len(color) != 0:
+        prefix = f"{color}{prefix}{_FontColor.RESET}"
+    with _lock:
+        if _writer is not None:
+            _writer.write(text)
+        # one write of the whole line
+        sys.stdout.write(f"{prefix} {msg}\n")
+        if flush:
+            sys.stdout.flush()
+
 
-_logs_file: None
-_is_release: bool
+################################################################################
+
+# API
 
 
 def init(logs_path: str, is_release: bool):
-    global _logs_file, _is_release
-    _logs_file = open(logs_path, "w")
+    global _writer, _is_release
     _is_release = is_release
+    _writer = _FileWriter(logs_path)
+    atexit.register(close)
 
 
-def user(msg: str, flush: bool = False):
-    if len(msg) == 0:
-        msg = "USER_LOG WITH EMPTY MESSAGE"
-    splitted = msg.split("\n")
+def init_worker(is_release: bool):
+    # worker processes write logs only to console
+    global _writer, _is_release
+    _writer = None
+    _is_release = is_release
 
-    # log
-    if _logs_file is not None:
-        _logs_file.write(f"[log] {splitted[0]}\n")
-        for line in splitted[1:]:
-            _logs_file.write(f"      {line}\n")
 
-    # console
-    fmt1 = lambda ln: f"[log] {ln}"
-    fmt2 = lambda ln: f"      {ln}"
-    print(fmt1(splitted[0]), flush=flush)
-    for line in splitted[1:]:
-        print(fmt2(line), flush=flush)
+def close():
+    # waits until all messages are written
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
 
 
-def dev(msg: str, flush: bool = True):
-    if len(msg) == 0:
-        msg = "DEV_LOG WITH EMPTY MESSAGE"
-    splitted = msg.split("\n")
+def is_release() -> bool:
+    return _is_release
 
-    # log
-    if _logs_file is not None:
-        _logs_file.write(f"[dev] {splitted[0]}\n")
-        for line in splitted[1:]:
-            _logs_file.write(f"      {line}\n")
 
-    # console
-    if not _is_release:
-        fmt1 = lambda ln: f"{_FontColor.MAGENTA}[dev]{_FontColor.RESET} {ln}"
-        fmt2 = lambda ln: f"      {ln}"
-        print(fmt1(splitted[0]), flush=flush)
-        for line in splitted[1:]:
-            print(fmt2(line), flush=flush)
+def enabled(level: int) -> bool:
+    return level >= _level()
 
 
-def warning(msg: str, flush: bool = True):
-    if len(msg) == 0:
-        msg = "WARNING WITH EMPTY MESSAGE"
-    splitted = msg.split("\n")
-
-    # log
-    if _logs_file is not None:
-        _logs_file.write(f"[warning] {splitted[0]}\n")
-        for line in splitted[1:]:
-            _logs_file.write(f"          {line}\n")
-
-    # console
-    fmt1 = lambda ln: f"{_FontColor.YELLOW}[warning]{_FontColor.RESET} {ln}"
-    fmt2 = lambda ln: f"          {ln}"
-    print(fmt1(splitted[0]), flush=flush)
-    for line in splitted[1:]:
-        print(fmt2(line), flush=flush)
-
-
-def error(msg: str, flush: bool = True):
-    text = f"{_FontColor.RED}{msg}{_FontColor.RESET}"
-    if _logs_file is not None:
-        _logs_file.write(text)
-    print(text, flush=flush)
+def user(msg: Message, flush: bool = False):
+    _log(USER, "[log]", "", msg, flush)
+
+
+def dev(msg: Message, flush: bool = False):
+    _log(DEV, "[dev]", _FontColor.MAGENTA, msg, flush)
+
+
+def warning(msg: Message, flush: bool = True):
+    _log(WARNING, "[warning]", _FontColor.YELLOW, msg, flush)
+
+
+def error(msg: Message, flush: bool = True):
+    _log(ERROR, "[error]", _FontColor.RED, msg, flush)
@@ -0,0 +1,144 @@
+from contextlib import contextmanager
+import io
+import json
+import math
+import threading
+import time
+from typing import Iterable, Iterator
+
+################################################################################
+
+# Variables
+
+stages = ["rasterize", "ocr", "translate", "render", "write"]
+percentiles = [50, 90, 99]
+
+################################################################################
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    # nearest-rank method, values are sorted
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    return values[rank - 1]
+
+
+################################################################################
+
+
+# Per page durations of stages and counters, written as json lines when page
+# is finished. Stages of different pages could be measured from different
+# threads.
+class Metrics:
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.finished = []
+        self.start_time = time.perf_counter()
+
+    @contextmanager
+    def timer(self, ind: int, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(ind, stage, time.perf_counter() - start)
+
+    def timed(self, pages: Iterable, stage: str) -> Iterator:
+        # time of getting every (ind, ...) item of iterator
+        iterator = iter(pages)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                self.add_time(item[0], stage, time.perf_counter() - start)
+                yield item
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    def add_time(self, ind: int, stage: str, seconds: float) -> None:
+        with self.lock:
+            durations = self._page(ind)["durations"]
+            durations[stage] = durations.get(stage, 0.0) + seconds
+
+    def count(self, ind: int, counter: str, value: int = 1) -> None:
+        with self.lock:
+            page = self._page(ind)
+            page[counter] = page.get(counter, 0) + value
+
+    def finish_page(self, ind: int, **fields) -> None:
+        with self.lock:
+            page = self.pages.pop(ind, None) or self._new_page(ind)
+            page.update(fields)
+            self.finished.append(page)
+            self.file.write(json.dumps(page) + "\n")
+            self.file.flush()
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.start_time
+        count = len(self.finished)
+        lines = [
+            f"{count} pages in {elapsed:.1f} sec, "
+            f"{count / elapsed if elapsed > 0 else 0:.2f} pages/sec"
+        ]
+        names = [f"p{percent}" for percent in percentiles]
+        lines.append(
+            f"{'stage':<10} {'total':>9} "
+            + " ".join(f"{name:>8}" for name in names)
+            + f" {'max':>8}"
+        )
+        for stage in stages:
+            values = sorted(
+                page["durations"][stage]
+                for page in self.finished
+                if stage in page["durations"]
+            )
+            if len(values) == 0:
+                continue
+            lines.append(
+                f"{stage:<10} {sum(values):9.2f} "
+                + " ".join(
+                    f"{_percentile(values, percent):8.3f}"
+                    for percent in percentiles
+                )
+                + f" {values[-1]:8.3f}"
+            )
+        counters = {}
+        for page in self.finished:
+            for key, value in page.items():
+                if key not in ["page", "durations"] and type(value) is int:
+                    counters[key] = counters.get(key, 0) + value
+        if len(counters) != 0:
+            lines.append(
+                ", ".join(f"{key}: {value}" for key, value in counters.items())
+            )
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        self.file.close()
+
+    ############################################################################
+
+    # Internals
+
+    def _page(self, ind: int) -> dict:
+        if ind not in self.pages:
+            self.pages[ind] = self._new_page(ind)
+        return self.pages[ind]
+
+    @staticmethod
+    def _new_page(ind: int) -> dict:
+        return {"page": ind + 1, "durations": {}}
+
+    # member fields
+    path: str
+    file: io.TextIOWrapper
+    lock: threading.Lock
+    pages: dict[int, dict]  # unfinished pages
+    finished: list[dict]
+    start_time: float
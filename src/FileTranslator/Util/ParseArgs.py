@@ -1,5 +1,8 @@
 import argparse
 
+from FileTranslator.Converters.RasterProfile import colors
+from FileTranslator.Converters.RasterProfile import formats
+from FileTranslator.Converters.RasterProfile import raster_profiles
 import FileTranslator.Util.Logs as Logs
 from FileTranslator.Util.PathInfo import PathInfo
 from FileTranslator.Util.TranslateInfo import TranslateInfo
@@ -80,7 +83,155 @@ def parse_args(path_info: PathInfo, translate_info: TranslateInfo) -> None:
         default="",
         help="absolute or relative path to translated file",
     )
-    # TODO: choose ocr and translator
+    parser.add_argument(
+        "-p",
+        "--pipeline",
+        required=False,
+        action="store_true",
+        help="recognize, translate and render different pages concurrently",
+    )
+    parser.add_argument(
+        "--ocr-workers",
+        required=False,
+        type=int,
+        default=1,
+        help="number of processes recognizing pages in parallel",
+    )
+    parser.add_argument(
+        "-r",
+        "--resume",
+        required=False,
+        action="store_true",
+        help="reuse pages translated by previous interrupted run",
+    )
+    parser.add_argument(
+        "-w",
+        "--work-dir",
+        required=False,
+        type=str,
+        default="",
+        help="directory where translated pages are saved to resume later",
+    )
+    parser.add_argument(
+        "--translation-cache",
+        required=False,
+        type=int,
+        default=256,
+        help="max size of translation cache in megabytes, 0 disables it",
+    )
+    parser.add_argument(
+        "--ocr-cache",
+        required=False,
+        type=int,
+        default=512,
+        help="max size of ocr results cache in megabytes, 0 disables it",
+    )
+    parser.add_argument(
+        "--fast-render",
+        required=False,
+        action="store_true",
+        help="draw translated lines without stretching them to source lines",
+    )
+    parser.add_argument(
+        "--output-mode",
+        required=False,
+        type=str,
+        choices=["raster", "vector"],
+        default="raster",
+        help="put translated text into page images or as selectable text",
+    )
+    parser.add_argument(
+        "--translator",
+        required=False,
+        type=str,
+        choices=["yandex", "libre", "echo", "replay"],
+        default="yandex",
+        help="translation backend",
+    )
+    parser.add_argument(
+        "--translator-url",
+        required=False,
+        type=str,
+        default="http://localhost:5000",
+        help="url of translation server with LibreTranslate api",
+    )
+    parser.add_argument(
+        "--translator-workers",
+        required=False,
+        type=int,
+        default=4,
+        help="max number of concurrent requests to translation server",
+    )
+    parser.add_argument(
+        "--translations-file",
+        required=False,
+        type=str,
+        default="",
+        help="file, where translations are recorded to, "
+        "'replay' translator reads them from it",
+    )
+    parser.add_argument(
+        "--pages-in-flight",
+        required=False,
+        type=int,
+        default=1,
+        help="number of pages translated concurrently, implies --pipeline",
+    )
+    parser.add_argument(
+        "--raster-profile",
+        required=False,
+        type=str,
+        choices=list(raster_profiles.keys()),
+        default="color",
+        help="rasterization of pages, options below override its settings",
+    )
+    parser.add_argument(
+        "--dpi",
+        required=False,
+        type=int,
+        help="resolution of page images",
+    )
+    parser.add_argument(
+        "--raster-color",
+        required=False,
+        type=str,
+        choices=colors,
+        help="colors of page images",
+    )
+    parser.add_argument(
+        "--raster-threads",
+        required=False,
+        type=int,
+        help="number of pdftoppm processes rasterizing pages",
+    )
+    parser.add_argument(
+        "--raster-format",
+        required=False,
+        type=str,
+        choices=formats,
+        help="format in which pdftoppm passes page images",
+    )
+    parser.add_argument(
+        "--no-text-layer",
+        required=False,
+        action="store_true",
+        help="recognize all pages by ocr, even if pdf contains their text",
+    )
+    parser.add_argument(
+        "--skip-picture-pages",
+        required=False,
+        action="store_true",
+        help="don't recognize and translate pages that look blank or contain "
+        "only pictures (experimental)",
+    )
+    parser.add_argument(
+        "--translate-running-lines",
+        required=False,
+        action="store_true",
+        help="translate running headers, footers and page numbers on every "
+        "page with its text",
+    )
+    # TODO: choose ocr
     args = parser.parse_args()
 
     # source_path, extension
@@ -96,8 +247,45 @@ def parse_args(path_info: PathInfo, translate_info: TranslateInfo) -> None:
     translate_info.set_font(path_info.fonts_dir, args.font)
     # save_context
     translate_info.save_context = args.save_context
+    # pipeline
+    translate_info.use_pipeline = args.pipeline
+    # ocr_workers
+    translate_info.set_ocr_workers(args.ocr_workers)
     # target_path
     path_info.set_target_file_info(
         args.target_path, args.desired_language, args.extension, translate_info
     )
+    # work_dir, resume
+    path_info.set_work_dir(args.work_dir)
+    translate_info.resume = args.resume
+    # translation_cache
+    translate_info.translation_cache_size = args.translation_cache * 2**20
+    # ocr_cache
+    translate_info.ocr_cache_size = args.ocr_cache * 2**20
+    # fast_render
+    translate_info.fast_render = args.fast_render
+    # output_mode
+    translate_info.output_mode = args.output_mode
+    # translations_file
+    path_info.set_translations_path(args.translations_file)
+    # pages_in_flight
+    translate_info.set_pages_in_flight(args.pages_in_flight)
+    # translator, translator_url, translator_workers
+    translate_info.set_translator(
+        args.translator, args.translator_url, args.translator_workers
+    )
+    # raster_profile, dpi, raster_color, raster_threads, raster_format
+    translate_info.set_raster_profile(
+        args.raster_profile,
+        args.dpi,
+        args.raster_color,
+        args.raster_threads,
+        args.raster_format,
+    )
+    # no_text_layer
+    translate_info.use_text_layer = not args.no_text_layer
+    # skip_picture_pages
+    translate_info.classify_pages = args.skip_picture_pages
+    # translate_running_lines
+    translate_info.find_running_lines = not args.translate_running_lines
     Logs.user("Parsing arguments finished")
@@ -42,6 +42,14 @@ class PathInfo:
         self.source_extension = self.target_extension = ""
         self.logs_path = os.path.join(self.package_dir, ".logs")
         self.is_release_path = os.path.join(self.package_dir, ".is_release")
+        self.cache_dir = os.path.join(
+            os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+            "FileTranslator",
+        )
+        self.translation_cache_path = os.path.join(
+            self.cache_dir, "translations.sqlite3"
+        )
+        self.ocr_cache_path = os.path.join(self.cache_dir, "ocr.sqlite3")
 
     def set_source_file_info(self, path: str, extension: str | None):
         self.source_file_path = os.path.abspath(path)
@@ -94,6 +102,17 @@ class PathInfo:
         else:
             self.target_file_path = os.path.abspath(path)
         self.target_extension = extension
+        self.metrics_path = f"{self.target_file_path}.metrics.jsonl"
+
+    def set_work_dir(self, path: str):
+        if len(path) == 0:
+            # Path was not specified in arguments
+            self.work_dir = f"{self.target_file_path}.work"
+        else:
+            self.work_dir = os.path.abspath(path)
+
+    def set_translations_path(self, path: str):
+        self.translations_path = "" if len(path) == 0 else os.path.abspath(path)
 
     def get_image_path(self, i: int, translated: bool):
         if translated:
@@ -112,12 +131,18 @@ class PathInfo:
     tmp_dir: str
     logs_path: str
     is_release_path: str
+    cache_dir: str
+    translation_cache_path: str
+    ocr_cache_path: str
 
     # set by program args
     source_file_path: str
     source_extension: str
     target_file_path: str
     target_extension: str
+    metrics_path: str  # stage metrics of translated pages
+    work_dir: str
+    translations_path: str  # recorded translations, empty if not specified
 
 
 ################################################################################
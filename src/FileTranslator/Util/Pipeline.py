@@ -0,0 +1,154 @@
+import queue
+import threading
+import traceback
+from typing import Any, Callable, Iterable, Iterator
+
+################################################################################
+
+# Variables
+
+default_queue_size = 2
+poll_interval = 0.1  # how often blocked threads check for stop
+
+################################################################################
+
+
+class _End:
+    pass
+
+
+class _Failure:
+    def __init__(self, item: Any, stage: str, error: BaseException):
+        self.item = item
+        self.stage = stage
+        self.error = error
+        self.trace = traceback.format_exc()
+
+
+################################################################################
+
+
+# Runs every stage in its own thread, stages are connected with bounded queues.
+# Each stage handles items one by one, so order of items is preserved. Source
+# is consumed in a separate thread too.
+class Pipeline:
+    # Exceptions
+    class StageFailed(Exception):
+        def __init__(self, item: Any, stage: str, trace: str):
+            super().__init__(f"Pipeline stage '{stage}' failed:\n{trace}")
+            self.item = item
+            self.stage = stage
+            self.trace = trace
+
+    # API
+    def __init__(
+        self,
+        source: Iterable,
+        stages: list[tuple[str, Callable[[Any], Any]]],
+        queue_size: int = default_queue_size,
+    ):
+        self.stop_event = threading.Event()
+        self.queues = [queue.Queue(queue_size) for _ in range(len(stages) + 1)]
+        self.threads = [
+            threading.Thread(
+                target=self._feed,
+                args=(source, self.queues[0]),
+                name="pipeline-source",
+                daemon=True,
+            )
+        ]
+        for i, (name, func) in enumerate(stages):
+            self.threads.append(
+                threading.Thread(
+                    target=self._run_stage,
+                    args=(name, func, self.queues[i], self.queues[i + 1]),
+                    name=f"pipeline-{name}",
+                    daemon=True,
+                )
+            )
+        for thread in self.threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            item = self._get(self.queues[-1])
+            if item is None or isinstance(item, _End):
+                return
+            if isinstance(item, _Failure):
+                raise Pipeline.StageFailed(item.item, item.stage, item.trace)
+            yield item
+
+    def close(self) -> None:
+        # threads busy with an item finish it and exit
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+
+    ############################################################################
+
+    # Internals
+
+    def _get(self, inbound: queue.Queue) -> Any | None:
+        while not self.stop_event.is_set():
+            try:
+                return inbound.get(timeout=poll_interval)
+            except queue.Empty:
+                continue
+        return None
+
+    def _put(self, outbound: queue.Queue, item: Any) -> bool:
+        while not self.stop_event.is_set():
+            try:
+                outbound.put(item, timeout=poll_interval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed(self, source: Iterable, outbound: queue.Queue) -> None:
+        iterator = iter(source)
+        try:
+            while True:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    self._put(outbound, _End())
+                    return
+                except BaseException as error:
+                    self._put(outbound, _Failure(None, "source", error))
+                    return
+                if not self._put(outbound, item):
+                    return
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    def _run_stage(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        inbound: queue.Queue,
+        outbound: queue.Queue,
+    ) -> None:
+        while True:
+            item = self._get(inbound)
+            if item is None:
+                return
+            if not isinstance(item, _End | _Failure):
+                try:
+                    item = func(item)
+                except BaseException as error:
+                    item = _Failure(item, name, error)
+            if not self._put(outbound, item) or isinstance(item, _End):
+                return
+
+    # member fields
+    stop_event: threading.Event
+    queues: list[queue.Queue]
+    threads: list[threading.Thread]
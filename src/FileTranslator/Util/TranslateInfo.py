@@ -1,8 +1,9 @@
 import os.path
 
-from PIL import Image
 from PyPDF4 import PdfFileReader
 
+from FileTranslator.Converters.RasterProfile import raster_profiles
+from FileTranslator.Converters.RasterProfile import RasterProfile
 import FileTranslator.Util.Logs as Logs
 
 ################################################################################
@@ -31,6 +32,64 @@ class TranslateInfo:
     def set_font(self, fonts_dir: str, font_file: str):
         self.font_path = os.path.join(fonts_dir, font_file)
 
+    def set_ocr_workers(self, ocr_workers: int):
+        if ocr_workers < 1:
+            Logs.error(
+                f"Incorrect number of ocr workers: {ocr_workers}. "
+                "It must be positive"
+            )
+            raise RuntimeError
+        self.ocr_workers = ocr_workers
+
+    def set_pages_in_flight(self, pages_in_flight: int):
+        if pages_in_flight < 1:
+            Logs.error(
+                f"Incorrect number of pages in flight: {pages_in_flight}. "
+                "It must be positive"
+            )
+            raise RuntimeError
+        self.pages_in_flight = pages_in_flight
+        if pages_in_flight > 1:
+            # pages are translated concurrently only in pipeline
+            self.use_pipeline = True
+
+    def set_translator(self, alias: str, url: str, workers: int):
+        if workers < 1:
+            Logs.error(
+                f"Incorrect number of translator workers: {workers}. "
+                "It must be positive"
+            )
+            raise RuntimeError
+        self.translator_alias = alias
+        self.translator_url = url
+        self.translator_workers = workers
+
+    def set_raster_profile(
+        self,
+        name: str,
+        dpi: int | None,
+        color: str | None,
+        thread_count: int | None,
+        fmt: str | None,
+    ):
+        # settings that are not specified are taken from profile `name`
+        preset = raster_profiles[name]
+        profile = RasterProfile(
+            dpi=preset.dpi if dpi is None else dpi,
+            color=preset.color if color is None else color,
+            thread_count=(
+                preset.thread_count if thread_count is None else thread_count
+            ),
+            fmt=preset.fmt if fmt is None else fmt,
+        )
+        if profile.dpi < 1 or profile.thread_count < 1:
+            Logs.error(
+                f"Incorrect rasterization: {profile.describe()}. "
+                "Dpi and number of threads must be positive"
+            )
+            raise RuntimeError
+        self.raster_profile = profile
+
     def get_page_numbers(self) -> list[int]:
         return [i for i in range(self.first_page - 1, self.last_page)]
 
@@ -80,9 +139,22 @@ class TranslateInfo:
     src_lang: str
     trg_lang: str
     images_count: int
-    images: list[Image]
     first_page: int
     last_page: int
     first_spec: bool
     last_spec: bool
     save_context: bool
+    use_pipeline: bool
+    ocr_workers: int
+    resume: bool
+    translation_cache_size: int  # in bytes, 0 if cache is disabled
+    ocr_cache_size: int  # in bytes, 0 if cache is disabled
+    fast_render: bool
+    output_mode: str  # "raster" or "vector"
+    translator_url: str  # server of "libre" translator
+    translator_workers: int  # concurrent requests to translation server
+    pages_in_flight: int  # pages with outstanding translation requests
+    raster_profile: RasterProfile
+    use_text_layer: bool  # text of born-digital pdf pages is not recognized
+    classify_pages: bool  # blank pages and pictures are not recognized
+    find_running_lines: bool  # headers, footers and page numbers
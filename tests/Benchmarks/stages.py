@@ -0,0 +1,418 @@
+# Benchmark of translation stages, translation itself excluded.
+#
+# Every stage is run on pages of examples/source_texts/*.pdf and on synthetic
+# pages, time and growth of peak resident memory of the process are reported
+# per stage.
+# Results are stored as json, --compare prints ratios to previous results,
+# e.g. of run with another --raster-profile.
+#
+# Usage (from repository root):
+#     PYTHONPATH=src python tests/Benchmarks/stages.py [--pages N]
+#         [--synthetic N] [--raster-profile NAME] [--output PATH]
+#         [--compare PATH]
+
+import argparse
+from datetime import datetime as dtm
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable
+
+from PIL import Image
+from PIL import ImageDraw
+from PyPDF4 import PdfFileReader
+
+import FileTranslator
+from FileTranslator.Converters.ImageAndPDF import iterate_pdf_pages
+from FileTranslator.Converters.ImageAndPDF import merge_images_into_pdf
+from FileTranslator.Converters.RasterProfile import default_dpi
+from FileTranslator.Converters.RasterProfile import raster_profiles
+from FileTranslator.Converters.RasterProfile import RasterProfile
+from FileTranslator.OCR.PageLayout import expand_box
+from FileTranslator.OCR.PageLayout import PageLayout
+from FileTranslator.OCR.PdfTextLayer import PdfTextLayer
+from FileTranslator.OCR.TesseractOCR import TesseractOCR
+from FileTranslator.Translator.EchoTranslator import echo_translation
+from FileTranslator.Util.FontMetrics import FontMetrics
+from FileTranslator.Util.PathInfo import PathInfo
+from FileTranslator.Util.TranslateInfo import TranslateInfo
+
+################################################################################
+
+# Variables
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+examples_glob = os.path.join(repo_dir, "examples", "source_texts", "*.pdf")
+results_dir = os.path.join(os.path.dirname(__file__), "results")
+
+# synthetic page: A4 at default dpi with lines of text of fake text file
+page_size = (1654, 2339)
+margin = 150
+font_size = 36
+line_spacing = 20
+lines_in_par = 6
+
+# resident memory is sampled by background thread with this interval
+rss_interval = 0.002
+
+################################################################################
+
+# Synthetic pages
+
+
+_dict_keys = ["level", "page_num", "block_num", "par_num", "line_num"]
+_dict_keys += ["word_num", "left", "top", "width", "height", "conf", "text"]
+
+
+def _add_entry(data: dict, ids: tuple, box: tuple, text: str = "") -> None:
+    # entry in format of pytesseract.image_to_data, ids are block, paragraph,
+    # line and word numbers, level is deduced from them
+    level = 1 + len([i for i in ids if i != 0])
+    conf = 96 if level == 5 else -1
+    values = [level, 1, *ids, *box, conf, text]
+    for key, value in zip(_dict_keys, values):
+        data[key].append(value)
+
+
+def _synthetic_page(words: list[str], font_path: str) -> (Image, dict):
+    # page with text and the result tesseract would give for it
+    image = Image.new("L", page_size, "white")
+    draw = ImageDraw.Draw(image)
+    font = FontMetrics(font_path).get_face(font_size)
+    data = {key: [] for key in _dict_keys}
+    _add_entry(data, (0, 0, 0, 0), (0, 0, *page_size))
+    _add_entry(data, (1, 0, 0, 0), (0, 0, *page_size))
+
+    space = font.getlength(" ")
+    y = margin
+    par = line = 0
+    words = iter(words)
+    while y + font_size < page_size[1] - margin:
+        if line % lines_in_par == 0:
+            par += 1
+            line = 0
+            y += font_size  # empty line between paragraphs
+            _add_entry(data, (1, par, 0, 0), (margin, y, 0, 0))
+        line += 1
+        _add_entry(data, (1, par, line, 0), (margin, y, 0, font_size))
+        x = margin
+        word_num = 0
+        for word in words:
+            width = font.getlength(word)
+            if x + width > page_size[0] - margin:
+                break
+            word_num += 1
+            draw.text((x, y), word, font=font, fill=0)
+            box = (int(x), y, int(width), font_size)
+            _add_entry(data, (1, par, line, word_num), box, word)
+            x += width + space
+        y += font_size + line_spacing
+    image.info["dpi"] = (default_dpi, default_dpi)
+    return image, data
+
+
+################################################################################
+
+# Measurement
+
+
+def _rss() -> int:
+    # resident set size of process in bytes, pixel data of PIL included
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # no procfs (e.g. macOS): peak of the whole run instead of current size
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Keeps the largest resident memory of process seen while it is running.
+class _RssSampler:
+    def __init__(self):
+        self.peak = _rss()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> int:
+        self.stopped.set()
+        self.thread.join()
+        self.peak = max(self.peak, _rss())
+        return self.peak
+
+    def _run(self) -> None:
+        while not self.stopped.wait(rss_interval):
+            self.peak = max(self.peak, _rss())
+
+    # member fields
+    peak: int
+    stopped: threading.Event
+    thread: threading.Thread
+
+
+def _measure(func: Callable[[], Any]) -> (dict, Any):
+    # memory is growth of resident memory over its size before the stage,
+    # memory of child processes (e.g. pdftoppm) is not included
+    before = _rss()
+    sampler = _RssSampler()
+    try:
+        start = time.perf_counter()
+        res = func()
+        elapsed = time.perf_counter() - start
+    finally:
+        peak = sampler.stop()
+    return {"time": elapsed, "peak_rss": peak - before}, res
+
+
+def _skipped(error: Exception) -> dict:
+    return {"skipped": f"{type(error).__name__}: {error}".split("\n")[0]}
+
+
+def _make_ocr(font_path: str, src_lang: str) -> TesseractOCR:
+    translate_info = TranslateInfo()
+    translate_info.set_languages(src_lang, "ru")
+    translate_info.font_path = font_path
+    translate_info.fast_render = False
+    translate_info.ocr_workers = 1
+    translate_info.ocr_cache_size = 0  # recognition must be measured
+    ocr = TesseractOCR()
+    ocr.init(PathInfo(FileTranslator.__file__), translate_info)
+    return ocr
+
+
+def _bench_source(
+    images: list[Image], dicts: list[dict] | None, ocr: TesseractOCR
+) -> dict:
+    # stages after rasterization, `dicts` are recognized by ocr if None
+    stages = {}
+
+    # ocr
+    if dicts is None:
+        try:
+            stages["ocr"], layouts = _measure(
+                lambda: [ocr.recognize(image) for image in images]
+            )
+            dicts = [layout.src_dict for layout in layouts]
+        except Exception as error:
+            stages["ocr"] = _skipped(error)
+            return stages
+
+    # text and lines from recognized words
+    layouts = [PageLayout(image) for image in images]
+    for layout, src_dict in zip(layouts, dicts):
+        layout.src_dict = src_dict
+
+    def dict_to_text():
+        for layout in layouts:
+            ocr._dict_to_text(layout)
+
+    stages["dict_to_text"], _ = _measure(dict_to_text)
+
+    # font size of every line
+    lines = [
+        [line for par in layout.pars_info for line in par] for layout in layouts
+    ]
+    lines = [
+        echo_translation("\n".join(page), "ru").split("\n") for page in lines
+    ]
+
+    def fit_font():
+        ocr.font_metrics.faces.clear()
+        for layout, page_lines in zip(layouts, lines):
+            for box, line in zip(layout.boxes, page_lines):
+                ocr.font_metrics.fit_size(line, expand_box(box)[2])
+
+    stages["fit_font"], _ = _measure(fit_font)
+
+    # translated lines on page
+    stages["render"], rendered = _measure(
+        lambda: [
+            ocr.lines_to_image(layout, page_lines)
+            for layout, page_lines in zip(layouts, lines)
+        ]
+    )
+
+    # pdf of rendered pages
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "merged.pdf")
+        stages["merge"], _ = _measure(
+            lambda: merge_images_into_pdf(rendered, pdf_path)
+        )
+        stages["merge"]["file_size"] = os.path.getsize(pdf_path)
+    return stages
+
+
+def _bench_pdf(
+    pdf_path: str, pages: int, ocr: TesseractOCR, profile: RasterProfile
+) -> dict:
+    count = min(pages, PdfFileReader(open(pdf_path, "rb")).numPages)
+    result = {"source": os.path.basename(pdf_path), "pages": count}
+    stages = {}
+
+    # text layer replaces ocr of born-digital pages, it doesn't need pixels
+    def text_layer():
+        layer = PdfTextLayer(pdf_path)
+        image = Image.new("1", page_size)
+        layouts = [layer.layout(i, image) for i in range(count)]
+        layer.close()
+        return layouts
+
+    stages["text_layer"], layouts = _measure(text_layer)
+    stages["text_layer"]["extracted_pages"] = sum(
+        layout is not None for layout in layouts
+    )
+    # all requested pages are rasterized by lazy iterator, which replaced
+    # split_pdf_into_images
+    try:
+        stages["rasterize"], images = _measure(
+            lambda: [
+                image
+                for _, image in iterate_pdf_pages(
+                    pdf_path, list(range(count)), profile=profile
+                )
+            ]
+        )
+    except Exception as error:
+        stages["rasterize"] = _skipped(error)
+        result["stages"] = stages
+        return result
+    stages.update(_bench_source(images, None, ocr))
+    result["stages"] = stages
+    return result
+
+
+def _bench_synthetic(pages: int, font_path: str, ocr: TesseractOCR) -> dict:
+    with open(PathInfo(FileTranslator.__file__).fake_text_path) as file:
+        words = file.read().split()
+    random.seed(0)
+    page_words = [random.choices(words, k=2000) for _ in range(pages)]
+    stages = {}
+    stages["generate"], generated = _measure(
+        lambda: [_synthetic_page(words, font_path) for words in page_words]
+    )
+    images = [image for image, _ in generated]
+    dicts = [src_dict for _, src_dict in generated]
+    stages.update(_bench_source(images, dicts, ocr))
+    # recognition of synthetic pages is measured, but its result is not used:
+    # the rest of stages must not depend on presence of tesseract
+    try:
+        stages["ocr"], _ = _measure(
+            lambda: [ocr.recognize(image) for image in images]
+        )
+    except Exception as error:
+        stages["ocr"] = _skipped(error)
+    return {"source": "synthetic", "pages": pages, "stages": stages}
+
+
+################################################################################
+
+# Report
+
+
+def _meta(profile: RasterProfile) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=repo_dir,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "date": dtm.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "raster_profile": profile.describe(),
+    }
+
+
+def _print_results(results: list[dict], baseline: dict | None) -> None:
+    # baseline: (source, stage) -> time per page
+    for result in results:
+        print(f"{result['source']} ({result['pages']} pages)")
+        for stage, values in result["stages"].items():
+            if "skipped" in values:
+                print(f"    {stage:<14} skipped: {values['skipped']}")
+                continue
+            line = (
+                f"    {stage:<14} {values['time']:9.3f} s "
+                f"{values['peak_rss'] / 2**20:9.1f} MB"
+            )
+            old = (
+                None
+                if baseline is None
+                else baseline.get((result["source"], stage))
+            )
+            if old:
+                per_page = values["time"] / result["pages"]
+                line += f"    x{per_page / old:.2f} of baseline"
+            print(line)
+
+
+def _load_baseline(path: str) -> dict:
+    with open(path) as file:
+        data = json.load(file)
+    return {
+        (result["source"], stage): values["time"] / result["pages"]
+        for result in data["results"]
+        for stage, values in result["stages"].items()
+        if "time" in values
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of stages")
+    parser.add_argument("--pages", type=int, default=2, help="pages per pdf")
+    parser.add_argument("--synthetic", type=int, default=4, help="pages")
+    parser.add_argument("--font", type=str, default="arial.ttf")
+    parser.add_argument(
+        "--raster-profile",
+        type=str,
+        choices=list(raster_profiles.keys()),
+        default="color",
+        help="rasterization of example pdfs",
+    )
+    parser.add_argument("--output", type=str, default="")
+    parser.add_argument("--compare", type=str, default="")
+    args = parser.parse_args()
+
+    path_info = PathInfo(FileTranslator.__file__)
+    font_path = os.path.join(path_info.fonts_dir, args.font)
+    profile = raster_profiles[args.raster_profile]
+    results = []
+    for pdf_path in sorted(glob.glob(examples_glob)):
+        # fragments are named by their language
+        src_lang = "ru" if "Russian" in pdf_path else "en"
+        ocr = _make_ocr(font_path, src_lang)
+        results.append(_bench_pdf(pdf_path, args.pages, ocr, profile))
+    if args.synthetic > 0:
+        ocr = _make_ocr(font_path, "en")
+        results.append(_bench_synthetic(args.synthetic, font_path, ocr))
+
+    baseline = None if len(args.compare) == 0 else _load_baseline(args.compare)
+    _print_results(results, baseline)
+
+    output = args.output
+    if len(output) == 0:
+        os.makedirs(results_dir, exist_ok=True)
+        name = dtm.now().strftime("%Y%m%d-%H%M%S") + ".json"
+        output = os.path.join(results_dir, name)
+    with open(output, "w") as file:
+        json.dump({"meta": _meta(profile), "results": results}, file, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
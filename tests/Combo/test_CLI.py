@@ -0,0 +1,258 @@
+import builtins
+import json
+import os
+import shutil
+import sys
+
+from PIL import Image
+from PIL import ImageDraw
+from PyPDF4 import PdfFileReader
+from PyPDF4 import PdfFileWriter
+import pytest
+
+import FileTranslator.CLI
+from FileTranslator.CLI import CLI
+from FileTranslator.Converters.ImageAndPDF import iterate_pdf_pages
+from FileTranslator.OCR.PageLayout import PageLayout
+from FileTranslator.OCR.TesseractOCR import TesseractOCR
+import FileTranslator.Util.Logs as Logs
+
+################################################################################
+
+examples_dir = os.path.join(
+    os.path.dirname(__file__), "..", "..", "examples", "source_texts"
+)
+english_path = os.path.join(
+    examples_dir, "InSearchOfLostTimeEnglishFragment.pdf"
+)
+russian_path = os.path.join(examples_dir, "RobinsonCrusoeRussianFragment.pdf")
+pages_count = 6
+
+
+def _blank_pages(pdf_path, page_numbers, look_ahead=1, profile=None):
+    # white pages of the same size, text is taken from text layer anyway
+    reader = PdfFileReader(pdf_path)
+    for ind in page_numbers:
+        box = reader.getPage(ind).mediaBox
+        size = [round(float(side) * profile.dpi / 72) for side in box[2:]]
+        mode = "RGB" if profile.color == "color" else "L"
+        yield ind, profile.finish_image(Image.new(mode, size, "white"))
+
+
+@pytest.fixture(autouse=True)
+def environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    # logs of the tests don't replace logs of real runs
+    init = Logs.init
+    monkeypatch.setattr(
+        Logs,
+        "init",
+        lambda path, is_release: init(str(tmp_path / ".logs"), is_release),
+    )
+    if shutil.which("pdftoppm") is None:
+        monkeypatch.setattr(
+            FileTranslator.CLI, "iterate_pdf_pages", _blank_pages
+        )
+    else:
+        monkeypatch.setattr(
+            FileTranslator.CLI, "iterate_pdf_pages", iterate_pdf_pages
+        )
+    yield
+    Logs.close()
+
+
+def _run(monkeypatch, source_path: str, *args: str) -> None:
+    # tesseract isn't needed, text of example pages is in their text layer
+    argv = ["FileTranslator", "-s", source_path, *args]
+    monkeypatch.setattr(sys, "argv", argv)
+    CLI().start()
+    Logs.close()
+
+
+def _translated_pages(path) -> int:
+    with open(path, "rb") as file:
+        return PdfFileReader(file).getNumPages()
+
+
+def _recorded(path) -> dict[str, str]:
+    with open(path, encoding="utf-8") as file:
+        return {
+            record["src"]: record["trg"] for record in map(json.loads, file)
+        }
+
+
+################################################################################
+
+
+def test_echo_translation(tmp_path, monkeypatch):
+    target_path = tmp_path / "out.pdf"
+    work_dir = tmp_path / "work"
+    _run(
+        monkeypatch,
+        english_path,
+        "-c",
+        "en",
+        "-d",
+        "ru",
+        "-t",
+        str(target_path),
+        "-w",
+        str(work_dir),
+        "--translator",
+        "echo",
+    )
+    assert _translated_pages(target_path) == pages_count
+    with open(f"{target_path}.metrics.jsonl") as file:
+        metrics = [json.loads(line) for line in file]
+    # pages are numbered from 1 like in logs
+    assert sorted(record["page"] for record in metrics) == list(
+        range(1, pages_count + 1)
+    )
+    # journal is removed after all pages are translated
+    assert not work_dir.exists()
+
+
+def test_libre_translation_in_pipeline(tmp_path, monkeypatch, stub_server):
+    target_path = tmp_path / "out.pdf"
+    translations_path = tmp_path / "translations.jsonl"
+    _run(
+        monkeypatch,
+        english_path,
+        "-c",
+        "en",
+        "-d",
+        "ru",
+        "-t",
+        str(target_path),
+        "-p",
+        "--pages-in-flight",
+        "3",
+        "--translator",
+        "libre",
+        "--translator-url",
+        stub_server.url,
+        "--translations-file",
+        str(translations_path),
+    )
+    assert _translated_pages(target_path) == pages_count
+    recorded = _recorded(translations_path)
+    assert len(recorded) > 0
+    assert all(trg.startswith("[ru] ") for trg in recorded.values())
+
+
+def test_resume_after_failure(tmp_path, monkeypatch, stub_server):
+    target_path = tmp_path / "out.pdf"
+    args = ["-c", "ru", "-d", "en", "-t", str(target_path)]
+    # local translators aren't recorded
+    record = ["--translator", "libre", "--translator-url", stub_server.url]
+    record += ["--translations-file"]
+    full_path = tmp_path / "full.jsonl"
+    partial_path = tmp_path / "partial.jsonl"
+    replay = ["--translator", "replay", "--translations-file"]
+
+    # translations of all pages and of first three pages only
+    _run(monkeypatch, russian_path, *args, *record, str(full_path))
+    _run(
+        monkeypatch,
+        russian_path,
+        *args,
+        "-l",
+        "3",
+        *record,
+        str(partial_path),
+    )
+    assert len(_recorded(partial_path)) < len(_recorded(full_path))
+
+    # translation fails at page 4, user finishes it
+    monkeypatch.setattr(builtins, "input", lambda: "f")
+    _run(monkeypatch, russian_path, *args, *replay, str(partial_path))
+    work_dir = f"{target_path}.work"
+    assert os.path.exists(work_dir)
+
+    # context of page 3 is restored, so page 4 has the same requests
+    _run(monkeypatch, russian_path, *args, "-r", *replay, str(full_path))
+    assert _translated_pages(target_path) == pages_count
+    assert not os.path.exists(work_dir)
+
+
+def test_resume_with_other_settings(tmp_path, monkeypatch, stub_server):
+    target_path = tmp_path / "out.pdf"
+    args = ["-c", "ru", "-d", "en", "-t", str(target_path)]
+    partial_path = tmp_path / "partial.jsonl"
+    record = ["--translator", "libre", "--translator-url", stub_server.url]
+    replay = ["--translator", "replay", "--translations-file"]
+    _run(
+        monkeypatch,
+        russian_path,
+        *args,
+        "-l",
+        "3",
+        *record,
+        "--translations-file",
+        str(partial_path),
+    )
+    monkeypatch.setattr(builtins, "input", lambda: "f")
+    _run(monkeypatch, russian_path, *args, *replay, str(partial_path))
+
+    # pages of previous run were rendered differently, they are translated
+    # again
+    _run(
+        monkeypatch,
+        russian_path,
+        *args,
+        "-r",
+        "--fast-render",
+        *replay,
+        str(partial_path),
+    )
+    with open(f"{target_path}.metrics.jsonl") as file:
+        pages = [json.loads(line)["page"] for line in file]
+    assert sorted(pages) == [1, 2, 3]
+
+
+def test_failure_before_translation(tmp_path, monkeypatch):
+    def failing_ocr(path_info, translate_info):
+        raise RuntimeError("no ocr")
+
+    monkeypatch.setattr(FileTranslator.CLI, "get_ocr", failing_ocr)
+    # progress is saved, though there is no translated page
+    monkeypatch.setattr(builtins, "input", lambda: "y")
+    target_path = tmp_path / "out.pdf"
+    _run(
+        monkeypatch,
+        english_path,
+        "-c",
+        "en",
+        "-d",
+        "ru",
+        "-t",
+        str(target_path),
+    )
+    assert os.path.exists(f"{target_path}.work")
+
+
+def test_page_without_text_layer_is_recognized(tmp_path, monkeypatch):
+    # the first page of example and a scan of text
+    scan_path = str(tmp_path / "scan.pdf")
+    scan = Image.new("L", (850, 1100), 255)
+    ImageDraw.Draw(scan).text((100, 100), "Scanned text", fill=0)
+    scan.save(scan_path, resolution=100)
+    writer = PdfFileWriter()
+    writer.addPage(PdfFileReader(english_path).getPage(0))
+    writer.addPage(PdfFileReader(scan_path).getPage(0))
+    source_path = str(tmp_path / "mixed.pdf")
+    with open(source_path, "wb") as file:
+        writer.write(file)
+
+    recognized = []
+
+    def recognize(ocr, image):
+        recognized.append(image.size)
+        return PageLayout(image)
+
+    monkeypatch.setattr(TesseractOCR, "recognize", recognize)
+    target_path = tmp_path / "out.pdf"
+    args = ["-c", "en", "-d", "ru", "-t", str(target_path)]
+    _run(monkeypatch, source_path, *args, "--translator", "echo")
+    assert len(recognized) == 1
+    assert _translated_pages(target_path) == 2
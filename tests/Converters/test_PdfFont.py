@@ -0,0 +1,124 @@
+from PyPDF4.generic import ArrayObject
+from PyPDF4.generic import DictionaryObject
+from PyPDF4.generic import NameObject
+from PyPDF4.generic import NumberObject
+
+from FileTranslator.Converters.PdfFont import _glyph_name_to_text
+from FileTranslator.Converters.PdfFont import _parse_to_unicode
+from FileTranslator.Converters.PdfFont import PdfFont
+
+################################################################################
+
+to_unicode = b"""
+/CIDInit /ProcSet findresource begin
+12 dict begin
+begincmap
+1 begincodespacerange
+<0000> <FFFF>
+endcodespacerange
+2 beginbfchar
+<0003> <0020>
+<0010> <D83DDE00>
+endbfchar
+2 beginbfrange
+<0024> <0026> <0041>
+<0100> <0101> [<0416> <00660069>]
+endbfrange
+endcmap
+"""
+
+
+def _font(entries: dict) -> DictionaryObject:
+    return DictionaryObject(
+        {NameObject(key): value for key, value in entries.items()}
+    )
+
+
+################################################################################
+
+
+def test_parse_to_unicode():
+    mapping, code_length = _parse_to_unicode(to_unicode)
+    assert code_length == 2
+    assert mapping == {
+        0x03: " ",
+        0x10: "\U0001f600",  # surrogate pair
+        0x24: "A",
+        0x25: "B",
+        0x26: "C",
+        0x100: "Ж",
+        0x101: "fi",  # ligature
+    }
+
+
+def test_parse_to_unicode_without_codespace():
+    data = b"1 beginbfchar <41> <0062> endbfchar"
+    assert _parse_to_unicode(data) == ({0x41: "b"}, 0)
+
+
+def test_glyph_name_to_text():
+    assert _glyph_name_to_text("/space") == " "
+    assert _glyph_name_to_text("/A") == "A"
+    assert _glyph_name_to_text("/a.sc") == "a"
+    assert _glyph_name_to_text("/uni0416") == "Ж"
+    assert _glyph_name_to_text("/uni00660069") == "fi"
+    assert _glyph_name_to_text("/u1F600") == "\U0001f600"
+    assert _glyph_name_to_text("/uni041") is None
+    assert _glyph_name_to_text("/g123") is None
+
+
+def test_simple_font_with_differences():
+    font = PdfFont(
+        _font(
+            {
+                "/Subtype": NameObject("/Type1"),
+                "/FirstChar": NumberObject(65),
+                "/Widths": ArrayObject([NumberObject(600), NumberObject(700)]),
+                "/Encoding": _font(
+                    {
+                        "/Differences": ArrayObject(
+                            [NumberObject(66), NameObject("/uni0416")]
+                        )
+                    }
+                ),
+            }
+        )
+    )
+    assert font.decode(b"AB\x01") == [
+        (65, "A", 0.6),
+        (66, "Ж", 0.7),
+        (1, None, 0.5),  # control codes aren't text, default width
+    ]
+
+
+def test_composite_font_widths():
+    descendant = _font(
+        {
+            "/DW": NumberObject(1000),
+            "/W": ArrayObject(
+                [
+                    NumberObject(1),
+                    ArrayObject([NumberObject(250), NumberObject(300)]),
+                    NumberObject(10),
+                    NumberObject(12),
+                    NumberObject(400),
+                ]
+            ),
+        }
+    )
+    font = PdfFont(
+        _font(
+            {
+                "/Subtype": NameObject("/Type0"),
+                "/DescendantFonts": ArrayObject([descendant]),
+            }
+        )
+    )
+    codes = bytes([0, 1, 0, 2, 0, 11, 0, 20])
+    # codes without ToUnicode are unknown
+    assert font.decode(codes) == [
+        (1, None, 0.25),
+        (2, None, 0.3),
+        (11, None, 0.4),
+        (20, None, 1.0),
+    ]
@@ -0,0 +1,46 @@
+from FileTranslator.OCR.LineAligner import align_lines
+
+################################################################################
+
+src_pars = [["First line of", "the first paragraph"], ["Second paragraph"]]
+
+
+def test_same_lines_are_kept():
+    text = "Erste Zeile des\nersten Absatzes\n\nZweiter Absatz"
+    lines, reflowed = align_lines(src_pars, text)
+    assert lines == ["Erste Zeile des", "ersten Absatzes", "Zweiter Absatz"]
+    assert reflowed == 0
+
+
+def test_paragraph_with_other_lines_is_reflowed():
+    text = "Erste Zeile des ersten Absatzes\n\nZweiter\nAbsatz"
+    lines, reflowed = align_lines(src_pars, text)
+    assert len(lines) == 3
+    assert " ".join(lines[:2]) == "Erste Zeile des ersten Absatzes"
+    assert lines[2] == "Zweiter Absatz"
+    assert reflowed == 2
+
+
+def test_reflow_keeps_proportions_of_lines():
+    pars = [["a" * 30, "b" * 10]]
+    lines, reflowed = align_lines(pars, " ".join(["word"] * 8))
+    assert [len(line.split()) for line in lines] == [6, 2]
+    assert reflowed == 1
+
+
+def test_other_paragraphs_reflow_whole_text():
+    text = "One paragraph instead of two, with all the words"
+    lines, reflowed = align_lines(src_pars, text)
+    assert len(lines) == 3
+    assert " ".join(line for line in lines if line) == text
+    assert reflowed == len(src_pars)
+
+
+def test_more_lines_than_words():
+    # word goes to the line containing its middle, other lines are empty
+    lines, _ = align_lines([["one", "two", "three"]], "single")
+    assert lines == ["", "single", ""]
+
+
+def test_no_source_lines():
+    assert align_lines([], "") == ([], 0)
@@ -0,0 +1,24 @@
+from PIL import Image
+from pytesseract import pytesseract as pt
+
+from FileTranslator.OCR.OCRCache import OCRCache
+
+################################################################################
+
+
+def test_tesseract_version_is_asked_on_first_lookup(tmp_path, monkeypatch):
+    calls = []
+
+    def version():
+        calls.append(1)
+        return "5.3.0"
+
+    monkeypatch.setattr(pt, "get_tesseract_version", version)
+    cache = OCRCache(str(tmp_path / "ocr.sqlite3"), 2**20)
+    assert calls == []
+    image = Image.new("L", (20, 10), 255)
+    key = cache.key(image, "eng")
+    cache.put(key, {"text": ["word"]})
+    assert cache.get(cache.key(image, "eng")) == {"text": ["word"]}
+    assert cache.get(cache.key(image, "rus")) is None
+    assert len(calls) == 1
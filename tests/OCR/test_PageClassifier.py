@@ -0,0 +1,129 @@
+import os
+import random
+
+from PIL import Image
+from PIL import ImageDraw
+from PIL import ImageFilter
+from PIL import ImageFont
+
+import FileTranslator
+from FileTranslator.OCR.PageClassifier import _is_text_tile
+from FileTranslator.OCR.PageClassifier import classify_page
+from FileTranslator.OCR.PageClassifier import min_tile_ink_share
+from FileTranslator.OCR.PageClassifier import tile_height
+from FileTranslator.OCR.PageClassifier import tile_width
+from FileTranslator.Util.PathInfo import PathInfo
+
+################################################################################
+
+# A4 at 100 dpi
+page_size = (827, 1169)
+
+words = "the quick brown fox jumps over lazy dog reading old books".split()
+
+
+def _font() -> ImageFont.FreeTypeFont:
+    fonts_dir = PathInfo(FileTranslator.__file__).fonts_dir
+    return ImageFont.truetype(os.path.join(fonts_dir, "arial.ttf"), 17)
+
+
+def _text(image: Image, top: int, bottom: int, left: int = 75, fill=0):
+    draw = ImageDraw.Draw(image)
+    font = _font()
+    random.seed(0)
+    for y in range(top, bottom, 25):
+        line = " ".join(random.choices(words, k=12))
+        while left + font.getlength(line) > image.width - 75:
+            line = line.rsplit(" ", 1)[0]
+        draw.text((left, y), line, font=font, fill=fill)
+
+
+def _photo(size: tuple) -> Image:
+    # smooth shapes with grain of film
+    image = Image.effect_mandelbrot(size, (-2, -1.2, 1, 1.2), 40)
+    image = image.filter(ImageFilter.GaussianBlur(4))
+    noise = Image.effect_noise(size, 20)
+    return Image.blend(image, noise, 0.2)
+
+
+def _tile(draw_ink) -> (Image, Image):
+    # tile and its edges, edges of border of image aren't used by classifier
+    image = Image.new("L", (tile_width + 2, tile_height + 2), 255)
+    draw_ink(ImageDraw.Draw(image))
+    edges = image.filter(ImageFilter.FIND_EDGES)
+    box = (1, 1, tile_width + 1, tile_height + 1)
+    return image.crop(box), edges.crop(box)
+
+
+################################################################################
+
+
+def test_blank_pages():
+    assert classify_page(Image.new("RGB", page_size, "white")) == "blank"
+    # paper with scanner noise and a speck
+    paper = Image.effect_noise(page_size, 6).point(lambda v: min(255, v + 60))
+    ImageDraw.Draw(paper).ellipse((400, 500, 402, 502), fill=0)
+    assert classify_page(paper) == "blank"
+
+
+def test_text_pages():
+    page = Image.new("RGB", page_size, "white")
+    _text(page, 100, 1050)
+    assert classify_page(page) == "text"
+    # tinted paper
+    page = Image.new("L", page_size, 120)
+    _text(page, 100, 1050)
+    assert classify_page(page) == "text"
+    # black and white page, a few lines only
+    page = Image.new("1", page_size, 1)
+    _text(page, 100, 200)
+    assert classify_page(page) == "text"
+
+
+def test_text_next_to_picture():
+    page = Image.new("L", page_size, 255)
+    page.paste(_photo((700, 500)), (60, 75))
+    _text(page, 625, 1050)
+    assert classify_page(page) == "text"
+    page = Image.new("L", page_size, 255)
+    page.paste(_photo((300, 900)), (75, 100))
+    _text(page, 100, 1000, left=425)
+    assert classify_page(page) == "text"
+
+
+def test_picture_pages():
+    assert classify_page(_photo(page_size)) == "picture"
+    page = Image.new("L", page_size, 255)
+    page.paste(_photo((700, 1000)), (60, 85))
+    assert classify_page(page) == "picture"
+    # low contrast sky has little ink, but it isn't blank
+    sky = Image.linear_gradient("L").resize(page_size)
+    sky = sky.point(lambda v: 150 + v // 3)
+    assert classify_page(sky) == "picture"
+
+
+def test_tile_ink_threshold():
+    # thin strokes have as many edges as ink, only amount of ink matters
+    def strokes(count: int):
+        return lambda draw: [
+            draw.line((10 + 8 * i, 1, 10 + 8 * i, tile_height), fill=0)
+            for i in range(count)
+        ]
+
+    tile, edges = _tile(strokes(2))
+    assert 2 / tile_width < min_tile_ink_share
+    assert not _is_text_tile(tile, edges)
+    tile, edges = _tile(strokes(5))
+    assert _is_text_tile(tile, edges)
+
+
+def test_tile_edge_threshold():
+    # the same share of ink in solid area has edges only at its border
+    tile, edges = _tile(lambda draw: draw.rectangle((30, 5, 70, 28), fill=0))
+    assert not _is_text_tile(tile, edges)
+    tile, edges = _tile(
+        lambda draw: [
+            draw.line((x, 5, x, 28), fill=0) for x in range(30, 71, 2)
+        ]
+    )
+    assert _is_text_tile(tile, edges)
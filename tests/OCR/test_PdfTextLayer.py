@@ -0,0 +1,70 @@
+import os
+
+from PIL import Image
+from PIL import ImageDraw
+
+from FileTranslator.OCR.PdfTextLayer import PdfTextLayer
+
+################################################################################
+
+examples_dir = os.path.join(
+    os.path.dirname(__file__), "..", "..", "examples", "source_texts"
+)
+english_path = os.path.join(
+    examples_dir, "InSearchOfLostTimeEnglishFragment.pdf"
+)
+russian_path = os.path.join(examples_dir, "RobinsonCrusoeRussianFragment.pdf")
+
+
+def _layout(pdf_path: str, ind: int, size: tuple):
+    layer = PdfTextLayer(pdf_path)
+    try:
+        return layer.layout(ind, Image.new("L", size, 255))
+    finally:
+        layer.close()
+
+
+################################################################################
+
+
+def test_english_text_and_boxes():
+    # letter page at 200 dpi
+    layout = _layout(english_path, 0, (1700, 2200))
+    assert layout.src_text.startswith(
+        "Overture\n\nFor a long time I used to go to bed early. Sometimes, "
+        "when I had put out my\ncandle,"
+    )
+    lines = [line for par in layout.pars_info for line in par]
+    assert len(layout.boxes) == len(lines)
+    # title is centered above the text
+    title = layout.boxes[0]
+    assert abs(title.x + title.w / 2 - 850) < 50
+    assert all(box.y > title.y for box in layout.boxes[1:])
+    for box in layout.boxes:
+        assert 0 <= box.x and box.x + box.w <= 1700
+        assert 0 <= box.y and box.y + box.h <= 2200
+
+
+def test_boxes_are_in_pixels_of_image():
+    small = _layout(english_path, 0, (850, 1100))
+    large = _layout(english_path, 0, (1700, 2200))
+    assert small.src_text == large.src_text
+    for lhs, rhs in zip(small.boxes, large.boxes):
+        assert abs(2 * lhs.x - rhs.x) <= 2 and abs(2 * lhs.y - rhs.y) <= 2
+
+
+def test_russian_text():
+    layout = _layout(russian_path, 0, (1654, 2339))
+    assert layout.src_text.startswith(
+        "Д. Дефо. «Робинзон Крузо»\n\n6\n\nГлава первая\n"
+    )
+    assert "�" not in layout.src_text
+
+
+def test_page_without_text_layer(tmp_path):
+    # scanned page: picture of text only
+    image = Image.new("L", (850, 1100), 255)
+    ImageDraw.Draw(image).text((100, 100), "Scanned text", fill=0)
+    pdf_path = str(tmp_path / "scan.pdf")
+    image.save(pdf_path, resolution=100)
+    assert _layout(pdf_path, 0, (850, 1100)) is None
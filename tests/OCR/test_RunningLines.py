@@ -0,0 +1,129 @@
+from PIL import Image
+
+from FileTranslator.OCR.PageLayout import LineBox
+from FileTranslator.OCR.PageLayout import PageLayout
+from FileTranslator.OCR.RunningLines import is_page_number
+from FileTranslator.OCR.RunningLines import RunningLines
+from FileTranslator.Util.Journal import Journal
+
+################################################################################
+
+page_height = 1000
+
+
+def _page(lines: list[tuple[str, int]]) -> PageLayout:
+    # every line is a paragraph, `y` is top of line
+    layout = PageLayout(Image.new("L", (800, page_height), 255))
+    for text, y in lines:
+        box = LineBox()
+        box.x, box.y, box.w, box.h = 100, y, 600, 20
+        layout.boxes.append(box)
+        layout.pars_info.append([text])
+    layout.src_text = "\n\n".join(text for text, _ in lines)
+    return layout
+
+
+def _book_page(header: str, body: str, number: str) -> PageLayout:
+    return _page([(header, 30), (body, 400), (number, 950)])
+
+
+def _translate(running_lines: RunningLines, layout: PageLayout) -> list[str]:
+    # translated lines of page as they are written to journal
+    texts = running_lines.untranslated(layout)
+    running_lines.store(texts, [f"[ru] {text}" for text in texts])
+    lines = [f"[ru] {line}" for par in layout.pars_info for line in par]
+    return lines + running_lines.lines(layout)
+
+
+################################################################################
+
+
+def test_page_numbers():
+    for text in ["7", "- 12 -", "— 7 —", "Page 3", "p. 3", "3 of 10"]:
+        assert is_page_number(text), text
+    for text in ["xiv", "стр. 5", "5 из 10"]:
+        assert is_page_number(text), text
+    for text in ["Chapter 3", "1984 was a year", "12 monkeys"]:
+        assert not is_page_number(text), text
+
+
+def test_running_header_is_removed_from_text():
+    running_lines = RunningLines()
+    first = _book_page("In Search of Lost Time", "First page.", "1")
+    assert running_lines.extract(first, 0) == 1
+    # the first occurrence is translated with text, number is removed
+    assert first.pars_info == [["In Search of Lost Time"], ["First page."]]
+    assert first.running_lines == []
+
+    second = _book_page("In Search of Lost Time", "Second page.", "2")
+    assert running_lines.extract(second, 1) == 1
+    assert second.src_text == "Second page."
+    assert second.running_lines == ["In Search of Lost Time"]
+    # box of running line follows boxes of text
+    assert [box.y for box in second.boxes] == [400, 30]
+
+
+def test_running_footer_and_recognition_errors():
+    running_lines = RunningLines()
+    pages = [
+        _page([("Body one.", 400), ("Marcel Proust. Swann's Way", 960)]),
+        _page([("Body two.", 400), ("Marcel Proust. Swann’s Way", 965)]),
+        _page([("Body three.", 400), ("Marcel Prous1. Swann's Way", 958)]),
+    ]
+    for ind, layout in enumerate(pages):
+        running_lines.extract(layout, ind)
+    assert [len(layout.running_lines) for layout in pages] == [0, 1, 1]
+    # translations are reused only for the same text
+    assert pages[2].running_lines == ["Marcel Prous1. Swann's Way"]
+
+
+def test_lines_of_page_body_are_kept():
+    running_lines = RunningLines()
+    for ind in range(3):
+        layout = _page([("Chapter I", 30), ("The same sentence.", 500)])
+        running_lines.extract(layout, ind)
+        assert "The same sentence." in layout.src_text
+    # header moved a lot is another line
+    layout = _page([("Chapter I", 80), ("Text.", 500)])
+    running_lines.extract(layout, 3)
+    assert layout.running_lines == []
+
+
+def test_similar_but_distinct_lines():
+    running_lines = RunningLines()
+    first = _book_page("CHAPTER 3", "Text.", "10")
+    second = _book_page("CHAPTER 4", "Text.", "11")
+    running_lines.extract(first, 0)
+    running_lines.extract(second, 1)
+    # line is running, but translation of "CHAPTER 3" isn't reused
+    assert second.running_lines == ["CHAPTER 4"]
+    running_lines.store(["CHAPTER 3"], ["ГЛАВА 3"])
+    assert running_lines.untranslated(second) == ["CHAPTER 4"]
+    running_lines.store(["CHAPTER 4"], ["ГЛАВА 4"])
+    assert running_lines.lines(second) == ["ГЛАВА 4"]
+
+
+def test_restore_from_journal(tmp_path):
+    header = "Robinson Crusoe"
+    pages = [_book_page(header, f"Page {i} text.", str(i)) for i in range(3)]
+    running_lines = RunningLines()
+    journal = Journal(str(tmp_path), {"job": 1}, resume=False)
+    for ind, layout in enumerate(pages[:2]):
+        running_lines.extract(layout, ind)
+        lines = _translate(running_lines, layout)
+        journal.record_page(ind, layout, lines, layout.image)
+    journal.close()
+
+    # resumed run knows the header and its translation
+    journal = Journal(str(tmp_path), {"job": 1}, resume=True)
+    restored = RunningLines()
+    for ind in journal.finished_pages():
+        _, lines = journal.load_lines(ind)
+        height = journal.page_size(ind)[1]
+        restored.restore(journal.load_layout(ind), ind, height, lines)
+    journal.close()
+    layout = pages[2]
+    restored.extract(layout, 2)
+    assert layout.running_lines == [header]
+    assert restored.untranslated(layout) == []
+    assert restored.lines(layout) == [f"[ru] {header}"]
@@ -0,0 +1,58 @@
+from FileTranslator.Translator.CachedTranslator import CachedTranslator
+from FileTranslator.Translator.EchoTranslator import EchoTranslator
+from FileTranslator.Util.DiskCache import DiskCache
+
+################################################################################
+
+
+class _CountingTranslator(EchoTranslator):
+    def __init__(self):
+        self.requests = []
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        self.requests.append(texts)
+        return super().translate_batch(texts)
+
+
+def _translator(tmp_path, path_info, translate_info, url: str):
+    backend = _CountingTranslator()
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), 2**20)
+    translator = CachedTranslator(backend, "libre", cache)
+    translate_info.set_translator("libre", url, 4)
+    translator.init(path_info, translate_info)
+    return translator, backend
+
+
+################################################################################
+
+
+def test_only_missing_segments_are_translated(
+    tmp_path, path_info, translate_info
+):
+    translator, backend = _translator(
+        tmp_path, path_info, translate_info, "http://first"
+    )
+    assert translator.translate_batch(["Hello", ""]) == ["[ru] Hello", ""]
+    assert translator.translate_batch(["Hello ", "World"]) == [
+        "[ru] Hello",
+        "[ru] World",
+    ]
+    assert backend.requests == [["Hello"], ["World"]]
+    translator.cache.close()
+
+
+def test_servers_of_translator_have_own_entries(
+    tmp_path, path_info, translate_info
+):
+    translator, _ = _translator(
+        tmp_path, path_info, translate_info, "http://first"
+    )
+    translator.translate_batch(["Hello"])
+    translator.cache.close()
+
+    translator, backend = _translator(
+        tmp_path, path_info, translate_info, "http://second"
+    )
+    translator.translate_batch(["Hello"])
+    assert backend.requests == [["Hello"]]
+    translator.cache.close()
@@ -0,0 +1,82 @@
+import re
+
+from FileTranslator.Translator.ITranslator import _pack
+from FileTranslator.Translator.ITranslator import _unpack
+from FileTranslator.Translator.ITranslator import ITranslator
+
+################################################################################
+
+
+# Upper-cases text. Like real translators it damages markers of long packs:
+# packs of more than `max_markers` segments lose their markers.
+class _UpperTranslator(ITranslator):
+    def __init__(self, max_markers: int = 100):
+        self.max_markers = max_markers
+        self.requests = []
+
+    def translate(self, text: str) -> str:
+        self.requests.append(text)
+        res = text.upper()
+        if len(re.findall(r"\[#\d+\]", text)) > self.max_markers:
+            res = re.sub(r"\[#\d+\]", "", res)
+        return res
+
+
+texts = ["First paragraph", "Second\nwith two lines", "Third", "Fourth"]
+
+################################################################################
+
+
+def test_pack_and_unpack():
+    packed = _pack(texts)
+    assert "[#1]" in packed and "[#3]" in packed
+    assert _unpack(packed, len(texts)) == texts
+
+
+def test_unpack_tolerates_spaces_in_markers():
+    translated = "ONE\n\n[ # 1 ]\n\nTWO\n\n[#2 ]\n\nTHREE"
+    assert _unpack(translated, 3) == ["ONE", "TWO", "THREE"]
+
+
+def test_unpack_damaged_markers():
+    assert _unpack("ONE\n\nTWO\n\n[#2]\n\nTHREE", 3) is None
+    assert _unpack("ONE\n\n[#2]\n\nTWO\n\n[#1]\n\nTHREE", 3) is None
+
+
+def test_batch_is_one_request():
+    translator = _UpperTranslator()
+    assert translator.translate_batch(texts) == [t.upper() for t in texts]
+    assert len(translator.requests) == 1
+
+
+def test_empty_texts_are_not_sent():
+    translator = _UpperTranslator()
+    res = translator.translate_batch(["", "text", "  \n", "more"])
+    assert res == ["", "TEXT", "", "MORE"]
+    assert _unpack(translator.requests[0], 2) == ["text", "more"]
+
+
+def test_packs_fit_max_request_length():
+    translator = _UpperTranslator()
+    translator.max_request_length = 40
+    batch = [f"segment number {i}" for i in range(10)]
+    assert translator.translate_batch(batch) == [t.upper() for t in batch]
+    assert len(translator.requests) > 1
+    assert all(len(request) <= 40 for request in translator.requests)
+
+
+def test_damaged_pack_is_bisected():
+    # markers of 4 segments are lost, halves of 2 segments are fine
+    translator = _UpperTranslator(max_markers=1)
+    assert translator.translate_batch(texts) == [t.upper() for t in texts]
+    assert len(translator.requests) == 3
+
+
+def test_bisection_down_to_single_segments():
+    translator = _UpperTranslator(max_markers=0)
+    assert translator.translate_batch(texts) == [t.upper() for t in texts]
+    # every segment is finally sent alone
+    singles = [
+        request for request in translator.requests if "[#" not in request
+    ]
+    assert singles == texts
@@ -0,0 +1,106 @@
+import socket
+
+import pytest
+
+from FileTranslator.Translator.EchoTranslator import echo_translation
+from FileTranslator.Translator.LibreTranslator import _ConnectionPool
+from FileTranslator.Translator.LibreTranslator import LibreTranslator
+
+################################################################################
+
+
+@pytest.fixture
+def connects(monkeypatch) -> list:
+    # connections opened by all pools
+    opened = []
+    connect = _ConnectionPool._connect
+
+    def counting_connect(pool):
+        opened.append(connect(pool))
+        return opened[-1]
+
+    monkeypatch.setattr(_ConnectionPool, "_connect", counting_connect)
+    return opened
+
+
+def _translator(path_info, translate_info, url: str) -> LibreTranslator:
+    translate_info.set_translator(
+        "libre", url, translate_info.translator_workers
+    )
+    translator = LibreTranslator()
+    translator.init(path_info, translate_info)
+    return translator
+
+
+################################################################################
+
+
+def test_translate(stub_server, path_info, translate_info):
+    translator = _translator(path_info, translate_info, stub_server.url)
+    assert translator.translate("Hello\n\nworld") == "[ru] Hello\n\n[ru] world"
+    assert translator.translate("  ") == ""
+
+
+def test_translate_batch_in_several_packs(
+    stub_server, path_info, translate_info, connects
+):
+    translator = _translator(path_info, translate_info, stub_server.url)
+    translator.max_request_length = 100
+    texts = [f"Paragraph {i}\nof two lines" for i in range(40)] + [""]
+    expected = [echo_translation(text, "ru") for text in texts]
+    assert translator.translate_batch(texts) == expected
+    # packs are sent concurrently, not more connections than workers
+    assert 1 < len(connects) <= translate_info.translator_workers
+
+
+def test_connections_are_reused(
+    stub_server, path_info, translate_info, connects
+):
+    translator = _translator(path_info, translate_info, stub_server.url)
+    for i in range(10):
+        assert translator.translate(f"text {i}") == f"[ru] text {i}"
+    assert len(connects) == 1
+
+
+def test_closed_connection_is_reopened(
+    stub_server, path_info, translate_info, connects
+):
+    translator = _translator(path_info, translate_info, stub_server.url)
+    assert translator.translate("first") == "[ru] first"
+    # e.g. server closed idle keep-alive connection
+    connects[0].sock.shutdown(socket.SHUT_RDWR)
+    assert translator.translate("second") == "[ru] second"
+    assert len(connects) == 2
+
+
+def test_reset_reopens_connections(
+    stub_server, path_info, translate_info, connects
+):
+    translator = _translator(path_info, translate_info, stub_server.url)
+    translator.translate("first")
+    translator.reset()
+    assert connects[0].sock is None
+    assert translator.translate("second") == "[ru] second"
+    assert len(connects) == 2
+
+
+def test_server_error(stub_server, path_info, translate_info):
+    translator = _translator(path_info, translate_info, stub_server.url + "/x")
+    with pytest.raises(LibreTranslator.TranslationFailed, match="400"):
+        translator.translate("text")
+    # connection is still usable after error response
+    translator.url = stub_server.url
+    translator.pool.path = ""
+    assert translator.translate("text") == "[ru] text"
+
+
+def test_failed_retry_frees_connection(stub_server, path_info, translate_info):
+    translator = _translator(path_info, translate_info, stub_server.url)
+    assert translator.translate("first") == "[ru] first"
+    stub_server.stop()
+    translator.pool.connections.queue[-1].sock.shutdown(socket.SHUT_RDWR)
+    # reconnection after dropped connection fails too, error is raised
+    with pytest.raises(ConnectionError):
+        translator.translate("second")
+    # broken connection isn't returned to pool, all slots are free
+    assert list(translator.pool.connections.queue) == [None] * 4
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from FileTranslator.Translator.EchoTranslator import EchoTranslator
+from FileTranslator.Translator.ReplayTranslator import RecordingTranslator
+from FileTranslator.Translator.ReplayTranslator import ReplayTranslator
+
+################################################################################
+
+texts = ["Hello world", "", "Second\nparagraph"]
+
+
+def _record(path_info, translate_info) -> list[str]:
+    recording = RecordingTranslator(EchoTranslator())
+    recording.init(path_info, translate_info)
+    translated = recording.translate_batch(texts)
+    assert recording.translate("Single") == "[ru] Single"
+    recording.close()
+    return translated
+
+
+def _replay(path_info, translate_info) -> ReplayTranslator:
+    translator = ReplayTranslator()
+    translator.init(path_info, translate_info)
+    return translator
+
+
+################################################################################
+
+
+def test_recorded_translations_file(path_info, translate_info):
+    _record(path_info, translate_info)
+    with open(path_info.translations_path, encoding="utf-8") as file:
+        records = [json.loads(line) for line in file]
+    # empty segments are not recorded
+    assert [record["src"] for record in records] == [
+        "Hello world",
+        "Second\nparagraph",
+        "Single",
+    ]
+    assert records[0] == {
+        "src_lang": "en",
+        "trg_lang": "ru",
+        "src": "Hello world",
+        "trg": "[ru] Hello world",
+    }
+
+
+def test_replay_of_recorded(path_info, translate_info):
+    translated = _record(path_info, translate_info)
+    translator = _replay(path_info, translate_info)
+    assert translator.translate_batch(texts) == translated
+    assert translator.translate("Single") == "[ru] Single"
+    # spaces inside lines don't matter
+    assert translator.translate("  Hello   world ") == "[ru] Hello world"
+
+
+def test_not_recorded(path_info, translate_info):
+    _record(path_info, translate_info)
+    translator = _replay(path_info, translate_info)
+    with pytest.raises(ReplayTranslator.TranslationNotRecorded):
+        translator.translate("Hello\nworld")
+
+
+def test_other_languages_are_not_replayed(path_info, translate_info):
+    _record(path_info, translate_info)
+    translate_info.set_languages("en", "de")
+    translator = _replay(path_info, translate_info)
+    with pytest.raises(ReplayTranslator.TranslationNotRecorded):
+        translator.translate("Hello world")
+
+
+def test_recording_is_closed_with_translator(path_info, translate_info):
+    closed = []
+
+    class _Translator(EchoTranslator):
+        def close(self) -> None:
+            closed.append(True)
+
+    recording = RecordingTranslator(_Translator())
+    recording.init(path_info, translate_info)
+    recording.translate("Hello")
+    # every record is written at once, not on close
+    with open(path_info.translations_path, encoding="utf-8") as file:
+        assert len(file.readlines()) == 1
+    recording.close()
+    assert recording.file.closed and closed == [True]
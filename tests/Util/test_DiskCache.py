@@ -0,0 +1,51 @@
+from FileTranslator.Util.DiskCache import DiskCache
+
+################################################################################
+
+
+def test_values_are_kept_between_runs(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = DiskCache(path, 1000)
+    cache.put("key", b"value")
+    cache.close()
+
+    cache = DiskCache(path, 1000)
+    assert cache.get("key") == b"value"
+    assert cache.get("other") is None
+    assert cache.size() == 5
+    cache.close()
+
+
+def test_replaced_value_is_counted_once(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), 1000)
+    cache.put("key", b"x" * 100)
+    cache.put("key", b"x" * 300)
+    assert cache.size() == 300
+    cache.close()
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), 1000)
+    for key in "abc":
+        cache.put(key, b"x" * 300)
+    cache.get("a")
+    cache.put("d", b"x" * 300)
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.size() == 900
+    cache.close()
+
+
+def test_size_is_shared_between_processes(tmp_path):
+    # every OCR worker process has its own connection to the same file
+    path = str(tmp_path / "cache.sqlite")
+    first = DiskCache(path, 1000)
+    second = DiskCache(path, 1000)
+    first.put("a", b"x" * 400)
+    second.put("b", b"x" * 400)
+    first.put("c", b"x" * 400)
+    assert second.size() <= 900
+    assert first.get("a") is None
+    assert second.get("b") is not None and second.get("c") is not None
+    first.close()
+    second.close()
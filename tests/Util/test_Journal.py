@@ -0,0 +1,127 @@
+import os
+
+from PIL import Image
+import pytest
+
+from FileTranslator.OCR.PageLayout import LineBox
+from FileTranslator.OCR.PageLayout import PageLayout
+from FileTranslator.Util.Journal import Journal
+
+################################################################################
+
+job_info = {"source_path": "book.pdf", "trg_lang": "ru"}
+
+
+def _layout(text: str) -> PageLayout:
+    layout = PageLayout(Image.new("L", (200, 100), 255))
+    box = LineBox()
+    box.x, box.y, box.w, box.h = 10, 20, 150, 30
+    layout.boxes = [box]
+    layout.pars_info = [[text]]
+    layout.src_text = text
+    return layout
+
+
+def _record(journal: Journal, ind: int, text: str) -> None:
+    image = Image.new("L", (200, 100), ind)
+    journal.record_page(ind, _layout(text), [f"[ru] {text}"], image)
+
+
+################################################################################
+
+
+def test_resume_finished_pages(tmp_path):
+    journal = Journal(str(tmp_path), job_info, resume=False)
+    _record(journal, 0, "first page")
+    _record(journal, 1, "second page")
+    journal.close()
+
+    journal = Journal(str(tmp_path), job_info, resume=True)
+    assert journal.finished_pages() == [0, 1]
+    assert journal.is_finished(1) and not journal.is_finished(2)
+    assert journal.load_page(1).getpixel((0, 0)) == 1
+    boxes, lines = journal.load_lines(0)
+    assert [(box.x, box.y, box.w, box.h) for box in boxes] == [
+        (10, 20, 150, 30)
+    ]
+    assert lines == ["[ru] first page"]
+    layout = journal.load_layout(1)
+    assert layout.src_text == "second page"
+    assert layout.pars_info == [["second page"]]
+    journal.close()
+
+
+def test_skipped_page(tmp_path):
+    journal = Journal(str(tmp_path), job_info, resume=False)
+    journal.record_page(0, None, None, Image.new("L", (200, 100)))
+    assert journal.load_lines(0) == ([], None)
+    assert journal.load_layout(0) is None
+    journal.close()
+
+
+def test_other_job_starts_from_scratch(tmp_path):
+    journal = Journal(str(tmp_path), job_info, resume=False)
+    _record(journal, 0, "first page")
+    journal.close()
+
+    journal = Journal(str(tmp_path), dict(job_info, trg_lang="de"), resume=True)
+    assert journal.finished_pages() == []
+    assert os.listdir(tmp_path / "pages") == []
+    journal.close()
+
+
+def test_without_resume_starts_from_scratch(tmp_path):
+    journal = Journal(str(tmp_path), job_info, resume=False)
+    _record(journal, 0, "first page")
+    journal.close()
+
+    journal = Journal(str(tmp_path), job_info, resume=False)
+    assert journal.finished_pages() == []
+    journal.close()
+
+
+def test_torn_record_is_skipped(tmp_path):
+    journal = Journal(str(tmp_path), job_info, resume=False)
+    _record(journal, 0, "first page")
+    journal.close()
+    # crash while the next record was written
+    with open(tmp_path / "journal.jsonl", "a") as file:
+        file.write('{"page": 1, "lay')
+
+    journal = Journal(str(tmp_path), job_info, resume=True)
+    assert journal.finished_pages() == [0]
+    _record(journal, 1, "second page")
+    journal.close()
+
+    journal = Journal(str(tmp_path), job_info, resume=True)
+    assert journal.finished_pages() == [0, 1]
+    journal.close()
+
+
+def test_remove(tmp_path):
+    work_dir = tmp_path / "work"
+    journal = Journal(str(work_dir), job_info, resume=False)
+    _record(journal, 0, "first page")
+    journal.remove()
+    assert not work_dir.exists()
+
+
+def test_files_of_user_are_kept(tmp_path):
+    (tmp_path / "notes.txt").write_text("notes")
+    journal = Journal(str(tmp_path), job_info, resume=False)
+    _record(journal, 0, "first page")
+    (tmp_path / "pages" / "cover.png").write_bytes(b"png")
+    journal.close()
+    journal = Journal(str(tmp_path), job_info, resume=False)
+    assert os.listdir(tmp_path / "pages") == ["cover.png"]
+    journal.remove()
+    assert sorted(os.listdir(tmp_path)) == ["notes.txt", "pages"]
+    assert os.listdir(tmp_path / "pages") == ["cover.png"]
+
+
+def test_foreign_pages_folder_is_refused(tmp_path):
+    (tmp_path / "pages").mkdir()
+    (tmp_path / "pages" / "000001.png").write_bytes(b"png")
+    with pytest.raises(RuntimeError):
+        Journal(str(tmp_path), job_info, resume=False)
+    assert os.listdir(tmp_path / "pages") == ["000001.png"]
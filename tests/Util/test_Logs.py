@@ -0,0 +1,73 @@
+import gzip
+import os
+import re
+import threading
+
+import FileTranslator.Util.Logs as Logs
+
+################################################################################
+
+
+def _read_gz(path) -> str:
+    with gzip.open(path, "rt") as file:
+        return file.read()
+
+
+################################################################################
+
+
+def test_messages_of_threads_are_not_mixed(tmp_path, capsys):
+    logs_path = str(tmp_path / ".logs")
+    Logs.init(logs_path, is_release=True)
+
+    def log(i: int) -> None:
+        for j in range(50):
+            Logs.error(f"error {i} {j}\nsecond line")
+            Logs.user(f"message {i} {j}")
+
+    threads = [threading.Thread(target=log, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    Logs.close()
+
+    with open(logs_path) as file:
+        lines = file.read().splitlines()
+    console = re.sub(r"\033\[\d+m", "", capsys.readouterr().out).splitlines()
+    assert lines == console
+    assert len(lines) == 8 * 50 * 3
+    for line, next_line in zip(lines, lines[1:]):
+        if line.startswith("[error]"):
+            assert re.fullmatch(r"\[error\] error \d \d+", line)
+            assert next_line == " " * len("[error] ") + "second line"
+        elif not line.startswith(" "):
+            assert re.fullmatch(r"\[log\] message \d \d+", line)
+
+
+def test_rotation(tmp_path):
+    logs_path = str(tmp_path / ".logs")
+    for i in range(3):
+        Logs.init(logs_path, is_release=True)
+        Logs.user(f"run {i}")
+        Logs.close()
+    assert sorted(os.listdir(tmp_path)) == [".logs", ".logs.1.gz", ".logs.2.gz"]
+    assert _read_gz(f"{logs_path}.1.gz") == "[log] run 1\n"
+    assert _read_gz(f"{logs_path}.2.gz") == "[log] run 0\n"
+
+
+def test_uncompressed_log_is_kept(tmp_path):
+    # previous run ended before log of the run before it was compressed
+    logs_path = str(tmp_path / ".logs")
+    with gzip.open(f"{logs_path}.1.gz", "wt") as file:
+        file.write("run 0\n")
+    with open(f"{logs_path}.1", "w") as file:
+        file.write("run 1\n")
+    with open(logs_path, "w") as file:
+        file.write("run 2\n")
+    Logs.init(logs_path, is_release=True)
+    Logs.close()
+    assert not os.path.exists(f"{logs_path}.1")
+    assert _read_gz(f"{logs_path}.1.gz") == "run 2\n"
+    assert _read_gz(f"{logs_path}.2.gz") == "run 1\n"
+    assert _read_gz(f"{logs_path}.3.gz") == "run 0\n"
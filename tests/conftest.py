@@ -0,0 +1,32 @@
+# Fixtures shared by tests. Nothing here needs network: translation server is
+# the local stub.
+
+import pytest
+
+import FileTranslator
+from FileTranslator.Translator.StubTranslationServer import (
+    StubTranslationServer,
+)
+from FileTranslator.Util.PathInfo import PathInfo
+from FileTranslator.Util.TranslateInfo import TranslateInfo
+
+
+@pytest.fixture
+def stub_server():
+    with StubTranslationServer() as server:
+        yield server
+
+
+@pytest.fixture
+def translate_info() -> TranslateInfo:
+    info = TranslateInfo()
+    info.set_languages("en", "ru")
+    info.set_translator("libre", "", 4)
+    return info
+
+
+@pytest.fixture
+def path_info(tmp_path) -> PathInfo:
+    info = PathInfo(FileTranslator.__file__)
+    info.set_translations_path(str(tmp_path / "translations.jsonl"))
+    return info